@@ -254,25 +254,30 @@ class WatchController(object):
             return exception.HeatMissingParameterError("MetricData list")
 
         watch_name = None
-        dimensions = []
+        samples = []
         for p in metric_data:
             dimension = api_utils.extract_param_pairs(p,
                                                       prefix='Dimensions',
                                                       keyname='Name',
                                                       valuename='Value')
+            dimensions = []
             if 'AlarmName' in dimension:
                 watch_name = dimension['AlarmName']
             else:
                 dimensions.append(dimension)
 
-        # Extract the required data from the metric_data
-        # and format dict to pass to engine
-        data = {'Namespace': namespace,
-                api_utils.get_param_value(metric_data[0], 'MetricName'): {
-                    'Unit': api_utils.get_param_value(metric_data[0], 'Unit'),
-                    'Value': api_utils.get_param_value(metric_data[0],
-                                                       'Value'),
-                    'Dimensions': dimensions}}
+            # Extract the required data from the metric_data
+            # and format dict to pass to engine
+            samples.append({
+                'Namespace': namespace,
+                api_utils.get_param_value(p, 'MetricName'): {
+                    'Unit': api_utils.get_param_value(p, 'Unit'),
+                    'Value': api_utils.get_param_value(p, 'Value'),
+                    'Dimensions': dimensions}})
+
+        # Post all the samples in one call, keeping the single sample format
+        # for the common case of a single metric
+        data = samples[0] if len(samples) == 1 else samples
 
         try:
             self.rpc_client.create_watch_data(con, watch_name, data)
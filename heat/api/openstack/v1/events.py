@@ -16,6 +16,7 @@ import itertools
 from webob import exc
 
 from heat.api.openstack.v1 import util
+from heat.api.openstack.v1.views import views_common
 from heat.common.i18n import _
 from heat.common import identifier
 from heat.common import param_utils
@@ -84,14 +85,15 @@ class EventController(object):
 
     def _event_list(self, req, identity, filter_func=lambda e: True,
                     detail=False, filters=None, limit=None, marker=None,
-                    sort_keys=None, sort_dir=None):
+                    sort_keys=None, sort_dir=None, wait_timeout=None):
         events = self.rpc_client.list_events(req.context,
                                              identity,
                                              filters=filters,
                                              limit=limit,
                                              marker=marker,
                                              sort_keys=sort_keys,
-                                             sort_dir=sort_dir)
+                                             sort_dir=sort_dir,
+                                             wait_timeout=wait_timeout)
         keys = None if detail else summary_keys
 
         return [format_event(req, e, keys) for e in events if filter_func(e)]
@@ -106,6 +108,7 @@ class EventController(object):
             'marker': 'single',
             'sort_dir': 'single',
             'sort_keys': 'multi',
+            'wait_timeout': 'single',
         }
         filter_whitelist = {
             'resource_status': 'mixed',
@@ -123,10 +126,18 @@ class EventController(object):
             limit = param_utils.extract_int(key, params[key], allow_zero=True)
             params[key] = limit
 
+        key = rpc_api.PARAM_WAIT_TIMEOUT
+        if key in params:
+            params[key] = param_utils.extract_int(key, params[key])
+
         if resource_name is None:
             events = self._event_list(req, identity,
                                       filters=filter_params, **params)
         else:
+            # Filter in the engine, so that limit and marker apply to the
+            # events of the resource rather than to those of the whole stack
+            filter_params = dict(filter_params or {},
+                                 resource_name=resource_name)
             res_match = lambda e: e[rpc_api.EVENT_RES_NAME] == resource_name
 
             events = self._event_list(req, identity, res_match,
@@ -135,7 +146,11 @@ class EventController(object):
                 msg = _('No events found for resource %s') % resource_name
                 raise exc.HTTPNotFound(msg)
 
-        return {'events': events}
+        result = {'events': events}
+        links = views_common.get_collection_links(req, events)
+        if links:
+            result['links'] = links
+        return result
 
     @util.identified_stack
     def show(self, req, identity, resource_name, event_id):
@@ -148,7 +163,8 @@ class EventController(object):
             return (ev[rpc_api.EVENT_RES_NAME] == resource_name and
                     identity.event_id == event_id)
 
-        events = self._event_list(req, identity, event_match, True)
+        events = self._event_list(req, identity, event_match, True,
+                                  filters={'resource_name': resource_name})
         if not events:
             raise exc.HTTPNotFound(_('No event %s found') % event_id)
 
@@ -331,9 +331,19 @@ class StackController(object):
         """
         Gets detailed information for a stack
         """
+        whitelist = {
+            'wait_timeout': 'single',
+            'stack_status': 'single',
+        }
+        params = util.get_allowed_params(req.params, whitelist)
+
+        key = rpc_api.PARAM_WAIT_TIMEOUT
+        if key in params:
+            params[key] = param_utils.extract_int(key, params[key])
 
         stack_list = self.rpc_client.show_stack(req.context,
-                                                identity)
+                                                identity,
+                                                **params)
 
         if not stack_list:
             raise exc.HTTPInternalServerError()
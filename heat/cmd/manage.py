@@ -84,7 +84,8 @@ def purge_deleted():
     """
     Remove database records that have been previously soft deleted
     """
-    utils.purge_deleted(CONF.command.age, CONF.command.granularity)
+    utils.purge_deleted(CONF.command.age, CONF.command.granularity,
+                        CONF.command.batch_size)
 
 
 def add_command_parsers(subparsers):
@@ -104,6 +105,10 @@ def add_command_parsers(subparsers):
         '-g', '--granularity', default='days',
         choices=['days', 'hours', 'minutes', 'seconds'],
         help=_('Granularity to use for age argument, defaults to days.'))
+    parser.add_argument(
+        '-b', '--batch_size', default=1000, type=int,
+        help=_('Number of stacks to delete in each transaction, '
+               'defaults to 1000.'))
 
     ServiceManageCommand.add_service_parsers(subparsers)
 
@@ -81,6 +81,16 @@ service_opts = [
     cfg.IntOpt('max_template_size',
                default=524288,
                help=_('Maximum raw byte size of any template.')),
+    cfg.IntOpt('template_fetch_cache_size',
+               default=50,
+               help=_('Maximum number of templates fetched from URLs to '
+                      'keep in memory for revalidation with conditional '
+                      'requests. Set to 0 to disable the cache.')),
+    cfg.IntOpt('template_parse_cache_size',
+               default=100,
+               help=_('Maximum number of parsed YAML templates to keep '
+                      'in memory, keyed by a digest of their text. Set to 0 '
+                      'to disable the cache.')),
     cfg.IntOpt('max_nested_stack_depth',
                default=5,
                help=_('Maximum depth allowed when using nested stacks.')),
@@ -136,6 +146,27 @@ engine_opts = [
                help=_('Maximum events that will be available per stack. Older'
                       ' events will be deleted when this is reached. Set to 0'
                       ' for unlimited events per stack.')),
+    cfg.IntOpt('event_prune_interval',
+               default=60,
+               help=_('Seconds between runs of the engine task which prunes '
+                      'the events of stacks that exceed max_events_per_stack. '
+                      'Set to 0 to prune events as they are stored instead.')),
+    cfg.IntOpt('max_wait_timeout',
+               default=0,
+               help=_('Maximum time in seconds that a request listing the '
+                      'events of a stack, or showing a stack, may wait for '
+                      'new events or a change of stack status. This should '
+                      'be less than rpc_response_timeout. When set, every '
+                      'stored event and stack state change is broadcast to '
+                      'all engines, so waiting is disabled by default.')),
+    cfg.IntOpt('max_waiting_requests',
+               default=16,
+               help=_('Maximum number of requests that each engine lets wait '
+                      'for stack changes at the same time. Each waiting '
+                      'request occupies an RPC worker, so this should be a '
+                      'small fraction of rpc_thread_pool_size (64 by '
+                      'default). Further requests return the current state '
+                      'without waiting.')),
     cfg.IntOpt('stack_action_timeout',
                default=3600,
                help=_('Timeout in seconds for stack action (ie. create or'
@@ -144,6 +175,14 @@ engine_opts = [
                default=240,
                help=_('Error wait time in seconds for stack action (ie. create'
                       ' or update).')),
+    cfg.IntOpt('max_resource_poll_interval',
+               default=0,
+               help=_('Maximum interval in seconds between checks of the '
+                      'progress of each resource during a stack action. '
+                      'When set, each resource is checked on its own '
+                      'exponential backoff up to this interval, rather than '
+                      'all resources being checked every second. Set to 0 '
+                      'to check every resource every second.')),
     cfg.IntOpt('engine_life_check_timeout',
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
@@ -258,7 +297,31 @@ default_clients_opts = [
     cfg.BoolOpt('insecure',
                 default=False,
                 help=_("If set, then the server's certificate will not "
-                       "be verified."))]
+                       "be verified.")),
+    cfg.IntOpt('lookup_cache_ttl',
+               default=60,
+               help=_('Time in seconds for which the result of looking up '
+                      'a flavor, image, key pair or network by name is '
+                      'cached. Set to 0 to disable the cache.')),
+    cfg.IntOpt('lookup_cache_size',
+               default=1000,
+               help=_('Maximum number of name lookup results that are '
+                      'cached by the engine.')),
+    cfg.IntOpt('connection_pools',
+               default=10,
+               help=_('Number of endpoints for which persistent HTTP '
+                      'connections are kept by the keystone sessions shared '
+                      'between requests.')),
+    cfg.IntOpt('connection_pool_size',
+               default=10,
+               help=_('Maximum number of persistent HTTP connections kept '
+                      'for each endpoint by the shared keystone sessions.')),
+    cfg.IntOpt('max_shared_sessions',
+               default=10,
+               help=_('Maximum number of keystone sessions shared between '
+                      'requests. A session is kept for each distinct set of '
+                      'TLS options; the least recently used one is dropped '
+                      'when the limit is reached.'))]
 
 # these options can be defined for each client
 # they must not specify defaults, since any options not defined in a client
@@ -277,7 +340,11 @@ clients_opts = [
                       'private key.')),
     cfg.BoolOpt('insecure',
                 help=_("If set, then the server's certificate will not "
-                       "be verified."))]
+                       "be verified.")),
+    cfg.IntOpt('lookup_cache_ttl',
+               help=_('Time in seconds for which the result of looking up '
+                      'a flavor, image, key pair or network by name is '
+                      'cached. Set to 0 to disable the cache.'))]
 
 heat_client_opts = [
     cfg.StrOpt('url',
@@ -11,6 +11,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+
 from keystoneclient import access
 from keystoneclient.auth.identity import base
 from keystoneclient.auth.identity import v3
@@ -106,6 +108,7 @@ class RequestContext(context.RequestContext):
         self.roles = roles or []
         self._session = None
         self._clients = None
+        self._stack_cache = None
         self.trust_id = trust_id
         self.trustor_user_id = trustor_user_id
         self.policy = policy.Enforcer()
@@ -128,6 +131,35 @@ class RequestContext(context.RequestContext):
             self._clients = clients.Clients(self)
         return self._clients
 
+    @property
+    def stack_cache(self):
+        '''Stacks loaded while handling a read-only request.
+
+        Keyed by (stack ID, parent resource name, show_deleted). Outside of
+        cached_stacks() nothing is kept, since stacks may be changed by other
+        engines while an action runs.
+        '''
+        if self._stack_cache is None:
+            return {}
+        return self._stack_cache
+
+    @contextlib.contextmanager
+    def cached_stacks(self):
+        '''
+        Share the stacks loaded by a read-only request for its duration.
+
+        Only requests that do not change any stack should use this.
+        '''
+        if self._stack_cache is not None:
+            yield
+            return
+
+        self._stack_cache = {}
+        try:
+            yield
+        finally:
+            self._stack_cache = None
+
     def to_dict(self):
         user_idt = '{user} {tenant}'.format(user=self.username or '-',
                                             tenant=self.tenant or '-')
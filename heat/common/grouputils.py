@@ -16,18 +16,39 @@ import six
 from heat.common import exception
 
 
+def _member_index(group):
+    """Get the sorted list of non-failed members of the specified group.
+
+    The list is cached on the group and rebuilt only when the group's nested
+    stack is replaced, e.g. when it is reloaded after an update, or when its
+    resources_version changes because a member was added, removed or changed
+    state. Callers must not modify the list.
+    """
+    nested = group.nested()
+    if not nested:
+        return []
+
+    cached = vars(group).get('_member_index')
+    if (cached is None or cached[0] is not nested or
+            cached[1] != nested.resources_version):
+        members = sorted((r for r in six.itervalues(nested)
+                          if r.status != r.FAILED),
+                         key=lambda r: (r.created_time, r.name))
+        cached = (nested, nested.resources_version, members)
+        group._member_index = cached
+    return cached[2]
+
+
 def get_size(group, include_failed=False):
     """Get number of member resources managed by the specified group.
 
     The size exclude failed members default, set include_failed=True
     to get total size.
     """
-    if group.nested():
-        resources = [r for r in six.itervalues(group.nested())
-                     if include_failed or r.status != r.FAILED]
-        return len(resources)
-    else:
-        return 0
+    if include_failed:
+        nested = group.nested()
+        return len(nested) if nested else 0
+    return len(_member_index(group))
 
 
 def get_members(group):
@@ -35,12 +56,7 @@ def get_members(group):
 
     Sort the list of instances first by created_time then by name.
     """
-    resources = []
-    if group.nested():
-        resources = [r for r in six.itervalues(group.nested())
-                     if r.status != r.FAILED]
-
-    return sorted(resources, key=lambda r: (r.created_time, r.name))
+    return list(_member_index(group))
 
 
 def get_member_refids(group, exclude=None):
@@ -48,30 +64,25 @@ def get_member_refids(group, exclude=None):
 
     The list of resources is sorted first by created_time then by name.
     """
-    members = get_members(group)
-    if len(members) == 0:
-        return []
-
     if exclude is None:
         exclude = []
-    return [r.FnGetRefId() for r in members
-            if r.FnGetRefId() not in exclude]
+    refids = (r.FnGetRefId() for r in _member_index(group))
+    return [refid for refid in refids if refid not in exclude]
 
 
 def get_member_names(group):
     """Get a list of resource names of the resources in the specified group.
     Failed resources will be ignored.
     """
-    return [r.name for r in get_members(group)]
+    return [r.name for r in _member_index(group)]
 
 
 def get_resource(stack, resource_name, use_indices, key):
-    nested_stack = stack.nested()
     try:
         if use_indices:
-            return get_members(stack)[int(resource_name)]
+            return _member_index(stack)[int(resource_name)]
         else:
-            return nested_stack[resource_name]
+            return stack.nested()[resource_name]
     except (IndexError, KeyError):
         raise exception.InvalidTemplateAttribute(resource=stack.name,
                                                  key=key)
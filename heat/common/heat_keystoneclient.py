@@ -17,7 +17,6 @@ import collections
 import uuid
 
 import keystoneclient.exceptions as kc_exception
-from keystoneclient import session
 from keystoneclient.v3 import client as kc_v3
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -29,6 +28,7 @@ from heat.common import exception
 from heat.common.i18n import _
 from heat.common.i18n import _LE
 from heat.common.i18n import _LW
+from heat.common import session_pool
 
 LOG = logging.getLogger('heat.common.keystoneclient')
 
@@ -73,7 +73,7 @@ class KeystoneClientV3(object):
         self._admin_client = None
         self._domain_admin_client = None
 
-        self.session = session.Session.construct(self._ssl_options())
+        self.session = session_pool.pool.get(self._ssl_options())
 
         if self.context.auth_url:
             self.v3_endpoint = self.context.auth_url.replace('v2.0', 'v3')
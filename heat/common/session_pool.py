@@ -0,0 +1,106 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+from keystoneclient import session
+from oslo_config import cfg
+import requests
+from requests import adapters
+from six.moves import http_cookiejar
+
+cfg.CONF.import_opt('connection_pools', 'heat.common.config',
+                    group='clients')
+cfg.CONF.import_opt('connection_pool_size', 'heat.common.config',
+                    group='clients')
+cfg.CONF.import_opt('max_shared_sessions', 'heat.common.config',
+                    group='clients')
+
+
+class _NoCookiePolicy(http_cookiejar.DefaultCookiePolicy):
+    '''Cookie policy that rejects every cookie.'''
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+class SessionPool(object):
+    '''
+    Keystone sessions shared by all of the request contexts in a process.
+
+    A session is created for each distinct set of TLS options, and keeps a
+    pool of persistent HTTP connections for each endpoint it talks to, so
+    contexts sharing a session do not each set up new TCP connections and
+    TLS handshakes. Sessions carry no authentication of their own; requests
+    are authenticated by the auth plugin of the context making them. Cookies
+    are never stored, so that one tenant's cookies are not sent with another
+    tenant's requests. At most max_shared_sessions sessions are kept; the
+    least recently used one is dropped to make room for a new one.
+    '''
+
+    def __init__(self):
+        self._sessions = collections.OrderedDict()
+
+    def get(self, options):
+        '''Return the shared session for the given TLS options.'''
+        key = tuple(sorted(options.items()))
+        sess = self._sessions.pop(key, None)
+        if sess is None:
+            sess = self._create(options)
+            while len(self._sessions) >= max(
+                    cfg.CONF.clients.max_shared_sessions, 1):
+                self._sessions.popitem(last=False)
+        self._sessions[key] = sess
+        return sess
+
+    def stats(self):
+        '''
+        Return counts of the HTTP connections made by the pooled sessions.
+
+        Connections are counted from the connection pools currently held for
+        each endpoint; requests beyond the number of connections created were
+        sent over a reused connection.
+        '''
+        created = requests_sent = 0
+        for sess in self._sessions.values():
+            # The same adapter is mounted for both http and https
+            for adapter in set(sess.session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    conn_pool = pools.get(key)
+                    if conn_pool is not None:
+                        created += conn_pool.num_connections
+                        requests_sent += conn_pool.num_requests
+        return {'sessions': len(self._sessions),
+                'connections_created': created,
+                'connections_reused': max(requests_sent - created, 0)}
+
+    @staticmethod
+    def _create(options):
+        http = requests.Session()
+        http.cookies.set_policy(_NoCookiePolicy())
+        adapter = adapters.HTTPAdapter(
+            pool_connections=cfg.CONF.clients.connection_pools,
+            pool_maxsize=cfg.CONF.clients.connection_pool_size)
+        for prefix in ('https://', 'http://'):
+            http.mount(prefix, adapter)
+        return session.Session.construct(dict(options, session=http))
+
+    def clear(self):
+        self._sessions.clear()
+
+
+pool = SessionPool()
@@ -11,6 +11,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import copy
+import hashlib
 import itertools
 import re
 
@@ -23,6 +26,7 @@ from heat.common import exception
 from heat.common.i18n import _
 
 cfg.CONF.import_opt('max_template_size', 'heat.common.config')
+cfg.CONF.import_opt('template_parse_cache_size', 'heat.common.config')
 
 if hasattr(yaml, 'CSafeLoader'):
     yaml_loader = yaml.CSafeLoader
@@ -48,19 +52,61 @@ yaml_loader.add_constructor(u'tag:yaml.org,2002:timestamp',
                             _construct_yaml_str)
 
 
+class ParseCache(object):
+    '''LRU cache of parsed YAML templates keyed by a digest of their text.
+
+    Only YAML is cached, since parsing JSON is cheaper than copying the
+    result. Callers always get their own copy of a cached template, so they
+    are free to modify it. Lookups are counted as hits and misses.
+    '''
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(tmpl_str):
+        if isinstance(tmpl_str, six.text_type):
+            tmpl_str = tmpl_str.encode('utf-8')
+        return hashlib.sha256(tmpl_str).hexdigest()
+
+    def get(self, tmpl_str):
+        key = self._key(tmpl_str)
+        tpl = self._entries.pop(key, None)
+        if tpl is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries[key] = tpl
+        return copy.deepcopy(tpl)
+
+    def put(self, tmpl_str, tpl):
+        size = cfg.CONF.template_parse_cache_size
+        if size <= 0:
+            return
+        self._entries[self._key(tmpl_str)] = copy.deepcopy(tpl)
+        while len(self._entries) > size:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        '''Return the number of cached templates, hits and misses.'''
+        return {'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses}
+
+    def clear(self):
+        self._entries.clear()
+
+
+parse_cache = ParseCache()
+
+
 def simple_parse(tmpl_str):
     try:
         tpl = jsonutils.loads(tmpl_str)
     except ValueError:
-        try:
-            tpl = yaml.load(tmpl_str, Loader=yaml_loader)
-        except yaml.YAMLError as yea:
-            yea = six.text_type(yea)
-            msg = _('Error parsing template: %s') % yea
-            raise ValueError(msg)
-        else:
-            if tpl is None:
-                tpl = {}
+        tpl = _parse_yaml(tmpl_str)
 
     if not isinstance(tpl, dict):
         raise ValueError(_('The template is not a JSON object '
@@ -69,6 +115,27 @@ def simple_parse(tmpl_str):
     return tpl
 
 
+def _parse_yaml(tmpl_str):
+    cacheable = isinstance(tmpl_str, six.string_types)
+    if cacheable:
+        tpl = parse_cache.get(tmpl_str)
+        if tpl is not None:
+            return tpl
+
+    try:
+        tpl = yaml.load(tmpl_str, Loader=yaml_loader)
+    except yaml.YAMLError as yea:
+        yea = six.text_type(yea)
+        msg = _('Error parsing template: %s') % yea
+        raise ValueError(msg)
+
+    if tpl is None:
+        tpl = {}
+    if cacheable and isinstance(tpl, dict):
+        parse_cache.put(tmpl_str, tpl)
+    return tpl
+
+
 def parse(tmpl_str):
     """Takes a string and returns a dict containing the parsed structure.
 
@@ -13,6 +13,10 @@
 
 """Utility for fetching a resource (e.g. a template) from a URL."""
 
+import collections
+import re
+import time
+
 from oslo_config import cfg
 from oslo_log import log as logging
 import requests
@@ -24,6 +28,7 @@ from heat.common.i18n import _
 from heat.common.i18n import _LI
 
 cfg.CONF.import_opt('max_template_size', 'heat.common.config')
+cfg.CONF.import_opt('template_fetch_cache_size', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
@@ -32,6 +37,16 @@ class URLFetchError(exception.Error, IOError):
     pass
 
 
+# Templates fetched over HTTP, most recently used last
+_cache = collections.OrderedDict()
+
+_CacheEntry = collections.namedtuple('_CacheEntry',
+                                     ['body', 'etag', 'last_modified',
+                                      'expires'])
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
 def get(url, allowed_schemes=('http', 'https')):
     """Get the data at the specified URL.
 
@@ -53,26 +68,78 @@ def get(url, allowed_schemes=('http', 'https')):
         except urllib.error.URLError as uex:
             raise URLFetchError(_('Failed to retrieve template: %s') % uex)
 
+    # A cached copy is used as is while it is fresh according to the
+    # Cache-Control max-age it was served with, and revalidated with a
+    # conditional request otherwise.
+    cached = _cache.pop(url, None)
+    if (cached is not None and cached.expires is not None and
+            time.time() < cached.expires):
+        _cache[url] = cached
+        return cached.body
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+
     try:
-        resp = requests.get(url, stream=True)
+        if headers:
+            resp = requests.get(url, stream=True, headers=headers)
+        else:
+            resp = requests.get(url, stream=True)
         resp.raise_for_status()
 
+        if (resp.status_code == requests.codes.not_modified and
+                cached is not None):
+            _cache_store(url, cached.body, resp.headers, cached)
+            return cached.body
+
         # We cannot use resp.text here because it would download the
         # entire file, and a large enough file would bring down the
         # engine.  The 'Content-Length' header could be faked, so it's
         # necessary to download the content in chunks to until
         # max_template_size is reached.  The chunk_size we use needs
-        # to balance CPU-intensive string concatenation with accuracy
-        # (eg. it's possible to fetch 1000 bytes greater than
-        # max_template_size with a chunk_size of 1000).
+        # to balance the number of chunks with accuracy (eg. it's
+        # possible to fetch 1000 bytes greater than max_template_size
+        # with a chunk_size of 1000).  Chunks are joined once at the end
+        # so that the cost is linear in the size of the template.
         reader = resp.iter_content(chunk_size=1000)
-        result = ""
+        chunks = []
+        size = 0
         for chunk in reader:
-            result += chunk
-            if len(result) > cfg.CONF.max_template_size:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > cfg.CONF.max_template_size:
                 raise URLFetchError("Template exceeds maximum allowed size (%s"
                                     " bytes)" % cfg.CONF.max_template_size)
+        result = "".join(chunks)
+        _cache_store(url, result, resp.headers)
         return result
 
     except exceptions.RequestException as ex:
         raise URLFetchError(_('Failed to retrieve template: %s') % ex)
+
+
+def _cache_store(url, body, headers, cached=None):
+    """Cache a fetched template if it was served with a validator or age."""
+    if cfg.CONF.template_fetch_cache_size <= 0:
+        return
+
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    if cached is not None:
+        # A 304 response need not repeat the validators
+        etag = etag or cached.etag
+        last_modified = last_modified or cached.last_modified
+
+    expires = None
+    max_age = _MAX_AGE_RE.search(headers.get('Cache-Control', ''))
+    if max_age:
+        expires = time.time() + int(max_age.group(1))
+
+    if etag or last_modified or expires is not None:
+        _cache[url] = _CacheEntry(body, etag, last_modified, expires)
+        while len(_cache) > cfg.CONF.template_fetch_cache_size:
+            _cache.popitem(last=False)
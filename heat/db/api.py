@@ -90,6 +90,10 @@ def resource_update(context, resource_id, values, atomic_key,
                                 expected_engine_id)
 
 
+def resource_update_and_save(context, resource_id, values):
+    return IMPL.resource_update_and_save(context, resource_id, values)
+
+
 def resource_create(context, values):
     return IMPL.resource_create(context, values)
 
@@ -130,16 +134,25 @@ def stack_get_by_name(context, stack_name):
 
 def stack_get_all(context, limit=None, sort_keys=None, marker=None,
                   sort_dir=None, filters=None, tenant_safe=True,
-                  show_deleted=False, show_nested=False):
+                  show_deleted=False, show_nested=False, eager_load=False):
     return IMPL.stack_get_all(context, limit, sort_keys,
                               marker, sort_dir, filters, tenant_safe,
-                              show_deleted, show_nested)
+                              show_deleted, show_nested, eager_load)
+
+
+def stack_get_status(context, stack_id, show_deleted=False):
+    return IMPL.stack_get_status(context, stack_id,
+                                 show_deleted=show_deleted)
 
 
 def stack_get_all_by_owner_id(context, owner_id):
     return IMPL.stack_get_all_by_owner_id(context, owner_id)
 
 
+def stack_get_all_by_ids(context, stack_ids):
+    return IMPL.stack_get_all_by_ids(context, stack_ids)
+
+
 def stack_count_all(context, filters=None, tenant_safe=True,
                     show_deleted=False, show_nested=False):
     return IMPL.stack_count_all(context, filters=filters,
@@ -148,6 +161,10 @@ def stack_count_all(context, filters=None, tenant_safe=True,
                                 show_nested=show_nested)
 
 
+def stack_count_total_resources(context, stack_id):
+    return IMPL.stack_count_total_resources(context, stack_id)
+
+
 def stack_create(context, values):
     return IMPL.stack_create(context, values)
 
@@ -216,6 +233,10 @@ def event_count_all_by_stack(context, stack_id):
     return IMPL.event_count_all_by_stack(context, stack_id)
 
 
+def event_prune(context, stack_id):
+    return IMPL.event_prune(context, stack_id)
+
+
 def event_create(context, values):
     return IMPL.event_create(context, values)
 
@@ -236,6 +257,10 @@ def watch_rule_get_all_by_stack(context, stack_id):
     return IMPL.watch_rule_get_all_by_stack(context, stack_id)
 
 
+def watch_rule_get_all_by_metric(context, metric_names):
+    return IMPL.watch_rule_get_all_by_metric(context, metric_names)
+
+
 def watch_rule_create(context, values):
     return IMPL.watch_rule_create(context, values)
 
@@ -260,6 +285,10 @@ def watch_data_get_all_by_watch_rule_id(context, watch_rule_id):
     return IMPL.watch_data_get_all_by_watch_rule_id(context, watch_rule_id)
 
 
+def watch_data_prune(context, watch_rule_id, before):
+    return IMPL.watch_data_prune(context, watch_rule_id, before)
+
+
 def software_config_create(context, values):
     return IMPL.software_config_create(context, values)
 
@@ -13,11 +13,16 @@
 
 '''Implementation of SQLAlchemy backend.'''
 import datetime
+import hashlib
+import operator
 import sys
+import time
 
 from oslo_config import cfg
+from oslo_db import exception as db_exception
 from oslo_db.sqlalchemy import session as db_session
-from oslo_db.sqlalchemy import utils
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import osprofiler.sqlalchemy
 import six
@@ -28,6 +33,7 @@ from sqlalchemy.orm import session as orm_session
 from heat.common import crypt
 from heat.common import exception
 from heat.common.i18n import _
+from heat.common.i18n import _LI
 from heat.db.sqlalchemy import filters as db_filters
 from heat.db.sqlalchemy import migration
 from heat.db.sqlalchemy import models
@@ -35,8 +41,11 @@ from heat.rpc import api as rpc_api
 
 CONF = cfg.CONF
 CONF.import_opt('max_events_per_stack', 'heat.common.config')
+CONF.import_opt('event_prune_interval', 'heat.common.config')
 CONF.import_group('profiler', 'heat.common.config')
 
+LOG = logging.getLogger(__name__)
+
 _facade = None
 
 
@@ -95,15 +104,65 @@ def raw_template_get(context, template_id):
     return result
 
 
+def _content_hash(content):
+    return hashlib.sha256(
+        jsonutils.dumps(content, sort_keys=True)).hexdigest()
+
+
+def _raw_template_files(context, files):
+    '''Return the shared row holding the given files.
+
+    Files are stored once for each distinct content, so the many nested
+    stacks which are passed the same files all refer to the same row.
+    '''
+    content_hash = _content_hash(files)
+    query = model_query(context, models.RawTemplateFiles).filter_by(
+        content_hash=content_hash)
+    files_ref = query.first()
+    if files_ref is None:
+        files_ref = models.RawTemplateFiles(files=files,
+                                            content_hash=content_hash)
+        try:
+            files_ref.save(_session(context))
+        except db_exception.DBDuplicateEntry:
+            # the same files were stored by another engine in the meantime
+            files_ref = query.first()
+    return files_ref
+
+
+def _raw_template_values(context, values, raw_template_ref=None):
+    '''Return the values to store for a raw template.
+
+    Non-empty files are moved to the shared raw_template_files table. Files
+    that are the same as those the template already has are left alone, so
+    they are not hashed again on every update.
+    '''
+    if 'files' not in values:
+        return values
+
+    values = dict(values)
+    files = values.pop('files')
+    if raw_template_ref is not None and files == raw_template_ref.files:
+        return values
+    if files:
+        values['shared_files'] = _raw_template_files(context, files)
+        values['inline_files'] = None
+    else:
+        values['shared_files'] = None
+        values['inline_files'] = files
+    return values
+
+
 def raw_template_create(context, values):
     raw_template_ref = models.RawTemplate()
-    raw_template_ref.update(values)
+    raw_template_ref.update(_raw_template_values(context, values))
     raw_template_ref.save(_session(context))
     return raw_template_ref
 
 
 def raw_template_update(context, template_id, values):
     raw_template_ref = raw_template_get(context, template_id)
+    values = _raw_template_values(context, values, raw_template_ref)
     # get only the changed values
     values = dict((k, v) for k, v in values.items()
                   if getattr(raw_template_ref, k) != v)
@@ -158,7 +217,10 @@ def resource_update(context, resource_id, values, atomic_key,
                     expected_engine_id=None):
     session = _session(context)
     with session.begin():
-        values['atomic_key'] = atomic_key + 1
+        if atomic_key is None:
+            values['atomic_key'] = 1
+        else:
+            values['atomic_key'] = atomic_key + 1
         rows_updated = session.query(models.Resource).filter_by(
             id=resource_id, engine_id=expected_engine_id,
             atomic_key=atomic_key).update(values)
@@ -166,6 +228,16 @@ def resource_update(context, resource_id, values, atomic_key,
         return bool(rows_updated)
 
 
+def resource_update_and_save(context, resource_id, values):
+    session = _session(context)
+    with session.begin():
+        rows_updated = session.query(models.Resource).filter_by(
+            id=resource_id).update(values)
+    if not rows_updated:
+        raise exception.NotFound(_("resource with id %s not found") %
+                                 resource_id)
+
+
 def resource_data_get_all(resource, data=None):
     """
     Looks up resource_data by resource.id.  If data is encrypted,
@@ -326,12 +398,50 @@ def stack_get(context, stack_id, show_deleted=False, tenant_safe=True,
     return result
 
 
+def stack_get_status(context, stack_id, show_deleted=False):
+    # Select the columns explicitly so that the row is always read from the
+    # database, rather than from a Stack already in the session.
+    result = model_query(context,
+                         models.Stack.action,
+                         models.Stack.status,
+                         models.Stack.status_reason,
+                         models.Stack.updated_at,
+                         models.Stack.deleted_at,
+                         models.Stack.tenant,
+                         models.Stack.stack_user_project_id).filter_by(
+        id=stack_id).first()
+
+    deleted_ok = show_deleted or context.show_deleted
+    if result is None or result.deleted_at is not None and not deleted_ok:
+        return None
+
+    if (context is not None and
+        context.tenant_id not in (result.tenant,
+                                  result.stack_user_project_id)):
+        return None
+    return result
+
+
 def stack_get_all_by_owner_id(context, owner_id):
     results = soft_delete_aware_query(
         context, models.Stack).filter_by(owner_id=owner_id).all()
     return results
 
 
+def stack_get_all_by_ids(context, stack_ids):
+    '''Return the stacks with the given IDs, including deleted ones.
+
+    As in stack_get(), stacks outside the context's project are omitted.
+    '''
+    if not stack_ids:
+        return []
+    results = model_query(context, models.Stack).filter(
+        models.Stack.id.in_(list(stack_ids))).all()
+    return [s for s in results
+            if context is None or
+            context.tenant_id in (s.tenant, s.stack_user_project_id)]
+
+
 def _get_sort_keys(sort_keys, mapping):
     '''Returns an array containing only whitelisted keys
 
@@ -344,6 +454,47 @@ def _get_sort_keys(sort_keys, mapping):
     return [mapping[key] for key in sort_keys or [] if key in mapping]
 
 
+def _seek_paginate_query(query, model, limit, sort_keys, marker, sort_dir):
+    """Return a page of query, sorted by sort_keys, following the marker.
+
+    This gives the same results as oslo_db's utils.paginate_query(), but the
+    rows following the marker are selected with a range condition on the
+    first sort key in addition to the usual OR of comparisons across all of
+    the sort keys. The database can then seek to the marker through an index
+    on the sort keys, so that deep pages cost no more than the first one.
+    """
+    try:
+        after, from_ = {'asc': (operator.gt, operator.ge),
+                        'desc': (operator.lt, operator.le)}[sort_dir or 'asc']
+    except KeyError:
+        raise ValueError(_("Unknown sort direction, "
+                           "must be 'desc' or 'asc'"))
+    direction = sqlalchemy.desc if sort_dir == 'desc' else sqlalchemy.asc
+
+    try:
+        columns = [getattr(model, key) for key in sort_keys]
+    except AttributeError:
+        raise exception.Invalid(reason=_('Sort key supplied was not '
+                                         'valid.'))
+
+    if marker is not None:
+        values = [getattr(marker, key) for key in sort_keys]
+        criteria = []
+        for i, column in enumerate(columns):
+            equal = [c == v for c, v in zip(columns[:i], values[:i])]
+            criteria.append(sqlalchemy.and_(after(column, values[i]),
+                                            *equal))
+        seek = sqlalchemy.or_(*criteria)
+        if values[0] is not None:
+            seek = sqlalchemy.and_(from_(columns[0], values[0]), seek)
+        query = query.filter(seek)
+
+    query = query.order_by(*[direction(c) for c in columns])
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
 def _paginate_query(context, query, model, limit=None, sort_keys=None,
                     marker=None, sort_dir=None):
     default_sort_keys = ['created_at']
@@ -359,12 +510,8 @@ def _paginate_query(context, query, model, limit=None, sort_keys=None,
     model_marker = None
     if marker:
         model_marker = model_query(context, model).get(marker)
-    try:
-        query = utils.paginate_query(query, model, limit, sort_keys,
-                                     model_marker, sort_dir)
-    except utils.InvalidSortKey as exc:
-        raise exception.Invalid(reason=exc.message)
-    return query
+    return _seek_paginate_query(query, model, limit, sort_keys,
+                                model_marker, sort_dir)
 
 
 def _query_stack_get_all(context, tenant_safe=True, show_deleted=False,
@@ -385,10 +532,12 @@ def _query_stack_get_all(context, tenant_safe=True, show_deleted=False,
 
 def stack_get_all(context, limit=None, sort_keys=None, marker=None,
                   sort_dir=None, filters=None, tenant_safe=True,
-                  show_deleted=False, show_nested=False):
+                  show_deleted=False, show_nested=False, eager_load=False):
     query = _query_stack_get_all(context, tenant_safe,
                                  show_deleted=show_deleted,
                                  show_nested=show_nested)
+    if eager_load:
+        query = query.options(orm.joinedload("raw_template"))
     return _filter_and_page_query(context, query, limit, sort_keys,
                                   marker, sort_dir, filters).all()
 
@@ -418,6 +567,24 @@ def stack_count_all(context, filters=None, tenant_safe=True,
     return query.count()
 
 
+def stack_count_total_resources(context, stack_id):
+    '''Count the resources of a stack and of every stack nested below it.
+
+    The tree is walked one level of nesting at a time, so this costs one
+    pair of queries per level rather than loading each nested stack.
+    '''
+    total = 0
+    stack_ids = [stack_id]
+    while stack_ids:
+        total += model_query(context, models.Resource).filter(
+            models.Resource.stack_id.in_(stack_ids)).count()
+        stack_ids = [s.id for s in model_query(
+            context, models.Stack.id).filter(
+                models.Stack.owner_id.in_(stack_ids)).filter_by(
+                    deleted_at=None).filter(models.Stack.backup.isnot(True))]
+    return total
+
+
 def stack_create(context, values):
     stack_ref = models.Stack()
     stack_ref.update(values)
@@ -459,6 +626,7 @@ def stack_delete(context, stack_id):
 
     s.soft_delete(session=session)
     session.flush()
+    _event_counts.pop(stack_id, None)
 
 
 def stack_lock_create(stack_id, engine_id):
@@ -598,13 +766,8 @@ def _events_paginate_query(context, query, model, limit=None, sort_keys=None,
         # user can only see the ID(column 'uuid') and the ID as the marker
         model_marker = model_query(
             context, model).filter_by(uuid=marker).first()
-    try:
-        query = utils.paginate_query(query, model, limit, sort_keys,
-                                     model_marker, sort_dir)
-    except utils.InvalidSortKey as exc:
-        raise exception.Invalid(reason=exc.message)
-
-    return query
+    return _seek_paginate_query(query, model, limit, sort_keys,
+                                model_marker, sort_dir)
 
 
 def _events_filter_and_page_query(context, query,
@@ -624,6 +787,11 @@ def _events_filter_and_page_query(context, query,
                                   whitelisted_sort_keys, marker, sort_dir)
 
 
+# Number of events known to exist for each stack, see event_create()
+_EVENT_COUNTS = 1000
+_event_counts = {}
+
+
 def event_count_all_by_stack(context, stack_id):
     return _query_all_by_stack(context, stack_id).count()
 
@@ -640,16 +808,50 @@ def _delete_event_rows(context, stack_id, limit):
         models.Event.id).limit(limit).all()]
     q = session.query(models.Event).filter(
         models.Event.id.in_(ids))
-    return q.delete(synchronize_session='fetch')
+    return q.delete(synchronize_session=False)
 
 
-def event_create(context, values):
-    if 'stack_id' in values and cfg.CONF.max_events_per_stack:
-        if ((event_count_all_by_stack(context, values['stack_id']) >=
-             cfg.CONF.max_events_per_stack)):
+def _event_count_reserve(context, stack_id):
+    '''Account for a new event, pruning the stack's oldest if needed.
+
+    The number of events for each stack is tracked in this process so that
+    the table is only counted when the stack is first seen and when the
+    tracked number reaches max_events_per_stack. Events written by other
+    engines are picked up by that recount before anything is pruned.
+    '''
+    limit = cfg.CONF.max_events_per_stack
+    count = _event_counts.get(stack_id)
+    if count is None or count >= limit:
+        count = event_count_all_by_stack(context, stack_id)
+        if count >= limit:
             # prune
-            _delete_event_rows(
-                context, values['stack_id'], cfg.CONF.event_purge_batch_size)
+            count -= _delete_event_rows(
+                context, stack_id,
+                count - limit + cfg.CONF.event_purge_batch_size)
+
+    if stack_id not in _event_counts and len(_event_counts) >= _EVENT_COUNTS:
+        _event_counts.clear()
+    _event_counts[stack_id] = count + 1
+
+
+def event_prune(context, stack_id):
+    '''Delete the oldest events of a stack beyond max_events_per_stack.'''
+    limit = cfg.CONF.max_events_per_stack
+    if not limit:
+        return 0
+    count = event_count_all_by_stack(context, stack_id)
+    if count <= limit:
+        return 0
+    return _delete_event_rows(
+        context, stack_id,
+        max(count - limit, cfg.CONF.event_purge_batch_size))
+
+
+def event_create(context, values):
+    # Events are pruned from a periodic engine task unless that is disabled
+    if ('stack_id' in values and cfg.CONF.max_events_per_stack and
+            not cfg.CONF.event_prune_interval):
+        _event_count_reserve(context, values['stack_id'])
     event_ref = models.Event()
     event_ref.update(values)
     event_ref.save(_session(context))
@@ -678,7 +880,27 @@ def watch_rule_get_all_by_stack(context, stack_id):
     return results
 
 
+def watch_rule_get_all_by_metric(context, metric_names):
+    '''Return the watch rules that alarm on any of the given metrics.'''
+    if not metric_names:
+        return []
+    results = model_query(context, models.WatchRule).filter(
+        models.WatchRule.metric_name.in_(list(metric_names))).all()
+    return results
+
+
+def _watch_rule_values(values):
+    '''Add the indexed metric name of the rule to the values to store.'''
+    rule = values.get('rule')
+    if isinstance(rule, dict):
+        values = dict(values,
+                      metric_name=(rule.get('meter_name') or
+                                   rule.get('MetricName')))
+    return values
+
+
 def watch_rule_create(context, values):
+    values = _watch_rule_values(values)
     obj_ref = models.WatchRule()
     obj_ref.update(values)
     obj_ref.save(_session(context))
@@ -693,7 +915,7 @@ def watch_rule_update(context, watch_id, values):
                                  '%(id)s %(msg)s') % {
                                      'id': watch_id,
                                      'msg': 'that does not exist'})
-    wr.update(values)
+    wr.update(_watch_rule_values(values))
     wr.save(_session(context))
 
 
@@ -731,6 +953,14 @@ def watch_data_get_all_by_watch_rule_id(context, watch_rule_id):
     return results
 
 
+def watch_data_prune(context, watch_rule_id, before):
+    '''Delete the samples of a watch rule created before the given time.'''
+    q = model_query(context, models.WatchData).filter(
+        models.WatchData.watch_rule_id == watch_rule_id,
+        models.WatchData.created_at < before)
+    return q.delete(synchronize_session=False)
+
+
 def software_config_create(context, values):
     obj_ref = models.SoftwareConfig()
     obj_ref.update(values)
@@ -886,7 +1116,7 @@ def service_get_all_by_args(context, host, binary, hostname):
             filter_by(hostname=hostname).all())
 
 
-def purge_deleted(age, granularity='days'):
+def purge_deleted(age, granularity='days', batch_size=1000):
     try:
         age = int(age)
     except ValueError:
@@ -898,6 +1128,13 @@ def purge_deleted(age, granularity='days'):
         raise exception.Error(
             _("granularity should be days, hours, minutes, or seconds"))
 
+    try:
+        batch_size = int(batch_size)
+    except ValueError:
+        raise exception.Error(_("batch_size should be an integer"))
+    if batch_size <= 0:
+        raise exception.Error(_("batch_size should be a positive integer"))
+
     if granularity == 'days':
         age = age * 86400
     elif granularity == 'hours':
@@ -907,42 +1144,121 @@ def purge_deleted(age, granularity='days'):
 
     time_line = datetime.datetime.now() - datetime.timedelta(seconds=age)
     engine = get_engine()
-    meta = sqlalchemy.MetaData()
-    meta.bind = engine
 
-    # Purge deleted stacks
-    stack = sqlalchemy.Table('stack', meta, autoload=True)
-    event = sqlalchemy.Table('event', meta, autoload=True)
-    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
-    user_creds = sqlalchemy.Table('user_creds', meta, autoload=True)
+    # Each batch is deleted in its own transaction, so an interrupted purge
+    # simply carries on from the remaining rows when it is run again.
+    start = time.time()
+    total = 0
+    while True:
+        batch_start = time.time()
+        with engine.begin() as conn:
+            stacks, rows = _purge_stacks(conn, time_line, batch_size)
+        if not stacks:
+            break
+        total += rows
+        LOG.info(_LI('Purged %(stacks)d deleted stacks (%(rows)d rows) '
+                     'in %(secs).2fs, %(total)d rows at %(rate).1f rows/s '
+                     'so far'),
+                 {'stacks': stacks, 'rows': rows,
+                  'secs': time.time() - batch_start, 'total': total,
+                  'rate': total / max(time.time() - start, 0.001)})
+
+    # Purge deleted services
+    service = models.Service.__table__
+    while True:
+        with engine.begin() as conn:
+            ids = [r[0] for r in conn.execute(
+                sqlalchemy.select([service.c.id]).where(
+                    service.c.deleted_at < time_line).limit(batch_size))]
+            if not ids:
+                break
+            conn.execute(service.delete().where(service.c.id.in_(ids)))
+        total += len(ids)
+
+    LOG.info(_LI('Purged %(total)d rows in %(secs).2fs'),
+             {'total': total, 'secs': time.time() - start})
+
 
-    stmt = sqlalchemy.select(
+def _purge_stacks(conn, time_line, batch_size):
+    """Delete a batch of deleted stacks together with all of their rows.
+
+    Returns the number of stacks and the total number of rows deleted.
+    """
+    stack = models.Stack.__table__
+    resource = models.Resource.__table__
+    raw_template = models.RawTemplate.__table__
+    user_creds = models.UserCreds.__table__
+    watch_rule = models.WatchRule.__table__
+
+    deleted = conn.execute(sqlalchemy.select(
         [stack.c.id,
          stack.c.raw_template_id,
+         stack.c.prev_raw_template_id,
          stack.c.user_creds_id]
-    ).where(stack.c.deleted_at < time_line)
-    deleted_stacks = engine.execute(stmt)
-
-    for s in deleted_stacks:
-        event_del = event.delete().where(event.c.stack_id == s[0])
-        engine.execute(event_del)
-        stack_del = stack.delete().where(stack.c.id == s[0])
-        engine.execute(stack_del)
-        raw_template_del = raw_template.delete().where(
-            raw_template.c.id == s[1])
-        engine.execute(raw_template_del)
-        user_creds_del = user_creds.delete().where(user_creds.c.id == s[2])
-        engine.execute(user_creds_del)
-
-    # Purge deleted services
-    service = sqlalchemy.Table('service', meta, autoload=True)
-    stmt = (sqlalchemy.select([service.c.id]).
-            where(service.c.deleted_at < time_line))
-    deleted_services = engine.execute(stmt)
-
-    for s in deleted_services:
-        stmt = service.delete().where(service.c.id == s[0])
-        engine.execute(stmt)
+    ).where(stack.c.deleted_at < time_line).limit(batch_size)).fetchall()
+    if not deleted:
+        return 0, 0
+
+    stack_ids = [s[0] for s in deleted]
+    template_ids = set(t for s in deleted for t in s[1:3] if t is not None)
+    creds_ids = set(s[3] for s in deleted if s[3] is not None)
+
+    def delete(table, clause):
+        return conn.execute(table.delete().where(clause)).rowcount
+
+    rows = 0
+    res_ids = sqlalchemy.select([resource.c.id]).where(
+        resource.c.stack_id.in_(stack_ids))
+    template_ids.update(r[0] for r in conn.execute(
+        sqlalchemy.select([resource.c.current_template_id]).where(
+            resource.c.stack_id.in_(stack_ids)).distinct())
+        if r[0] is not None)
+    rows += delete(models.ResourceData.__table__,
+                   models.ResourceData.__table__.c.resource_id.in_(res_ids))
+    rows += delete(resource, resource.c.stack_id.in_(stack_ids))
+
+    rule_ids = sqlalchemy.select([watch_rule.c.id]).where(
+        watch_rule.c.stack_id.in_(stack_ids))
+    rows += delete(models.WatchData.__table__,
+                   models.WatchData.__table__.c.watch_rule_id.in_(rule_ids))
+
+    for model in (models.WatchRule, models.Event, models.SyncPoint,
+                  models.Snapshot, models.StackTag, models.StackLock):
+        table = model.__table__
+        rows += delete(table, table.c.stack_id.in_(stack_ids))
+    rows += delete(stack, stack.c.id.in_(stack_ids))
+
+    # Templates and credentials may be shared with stacks that remain,
+    # e.g. nested stacks use the credentials of their parent.
+    if template_ids:
+        in_use = set()
+        for col in (stack.c.raw_template_id, stack.c.prev_raw_template_id,
+                    resource.c.current_template_id,
+                    raw_template.c.predecessor):
+            in_use.update(r[0] for r in conn.execute(
+                sqlalchemy.select([col]).where(col.in_(template_ids))))
+        template_ids -= in_use
+        if template_ids:
+            files_ids = set(r[0] for r in conn.execute(
+                sqlalchemy.select([raw_template.c.files_id]).where(
+                    raw_template.c.id.in_(template_ids)).distinct())
+                if r[0] is not None)
+            rows += delete(raw_template, raw_template.c.id.in_(template_ids))
+            if files_ids:
+                files_ids -= set(r[0] for r in conn.execute(
+                    sqlalchemy.select([raw_template.c.files_id]).where(
+                        raw_template.c.files_id.in_(files_ids))))
+                if files_ids:
+                    files = models.RawTemplateFiles.__table__
+                    rows += delete(files, files.c.id.in_(files_ids))
+    if creds_ids:
+        creds_ids -= set(r[0] for r in conn.execute(
+            sqlalchemy.select([stack.c.user_creds_id]).where(
+                stack.c.user_creds_id.in_(creds_ids))))
+        if creds_ids:
+            rows += delete(user_creds, user_creds.c.id.in_(creds_ids))
+
+    return len(stack_ids), rows
 
 
 def sync_point_delete_all_by_stack_and_traversal(context, stack_id,
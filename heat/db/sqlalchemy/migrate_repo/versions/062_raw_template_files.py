@@ -0,0 +1,90 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from migrate.changeset import constraint
+import sqlalchemy
+
+from heat.db.sqlalchemy import types
+from heat.db.sqlalchemy import utils as migrate_utils
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+
+    raw_template_files = sqlalchemy.Table(
+        'raw_template_files', meta,
+        sqlalchemy.Column('id', sqlalchemy.Integer,
+                          primary_key=True, nullable=False),
+        sqlalchemy.Column('files', types.Json),
+        sqlalchemy.Column('content_hash', sqlalchemy.String(64),
+                          nullable=False),
+        sqlalchemy.Column('created_at', sqlalchemy.DateTime),
+        sqlalchemy.Column('updated_at', sqlalchemy.DateTime),
+        sqlalchemy.Index('ix_raw_template_files_content_hash',
+                         'content_hash', unique=True),
+        mysql_engine='InnoDB',
+        mysql_charset='utf8'
+    )
+    raw_template_files.create()
+
+    files_id = sqlalchemy.Column('files_id', sqlalchemy.Integer)
+    files_id.create(raw_template)
+
+    fkey = constraint.ForeignKeyConstraint(
+        columns=[raw_template.c.files_id],
+        refcolumns=[raw_template_files.c.id],
+        name='raw_tmpl_files_fkey_ref')
+    fkey.create()
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    raw_template_files = sqlalchemy.Table('raw_template_files', meta,
+                                          autoload=True)
+
+    # Copy shared files back into the templates that use them
+    for row in migrate_engine.execute(
+            sqlalchemy.select([raw_template_files.c.id,
+                               raw_template_files.c.files])):
+        migrate_engine.execute(
+            raw_template.update().where(
+                raw_template.c.files_id == row[0]).values(files=row[1]))
+
+    if migrate_engine.name == 'sqlite':
+        _downgrade_sqlite(migrate_engine, meta, raw_template)
+    else:
+        fkey = constraint.ForeignKeyConstraint(
+            columns=[raw_template.c.files_id],
+            refcolumns=[raw_template_files.c.id],
+            name='raw_tmpl_files_fkey_ref')
+        fkey.drop()
+        raw_template.c.files_id.drop()
+    raw_template_files.drop()
+
+
+def _downgrade_sqlite(migrate_engine, meta, raw_template):
+    ignorecons = ['raw_tmpl_files_fkey_ref']
+    ignorecols = [raw_template.c.files_id.name]
+    new_raw_template = migrate_utils.clone_table('new_raw_template',
+                                                 raw_template,
+                                                 meta, ignorecols=ignorecols,
+                                                 ignorecons=ignorecons)
+
+    migrate_utils.migrate_data(migrate_engine,
+                               raw_template,
+                               new_raw_template,
+                               skip_columns=ignorecols)
@@ -0,0 +1,54 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_serialization import jsonutils
+import sqlalchemy
+
+
+def _metric_name(rule):
+    try:
+        rule = jsonutils.loads(rule)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(rule, dict):
+        return None
+    return rule.get('meter_name') or rule.get('MetricName')
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    watch_rule = sqlalchemy.Table('watch_rule', meta, autoload=True)
+
+    metric_name = sqlalchemy.Column('metric_name', sqlalchemy.String(255))
+    metric_name.create(watch_rule)
+    sqlalchemy.Index('ix_watch_rule_metric_name',
+                     watch_rule.c.metric_name).create(migrate_engine)
+
+    for row in migrate_engine.execute(
+            sqlalchemy.select([watch_rule.c.id, watch_rule.c.rule])):
+        name = _metric_name(row[1])
+        if name is not None:
+            migrate_engine.execute(
+                watch_rule.update().where(
+                    watch_rule.c.id == row[0]).values(metric_name=name))
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    watch_rule = sqlalchemy.Table('watch_rule', meta, autoload=True)
+
+    sqlalchemy.Index('ix_watch_rule_metric_name',
+                     watch_rule.c.metric_name).drop(migrate_engine)
+    watch_rule.c.metric_name.drop()
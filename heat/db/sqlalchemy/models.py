@@ -91,17 +91,43 @@ class StateAware(object):
     status_reason = sqlalchemy.Column('status_reason', sqlalchemy.Text)
 
 
+class RawTemplateFiles(BASE, HeatBase):
+    """Files of a template, shared by all templates with the same files."""
+
+    __tablename__ = 'raw_template_files'
+    id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+    files = sqlalchemy.Column(types.Json)
+    content_hash = sqlalchemy.Column(sqlalchemy.String(64), nullable=False,
+                                     index=True, unique=True)
+
+
 class RawTemplate(BASE, HeatBase):
     """Represents an unparsed template which should be in JSON format."""
 
     __tablename__ = 'raw_template'
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     template = sqlalchemy.Column(types.Json)
-    files = sqlalchemy.Column(types.Json)
+    # Files stored in the template row itself rather than shared
+    inline_files = sqlalchemy.Column('files', types.Json)
+    files_id = sqlalchemy.Column(
+        sqlalchemy.Integer, sqlalchemy.ForeignKey('raw_template_files.id'))
+    shared_files = relationship(RawTemplateFiles, lazy='joined')
     environment = sqlalchemy.Column('environment', types.Json)
     predecessor = sqlalchemy.Column('predecessor', sqlalchemy.Integer,
                                     sqlalchemy.ForeignKey('raw_template.id'))
 
+    @property
+    def files(self):
+        if self.shared_files is not None:
+            return self.shared_files.files
+        return self.inline_files
+
+    @files.setter
+    def files(self, files):
+        self.inline_files = files
+        self.files_id = None
+        self.shared_files = None
+
 
 class StackTag(BASE, HeatBase):
     """Key/value store of arbitrary stack tags."""
@@ -146,6 +172,9 @@ class Stack(BASE, HeatBase, SoftDelete, StateAware):
     __table_args__ = (
         sqlalchemy.Index('ix_stack_name', 'name', mysql_length=255),
         sqlalchemy.Index('ix_stack_tenant', 'tenant', mysql_length=255),
+        sqlalchemy.Index('ix_stack_tenant_created_at',
+                         'tenant', 'created_at', 'id',
+                         mysql_length={'tenant': 255}),
     )
 
     id = sqlalchemy.Column(sqlalchemy.String(36), primary_key=True,
@@ -224,6 +253,12 @@ class Event(BASE, HeatBase):
     """Represents an event generated by the heat engine."""
 
     __tablename__ = 'event'
+    __table_args__ = (
+        sqlalchemy.Index('ix_event_stack_id_created_at',
+                         'stack_id', 'created_at', 'id'),
+        sqlalchemy.Index('ix_event_stack_id_resource_name',
+                         'stack_id', 'resource_name', 'created_at', 'id'),
+    )
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     stack_id = sqlalchemy.Column(sqlalchemy.String(36),
@@ -321,6 +356,7 @@ class WatchRule(BASE, HeatBase):
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     name = sqlalchemy.Column('name', sqlalchemy.String(255), nullable=True)
     rule = sqlalchemy.Column('rule', types.Json)
+    metric_name = sqlalchemy.Column(sqlalchemy.String(255), index=True)
     state = sqlalchemy.Column('state', sqlalchemy.String(255))
     last_evaluated = sqlalchemy.Column(sqlalchemy.DateTime,
                                        default=timeutils.utcnow)
@@ -15,9 +15,11 @@ import collections
 
 from oslo_log import log as logging
 from oslo_utils import timeutils
+import six
 
 from heat.common.i18n import _
 from heat.common.i18n import _LE
+from heat.common import identifier
 from heat.common import param_utils
 from heat.common import template_format
 from heat.engine import constraints as constr
@@ -229,6 +231,39 @@ def format_event(event):
     return result
 
 
+def format_db_event(event, stack_identifier):
+    '''
+    Format an event object loaded from the database.
+
+    This gives the same result as format_event() without loading the stack
+    the event belongs to; only the identifier of that stack is needed.
+    '''
+    res_identifier = identifier.ResourceIdentifier(
+        resource_name=event.resource_name, **stack_identifier)
+    event_identifier = identifier.EventIdentifier(event_id=str(event.uuid),
+                                                  **res_identifier)
+    try:
+        properties = dict(event.resource_properties)
+    except ValueError as ex:
+        properties = {'Error': six.text_type(ex)}
+
+    result = {
+        rpc_api.EVENT_ID: dict(event_identifier),
+        rpc_api.EVENT_STACK_ID: dict(stack_identifier),
+        rpc_api.EVENT_STACK_NAME: stack_identifier.stack_name,
+        rpc_api.EVENT_TIMESTAMP: timeutils.isotime(event.created_at),
+        rpc_api.EVENT_RES_NAME: event.resource_name,
+        rpc_api.EVENT_RES_PHYSICAL_ID: event.physical_resource_id,
+        rpc_api.EVENT_RES_ACTION: event.resource_action,
+        rpc_api.EVENT_RES_STATUS: event.resource_status,
+        rpc_api.EVENT_RES_STATUS_DATA: event.resource_status_reason,
+        rpc_api.EVENT_RES_TYPE: event.resource_type,
+        rpc_api.EVENT_RES_PROPERTIES: properties,
+    }
+
+    return result
+
+
 def format_notification_body(stack):
     # some other possibilities here are:
     # - template name
@@ -117,6 +117,8 @@ class Attributes(collections.Mapping):
         self._resource_name = res_name
         self._resolver = resolver
         self._attributes = Attributes._make_attributes(schema)
+        # number of lookups answered from the cache instead of the resolver
+        self.cache_hits = 0
         self.reset_resolved_values()
 
     def reset_resolved_values(self):
@@ -156,6 +158,7 @@ class Attributes(collections.Mapping):
             return self._resolver(key)
 
         if key in self._resolved_values:
+            self.cache_hits += 1
             return self._resolved_values[key]
 
         value = self._resolver(key)
@@ -12,17 +12,54 @@
 #    under the License.
 
 import abc
+import collections
 
 from keystoneclient import auth
 from keystoneclient.auth.identity import v2
 from keystoneclient.auth.identity import v3
 from keystoneclient import exceptions
-from keystoneclient import session
 from oslo_config import cfg
+from oslo_utils import timeutils
 import six
 
 from heat.common import context
 from heat.common.i18n import _
+from heat.common import session_pool
+
+
+class LookupCache(object):
+    '''
+    A cache of the results of looking up resources by name.
+
+    A single cache is shared by all of the client plugins in the engine.
+    Entries expire after the time to live given when they are stored, and
+    the least recently used entries are discarded once the cache holds the
+    configured maximum number of entries.
+    '''
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        '''Return the cached value for key, or raise KeyError.'''
+        expires, value = self._entries.pop(key)
+        if expires <= timeutils.utcnow_ts():
+            raise KeyError(key)
+        self._entries[key] = (expires, value)
+        return value
+
+    def set(self, key, value, ttl):
+        '''Store a value for key, to expire after ttl seconds.'''
+        self._entries.pop(key, None)
+        self._entries[key] = (timeutils.utcnow_ts() + ttl, value)
+        while len(self._entries) > cfg.CONF.clients.lookup_cache_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+lookup_cache = LookupCache()
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -40,17 +77,15 @@ class ClientPlugin(object):
 
     @property
     def _keystone_session(self):
-        # FIXME(jamielennox): This session object is essentially static as the
-        # options won't change. Further it is allowed to be shared by multiple
-        # authentication requests so there is no reason to construct it fresh
-        # for every client plugin. It should be global and shared amongst them.
+        # The session is shared by all of the client plugins in the engine,
+        # so that its HTTP connections are reused across request contexts.
         if not self._keystone_session_obj:
             o = {'cacert': self._get_client_option('keystone', 'ca_file'),
                  'insecure': self._get_client_option('keystone', 'insecure'),
                  'cert': self._get_client_option('keystone', 'cert_file'),
                  'key': self._get_client_option('keystone', 'key_file')}
 
-            self._keystone_session_obj = session.Session.construct(o)
+            self._keystone_session_obj = session_pool.pool.get(o)
 
         return self._keystone_session_obj
 
@@ -142,6 +177,31 @@ class ClientPlugin(object):
         cfg.CONF.import_opt(option, 'heat.common.config', group='clients')
         return getattr(cfg.CONF.clients, option)
 
+    def cached_lookup(self, client, kind, name, lookup, per_user=False):
+        '''
+        Return the result of lookup(name), caching it for the current tenant.
+
+        :param client: the name of the client used for the lookup
+        :param kind: the kind of resource being looked up, e.g. 'flavor'
+        :param name: the name (or ID) of the resource
+        :param lookup: a function of one argument that performs the lookup
+        :param per_user: cache the result for the current user only, for
+            resources that belong to users rather than tenants
+        '''
+        ttl = self._get_client_option(client, 'lookup_cache_ttl')
+        if not ttl:
+            return lookup(name)
+
+        user_id = self.context.user_id if per_user else None
+        key = (self.context.tenant_id, user_id, self.context.region_name,
+               client, kind, name)
+        try:
+            return lookup_cache.get(key)
+        except KeyError:
+            value = lookup(name)
+            lookup_cache.set(key, value, ttl)
+            return value
+
     def is_client_exception(self, ex):
         '''Returns True if the current exception comes from the client.'''
         if self.exceptions_module:
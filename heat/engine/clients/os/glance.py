@@ -67,6 +67,10 @@ class GlanceClientPlugin(client_plugin.ClientPlugin):
         :raises: exception.ImageNotFound,
                  exception.PhysicalResourceNameAmbiguity
         '''
+        return self.cached_lookup('glance', 'image', image_identifier,
+                                  self._find_image_id)
+
+    def _find_image_id(self, image_identifier):
         if uuidutils.is_uuid_like(image_identifier):
             try:
                 image_id = self.client().images.get(image_identifier).id
@@ -67,8 +67,16 @@ class NeutronClientPlugin(client_plugin.ClientPlugin):
         return isinstance(ex, exceptions.NeutronClientNoUniqueMatch)
 
     def find_neutron_resource(self, props, key, key_type):
-        return neutronV20.find_resourceid_by_name_or_id(
-            self.client(), key_type, props.get(key))
+        def lookup(name):
+            return neutronV20.find_resourceid_by_name_or_id(
+                self.client(), key_type, name)
+
+        # Only networks are cached, since stacks routinely replace ports,
+        # subnets and routers while keeping the same names
+        if key_type == 'network':
+            return self.cached_lookup('neutron', key_type, props.get(key),
+                                      lookup)
+        return lookup(props.get(key))
 
     def _resolve(self, props, key, id_key, key_type):
         if props.get(key):
@@ -140,8 +148,10 @@ class NetworkConstraint(constraints.BaseCustomConstraint):
             # is not using neutron
             client.client_plugin('nova').get_nova_network_id(value)
         else:
-            neutronV20.find_resourceid_by_name_or_id(
-                neutron_client, 'network', value)
+            client.client_plugin('neutron').cached_lookup(
+                'neutron', 'network', value,
+                lambda name: neutronV20.find_resourceid_by_name_or_id(
+                    neutron_client, 'network', name))
 
 
 class PortConstraint(constraints.BaseCustomConstraint):
@@ -25,6 +25,7 @@ from novaclient import exceptions
 from novaclient import shell as novashell
 from oslo_config import cfg
 from oslo_serialization import jsonutils
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
 import six
 from six.moves.urllib import parse as urlparse
@@ -39,6 +40,108 @@ from heat.engine import scheduler
 LOG = logging.getLogger(__name__)
 
 
+class ServerStatusPoller(object):
+    '''
+    Refresh the details of a group of servers with a single request.
+
+    Servers are registered as they are refreshed. While more than one server
+    is being waited on, at most one request per interval is made to list the
+    servers that have changed since the oldest known state of any of them,
+    and the results are handed out to each server when it is next refreshed.
+    A server that is not in the complete list has not changed since it was
+    last refreshed. The list is paged through until every server has been
+    seen or nova returns no more; if that takes more than MAX_PAGES requests,
+    the servers not yet seen are fetched directly instead. Servers are
+    forgotten once they stop being refreshed.
+    '''
+
+    EXPIRY_INTERVALS = 10
+    MAX_PAGES = 5
+
+    def __init__(self, client, interval=1):
+        self.client = client
+        self.interval = interval
+        self._waiting = {}
+        self._pending = {}
+        self._polled_at = None
+
+    def refresh(self, server):
+        now = scheduler.wallclock()
+        self._waiting[server.id] = (now, getattr(server, 'updated', None))
+        self._expire(now)
+
+        if self._poll_due(now):
+            # Anything not yet handed out from the last poll is out of date
+            self._pending.clear()
+            self._poll(now)
+
+        if server.id in self._pending:
+            info = self._pending.pop(server.id)
+            if info is not None:
+                server._add_details(info)
+        else:
+            server.get()
+
+        self._waiting[server.id] = (now, getattr(server, 'updated', None))
+
+    def _poll_due(self, now):
+        if len(self._waiting) < 2:
+            return False
+        return (self._polled_at is None or
+                now - self._polled_at >= self.interval)
+
+    def _expire(self, now):
+        expiry = self.EXPIRY_INTERVALS * self.interval
+        for server_id, (refreshed_at, updated) in list(
+                six.iteritems(self._waiting)):
+            if now - refreshed_at > expiry:
+                del self._waiting[server_id]
+                self._pending.pop(server_id, None)
+
+    def _poll(self, now):
+        known = dict((server_id, updated)
+                     for server_id, (refreshed_at, updated)
+                     in six.iteritems(self._waiting) if updated)
+        if len(known) < 2:
+            return
+
+        self._polled_at = now
+        since = min(six.itervalues(known), key=timeutils.parse_isotime)
+        changed, complete = self._list_changed(since, known)
+
+        for server_id in known:
+            info = changed.get(server_id)
+            if info is None and not complete:
+                # The server may be on a page that was not fetched
+                continue
+            if info is not None and info.get('status') == 'DELETED':
+                # Let the server be fetched directly, so that the caller
+                # sees the NotFound error it expects
+                self._pending.pop(server_id, None)
+            else:
+                self._pending[server_id] = info
+
+    def _list_changed(self, since, known):
+        '''
+        Return the details of the known servers changed since the given time,
+        and whether every page that could contain them was fetched.
+        '''
+        changed = {}
+        marker = None
+        for page_num in six.moves.xrange(self.MAX_PAGES):
+            servers = self.client().servers.list(
+                search_opts={'changes-since': since}, marker=marker)
+            if not servers:
+                return changed, True
+
+            changed.update((s.id, s._info) for s in servers if s.id in known)
+            if len(changed) == len(known):
+                return changed, True
+            marker = servers[-1].id
+
+        return changed, False
+
+
 class NovaClientPlugin(client_plugin.ClientPlugin):
 
     deferred_server_statuses = ['BUILD',
@@ -54,6 +157,10 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
 
     exceptions_module = exceptions
 
+    def __init__(self, context):
+        super(NovaClientPlugin, self).__init__(context)
+        self._server_poller = ServerStatusPoller(self.client)
+
     def _create(self):
         computeshell = novashell.OpenStackComputeShell()
         extensions = computeshell._discover_extensions("1.1")
@@ -104,9 +211,13 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         '''
         Refresh server's attributes and log warnings for non-critical
         API errors.
+
+        When several servers are being waited on through this client, their
+        details are refreshed in batches rather than with a request for each
+        server.
         '''
         try:
-            server.get()
+            self._server_poller.refresh(server)
         except exceptions.OverLimit as exc:
             LOG.warn(_LW("Server %(name)s (%(id)s) received an OverLimit "
                          "response during server.get(): %(exception)s"),
@@ -150,6 +261,10 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         :returns: the id of :flavor:
         :raises: exception.FlavorMissing
         '''
+        return self.cached_lookup('nova', 'flavor', flavor,
+                                  self._find_flavor_id)
+
+    def _find_flavor_id(self, flavor):
         flavor_id = None
         flavor_list = self.client().flavors.list()
         for o in flavor_list:
@@ -478,6 +593,10 @@ echo -e '%s\tALL=(ALL)\tNOPASSWD: ALL' >> /etc/sudoers
         return net_id
 
     def get_nova_network_id(self, net_identifier):
+        return self.cached_lookup('nova', 'network', net_identifier,
+                                  self._find_nova_network_id)
+
+    def _find_nova_network_id(self, net_identifier):
         if uuidutils.is_uuid_like(net_identifier):
             try:
                 net_id = self.client().networks.get(net_identifier).id
@@ -506,7 +625,10 @@ class KeypairConstraint(constraints.BaseCustomConstraint):
             # Don't validate empty key, which can happen when you
             # use a KeyPair resource
             return True
-        client.client_plugin('nova').get_keypair(key_name)
+        nova_plugin = client.client_plugin('nova')
+        # key pairs belong to users, not tenants
+        nova_plugin.cached_lookup('nova', 'keypair', key_name,
+                                  nova_plugin.get_keypair, per_user=True)
 
 
 class FlavorConstraint(constraints.BaseCustomConstraint):
@@ -11,12 +11,106 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
+import eventlet
+from eventlet import event as green_event
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import uuidutils
 import six
 
 from heat.common import exception
 from heat.common.i18n import _
+from heat.common.i18n import _LE
+from heat.common.i18n import _LW
 from heat.common import identifier
+from heat.common import messaging as rpc_messaging
 from heat.objects import event as event_object
+from heat.rpc import api as rpc_api
+
+cfg.CONF.import_opt('event_prune_interval', 'heat.common.config')
+cfg.CONF.import_opt('max_events_per_stack', 'heat.common.config')
+cfg.CONF.import_opt('max_wait_timeout', 'heat.common.config')
+
+LOG = logging.getLogger(__name__)
+
+# IDs of stacks which have had events stored since they were last pruned
+_unpruned_stacks = set()
+
+# Requests waiting for a change to a stack, keyed by stack ID
+_stack_waiters = collections.defaultdict(set)
+
+# Identifies the change notifications sent by this process
+_notifier_id = uuidutils.generate_uuid()
+
+
+def notify_waiters(stack_id):
+    '''Wake any requests waiting for a change to the given stack.'''
+    for waiter in _stack_waiters.pop(stack_id, ()):
+        waiter.send()
+
+
+def notify_all_waiters(context, stack_id):
+    '''
+    Wake the requests waiting for a change to the given stack in every engine.
+
+    Waiters in this engine are woken at once; the other engines are notified
+    through a fanout cast to their listeners.
+    '''
+    notify_waiters(stack_id)
+    if not cfg.CONF.max_wait_timeout:
+        return
+
+    client = rpc_messaging.get_rpc_client(version='1.0',
+                                          topic=rpc_api.LISTENER_TOPIC)
+    try:
+        client.prepare(fanout=True).cast(context, 'notify_waiters',
+                                         stack_id=stack_id,
+                                         sender=_notifier_id)
+    except Exception as ex:
+        LOG.warn(_LW('Failed to notify other engines of a change to stack '
+                     '%(stack)s: %(err)s'), {'stack': stack_id, 'err': ex})
+
+
+def notify_remote_waiters(stack_id, sender):
+    '''Wake the requests waiting for a change notified by another engine.'''
+    if sender != _notifier_id:
+        notify_waiters(stack_id)
+
+
+def wait_for_change(stack_id, timeout):
+    '''
+    Wait for an event or a state change to be stored for the given stack.
+
+    Changes are signalled by every engine, but a notification may be lost,
+    so callers should check the database again when this times out. Returns
+    True if a change was signalled within the timeout.
+    '''
+    waiter = green_event.Event()
+    _stack_waiters[stack_id].add(waiter)
+    try:
+        with eventlet.Timeout(timeout, False):
+            waiter.wait()
+            return True
+        return False
+    finally:
+        waiters = _stack_waiters.get(stack_id)
+        if waiters is not None:
+            waiters.discard(waiter)
+            if not waiters:
+                del _stack_waiters[stack_id]
+
+
+def prune_events(context):
+    '''Prune the events of each stack that has had events stored.'''
+    while _unpruned_stacks:
+        stack_id = _unpruned_stacks.pop()
+        try:
+            event_object.Event.prune_by_stack(context, stack_id)
+        except Exception:
+            LOG.exception(_LE('Failed to prune events of stack %s'),
+                          stack_id)
 
 
 class Event(object):
@@ -86,6 +180,9 @@ class Event(object):
 
         new_ev = event_object.Event.create(self.context, ev)
         self.id = new_ev.id
+        if cfg.CONF.event_prune_interval and cfg.CONF.max_events_per_stack:
+            _unpruned_stacks.add(self.stack.id)
+        notify_all_waiters(self.context, self.stack.id)
         return self.id
 
     def identifier(self):
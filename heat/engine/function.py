@@ -115,6 +115,67 @@ class Function(object):
         return not eq
 
 
+class CompiledSnippet(object):
+    """
+    A parsed template snippet with the locations of its functions recorded.
+
+    The snippet is walked once to find the outermost Function objects in it,
+    so that dependency and attribute queries visit only those functions and
+    do not scan the constant parts of the snippet again. A snippet that
+    contains no functions at all is static.
+    """
+
+    def __init__(self, snippet, path=''):
+        self.snippet = snippet
+        self.functions = list(_functions(snippet, path))
+        self._dep_attrs = {}
+
+    @property
+    def static(self):
+        return not self.functions
+
+    def resolve(self):
+        if self.static and (isinstance(self.snippet, six.string_types) or
+                            not isinstance(self.snippet,
+                                           collections.Iterable)):
+            return self.snippet
+        return resolve(self.snippet)
+
+    def dependencies(self):
+        deps = (fn.dependencies(path) for path, fn in self.functions)
+        return itertools.chain.from_iterable(deps)
+
+    def dep_attrs(self, resource_name):
+        if resource_name not in self._dep_attrs:
+            attrs = (fn.dep_attrs(resource_name) for path, fn
+                     in self.functions)
+            self._dep_attrs[resource_name] = tuple(
+                itertools.chain.from_iterable(attrs))
+        return iter(self._dep_attrs[resource_name])
+
+
+def _functions(snippet, path):
+    """
+    Return an iterator over (path, Function) pairs for the outermost functions
+    in a template snippet, using the same paths as dependencies().
+    """
+    if isinstance(snippet, Function):
+        return [(path, snippet)]
+
+    elif isinstance(snippet, collections.Mapping):
+        fns = (_functions(value, '.'.join([path, unicode(key)]))
+               for key, value in snippet.items())
+        return itertools.chain.from_iterable(fns)
+
+    elif (not isinstance(snippet, six.string_types) and
+          isinstance(snippet, collections.Iterable)):
+        fns = (_functions(value, ''.join([path, '[%d]' % i]))
+               for i, value in enumerate(snippet))
+        return itertools.chain.from_iterable(fns)
+
+    return []
+
+
 def resolve(snippet):
     while isinstance(snippet, Function):
         snippet = snippet.result()
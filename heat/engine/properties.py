@@ -12,6 +12,7 @@
 #    under the License.
 
 import collections
+import contextlib
 
 from oslo_serialization import jsonutils
 import six
@@ -340,6 +341,24 @@ class Property(object):
         return _value
 
 
+def _copy_value(value):
+    '''
+    Return a copy of the maps and lists in a resolved property value.
+
+    Resolved values contain only maps, lists and immutable scalars, so this
+    is much cheaper than copy.deepcopy(). Maps are copied in their iteration
+    order, as Property builds them, and an OrderedDict stays one.
+    '''
+    if isinstance(value, collections.Mapping):
+        items = ((k, _copy_value(v)) for k, v in six.iteritems(value))
+        if isinstance(value, collections.OrderedDict):
+            return collections.OrderedDict(items)
+        return dict(items)
+    if isinstance(value, list):
+        return [_copy_value(v) for v in value]
+    return value
+
+
 class Properties(collections.Mapping):
 
     def __init__(self, schema, data, resolver=lambda d: d, parent_name=None,
@@ -348,6 +367,9 @@ class Properties(collections.Mapping):
                           for k, s in schema.items())
         self.resolve = resolver
         self.data = data
+        self._compiled = {}
+        self._resolved_values = None
+        self._validated = set()
         if parent_name is None:
             self.error_prefix = ''
         else:
@@ -397,33 +419,100 @@ class Properties(collections.Mapping):
                 msg = _("Unknown Property %s") % key
                 raise exception.StackValidationFailed(message=msg)
 
+    @contextlib.contextmanager
+    def memoized(self):
+        '''
+        Cache resolved property values for the duration of the context.
+
+        While the context is active, each property is resolved, converted and
+        validated at most once; values are recalculated only after
+        reset_resolved_values() is called. Each read returns a fresh copy of
+        any map and list values, so callers may modify what they are given.
+        '''
+        if self._resolved_values is not None:
+            yield
+            return
+
+        self._resolved_values = {}
+        try:
+            yield
+        finally:
+            self._resolved_values = None
+            self._validated = set()
+
+    def reset_resolved_values(self):
+        if self._resolved_values is not None:
+            self._resolved_values = {}
+            self._validated = set()
+
     def _get_property_value(self, key, validate=False):
         if key not in self:
             raise KeyError(_('%(prefix)sInvalid Property %(key)s') %
                            {'prefix': self.error_prefix, 'key': key})
 
+        if self._resolved_values is None:
+            return self._resolve_property_value(key, validate)[0]
+
+        if key in self._resolved_values and (not validate or
+                                             key in self._validated):
+            value = self._resolved_values[key]
+        else:
+            value, validated = self._resolve_property_value(key, validate)
+            self._resolved_values[key] = value
+            if validated:
+                self._validated.add(key)
+
+        return _copy_value(value)
+
+    def _compile(self, key):
+        '''
+        Return the compiled snippet of a property's data.
+
+        Snippets are compiled again if the data for the key is replaced.
+        '''
+        unresolved_value = self.data[key]
+        compiled = self._compiled.get(key)
+        if compiled is None or compiled.snippet is not unresolved_value:
+            compiled = function.CompiledSnippet(unresolved_value)
+            self._compiled[key] = compiled
+        return compiled
+
+    def _resolve_property_value(self, key, validate=False):
+        '''
+        Return the property value and whether its constraints were checked.
+        '''
         prop = self.props[key]
 
         if key in self.data:
             try:
-                unresolved_value = self.data[key]
+                compiled = self._compile(key)
                 if validate:
-                    deps = function.dependencies(unresolved_value)
+                    deps = compiled.dependencies()
                     if any(res.action == res.INIT for res in deps):
                         validate = False
 
-                value = self.resolve(unresolved_value)
-                return prop.get_value(value, validate)
+                # A compiled snippet returns static scalars without
+                # walking them, but only for the standard resolver
+                if self.resolve is function.resolve:
+                    resolved = compiled.resolve()
+                else:
+                    resolved = self.resolve(compiled.snippet)
+
+                value = prop.get_value(resolved, validate)
             # the resolver function could raise any number of exceptions,
             # so handle this generically
             except Exception as e:
                 raise ValueError('%s%s %s' % (self.error_prefix, key,
                                               six.text_type(e)))
         elif prop.has_default():
-            return prop.get_value(None, validate)
+            value = prop.get_value(None, validate)
         elif prop.required():
             raise ValueError(_('%(prefix)sProperty %(key)s not assigned') %
                              {'prefix': self.error_prefix, 'key': key})
+        else:
+            value = None
+
+        return value, validate
 
     def __getitem__(self, key):
         return self._get_property_value(key)
@@ -61,6 +61,12 @@ class UpdateReplace(Exception):
         super(Exception, self).__init__(six.text_type(msg))
 
 
+class UpdateInProgress(Exception):
+    def __init__(self, resource_name='Unknown'):
+        msg = _("The resource %s is already being updated.") % resource_name
+        super(Exception, self).__init__(six.text_type(msg))
+
+
 class ResourceInError(exception.HeatException):
     msg_fmt = _('Went to status %(resource_status)s '
                 'due to "%(status_reason)s"')
@@ -551,7 +557,7 @@ class Resource(object):
         '''
         assert action in self.ACTIONS, 'Invalid action %s' % action
 
-        with self._action_recorder(action):
+        with self._action_recorder(action), self.properties.memoized():
             if callable(pre_func):
                 pre_func()
 
@@ -641,6 +647,65 @@ class Resource(object):
         if first_failure:
             raise first_failure
 
+    def create_convergence(self, resource_data, engine_id):
+        '''
+        Create the resource as part of a convergence traversal.
+
+        The resource is locked for the given engine while it is being
+        created, and the IDs of the resources it depends on (as reported in
+        the input data of its sync point) are recorded.
+        '''
+        with self.lock(engine_id):
+            self.requires = sorted(set(data['id'] for data
+                                       in six.itervalues(resource_data)
+                                       if data))
+            if self.state == (self.INIT, self.COMPLETE):
+                scheduler.TaskRunner(self.create)()
+
+    def delete_convergence(self, engine_id):
+        '''
+        Delete the resource and remove it from the database as part of a
+        convergence traversal.
+        '''
+        with self.lock(engine_id):
+            scheduler.TaskRunner(self.destroy)()
+
+    @contextlib.contextmanager
+    def lock(self, engine_id):
+        '''
+        Return a context manager that holds the convergence lock on the
+        resource for the given engine for the duration of the context.
+
+        Raises UpdateInProgress if another engine holds the lock.
+        '''
+        self._acquire(engine_id)
+        try:
+            yield
+        finally:
+            self._release(engine_id)
+
+    def _acquire(self, engine_id):
+        rs = resource_objects.Resource.get_obj(self.context, self.id)
+        updated_ok = rs.select_and_update({'engine_id': engine_id},
+                                          atomic_key=rs.atomic_key,
+                                          expected_engine_id=None)
+        if not updated_ok:
+            LOG.info(_LI('Resource %s is locked for update; deferring'),
+                     six.text_type(self))
+            raise UpdateInProgress(self.name)
+
+    def _release(self, engine_id):
+        # The database entry is removed when the resource is destroyed
+        if self.id is None:
+            return
+
+        rs = resource_objects.Resource.get_obj(self.context, self.id)
+        updated_ok = rs.select_and_update({'engine_id': None},
+                                          atomic_key=rs.atomic_key,
+                                          expected_engine_id=engine_id)
+        if not updated_ok:
+            LOG.warn(_LW('Failed to unlock resource %s'), self.name)
+
     def prepare_abandon(self):
         self.abandon_in_progress = True
         return {
@@ -731,31 +796,34 @@ class Resource(object):
         yield self._break_if_required(
             self.UPDATE, environment.HOOK_PRE_UPDATE)
 
-        if not self._needs_update(after, before, after_props, before_props,
-                                  prev_resource):
-            return
-
-        if (self.action, self.status) in ((self.CREATE, self.IN_PROGRESS),
-                                          (self.UPDATE, self.IN_PROGRESS),
-                                          (self.ADOPT, self.IN_PROGRESS)):
-            exc = Exception(_('Resource update already requested'))
-            raise exception.ResourceFailure(exc, self, action)
-
-        LOG.info(_LI('updating %s'), six.text_type(self))
-
-        self.updated_time = datetime.utcnow()
-        with self._action_recorder(action, UpdateReplace):
-            after_props.validate()
-            tmpl_diff = self.update_template_diff(function.resolve(after),
-                                                  before)
-            prop_diff = self.update_template_diff_properties(after_props,
-                                                             before_props)
-            yield self.action_handler_task(action,
-                                           args=[after, tmpl_diff, prop_diff])
+        with after_props.memoized(), before_props.memoized():
+            if not self._needs_update(after, before, after_props,
+                                      before_props, prev_resource):
+                return
 
-            self.t = after
-            self.reparse()
-            self._update_stored_properties()
+            if (self.action, self.status) in ((self.CREATE, self.IN_PROGRESS),
+                                              (self.UPDATE, self.IN_PROGRESS),
+                                              (self.ADOPT, self.IN_PROGRESS)):
+                exc = Exception(_('Resource update already requested'))
+                raise exception.ResourceFailure(exc, self, action)
+
+            LOG.info(_LI('updating %s'), six.text_type(self))
+
+            self.updated_time = datetime.utcnow()
+            with self._action_recorder(action, UpdateReplace), \
+                    self.properties.memoized():
+                after_props.validate()
+                tmpl_diff = self.update_template_diff(function.resolve(after),
+                                                      before)
+                prop_diff = self.update_template_diff_properties(after_props,
+                                                                 before_props)
+                yield self.action_handler_task(action,
+                                               args=[after, tmpl_diff,
+                                                     prop_diff])
+
+                self.t = after
+                self.reparse()
+                self._update_stored_properties()
 
     def check(self):
         """Checks that the physical resource is in its expected state
@@ -941,8 +1009,8 @@ class Resource(object):
         self.resource_id = inst
         if self.id is not None:
             try:
-                rs = resource_objects.Resource.get_obj(self.context, self.id)
-                rs.update_and_save({'nova_instance': self.resource_id})
+                resource_objects.Resource.update_by_id(
+                    self.context, self.id, {'nova_instance': self.resource_id})
             except Exception as ex:
                 LOG.warn(_LW('db error %s'), ex)
 
@@ -1008,8 +1076,8 @@ class Resource(object):
 
         if self.id is not None:
             try:
-                rs = resource_objects.Resource.get_obj(self.context, self.id)
-                rs.update_and_save(data)
+                resource_objects.Resource.update_by_id(self.context, self.id,
+                                                       data)
             except Exception as ex:
                 LOG.error(_LE('DB error %s'), ex)
             else:
@@ -1051,7 +1119,7 @@ class Resource(object):
         if new_state != old_state:
             self._add_event(action, status, reason)
 
-        self.stack.reset_resource_attributes()
+        self.stack.reset_resource_attributes(self)
 
     @property
     def state(self):
@@ -1085,7 +1153,8 @@ class Resource(object):
         :returns: the attribute value.
         '''
         try:
-            attribute = self.attributes[key]
+            with self.properties.memoized():
+                attribute = self.attributes[key]
         except KeyError:
             raise exception.InvalidTemplateAttribute(resource=self.name,
                                                      key=key)
@@ -31,6 +31,7 @@ from heat.engine import resource
 from heat.engine import scheduler
 from heat.engine import stack as parser
 from heat.engine import template
+from heat.objects import stack as stack_object
 from heat.rpc import api as rpc_api
 
 LOG = logging.getLogger(__name__)
@@ -47,6 +48,10 @@ class StackResource(resource.Resource):
     # template parsing.
     requires_deferred_auth = True
 
+    # Resource data key for the hash of what the nested stack was last
+    # created or updated with
+    NESTED_CONTENT_HASH = 'nested_content_hash'
+
     def __init__(self, name, json_snippet, stack):
         super(StackResource, self).__init__(name, json_snippet, stack)
         self._nested = None
@@ -95,17 +100,38 @@ class StackResource(resource.Resource):
             self._nested = None
 
         if self._nested is None and self.resource_id is not None:
-            self._nested = parser.Stack.load(self.context,
-                                             self.resource_id,
-                                             parent_resource=self.name,
-                                             show_deleted=show_deleted,
-                                             force_reload=force_reload)
+            stack_cache = getattr(self.context, 'stack_cache', {})
+            key = (self.resource_id, self.name, show_deleted)
+            if not force_reload:
+                self._nested = stack_cache.get(key)
 
             if self._nested is None:
-                raise exception.NotFound(_("Nested stack not found in DB"))
+                self._nested = parser.Stack.load(self.context,
+                                                 self.resource_id,
+                                                 parent_resource=self.name,
+                                                 show_deleted=show_deleted,
+                                                 force_reload=force_reload)
+
+                if self._nested is None:
+                    raise exception.NotFound(
+                        _("Nested stack not found in DB"))
+                stack_cache[key] = self._nested
 
         return self._nested
 
+    def total_nested_resources(self):
+        '''Return the number of resources in the nested stack tree.
+
+        A nested stack that has not been loaded is counted in the database
+        rather than by loading it and every stack below it.
+        '''
+        if self._nested is not None:
+            return self._nested.total_resources()
+        if self.resource_id is None:
+            return 0
+        return stack_object.Stack.count_total_resources(self.context,
+                                                        self.resource_id)
+
     def child_template(self):
         '''
         Default implementation to get the child template.
@@ -264,6 +290,20 @@ class StackResource(resource.Resource):
             self.raise_local_exception(ex)
 
         self.resource_id_set(result['stack_id'])
+        self._clear_nested()
+        self.data_set(self.NESTED_CONTENT_HASH,
+                      self._nested_content_hash(parsed_template, child_env,
+                                                timeout_mins))
+
+    @staticmethod
+    def _nested_content_hash(parsed_template, child_env, timeout_mins):
+        '''Return a hash of everything a nested stack is created from.'''
+        content = {'template': parsed_template.t,
+                   'files': parsed_template.files,
+                   'environment': child_env.user_env_as_dict(),
+                   'timeout': timeout_mins}
+        return hashlib.sha256(
+            jsonutils.dumps(content, sort_keys=True)).hexdigest()
 
     def raise_local_exception(self, ex):
         ex_type = ex.__class__.__name__
@@ -287,20 +327,35 @@ class StackResource(resource.Resource):
     def check_create_complete(self, cookie=None):
         return self._check_status_complete(resource.Resource.CREATE)
 
+    def _clear_nested(self):
+        '''Forget the nested stack so that it is reloaded when next used.
+
+        This must be called whenever the nested stack is changed through
+        RPC, as other copies of this resource in the same request context
+        share the Stack object in the context's stack_cache.
+        '''
+        self._nested = None
+        stack_cache = getattr(self.context, 'stack_cache', {})
+        for show_deleted in (False, True):
+            stack_cache.pop((self.resource_id, self.name, show_deleted), None)
+
     def _check_status_complete(self, action, show_deleted=False,
                                cookie=None):
-        try:
-            nested = self.nested(force_reload=True, show_deleted=show_deleted)
-        except exception.NotFound:
+        if self.resource_id is None:
+            return True
+
+        # Only the stack status is read while polling; loading the nested
+        # stack would parse its template and build all of its resources.
+        nested = stack_object.Stack.get_status(self.context,
+                                               self.resource_id,
+                                               show_deleted=show_deleted)
+        if nested is None:
             if action == resource.Resource.DELETE:
                 return True
             # It's possible the engine handling the create hasn't persisted
             # the stack to the DB when we first start polling for state
             return False
 
-        if nested is None:
-            return True
-
         # Has the action really started?
         #
         # The rpc call to update does not guarantee that the stack will be
@@ -317,13 +372,16 @@ class StackResource(resource.Resource):
         if cookie is not None:
             prev_state = cookie['previous']['state']
             prev_updated_at = cookie['previous']['updated_at']
-            if (prev_updated_at == nested.updated_time and
-                    prev_state == nested.state):
+            if (prev_updated_at == nested.updated_at and
+                    prev_state == (nested.action, nested.status)):
                 return False
 
         if nested.status == resource.Resource.IN_PROGRESS:
             return False
-        elif nested.status == resource.Resource.COMPLETE:
+
+        # The nested stack has changed, so reload it when it is next used
+        self._clear_nested()
+        if nested.status == resource.Resource.COMPLETE:
             return True
         elif nested.status == resource.Resource.FAILED:
             raise resource.ResourceUnknownStatus(
@@ -377,6 +435,18 @@ class StackResource(resource.Resource):
         parsed_template = self._child_parsed_template(child_template,
                                                       child_env)
 
+        # Don't update the nested stack if it would be updated with exactly
+        # what it was last created or updated with and that succeeded. The
+        # stack is then complete, so check_update_complete returns at once.
+        content_hash = self._nested_content_hash(parsed_template, child_env,
+                                                 timeout_mins)
+        if (nested_stack.status == nested_stack.COMPLETE and
+                nested_stack.action != nested_stack.SUSPEND and
+                self.data().get(self.NESTED_CONTENT_HASH) == content_hash):
+            LOG.debug('Nested stack of %s is unchanged, not updating it',
+                      self.name)
+            return None
+
         cookie = {'previous': {
             'updated_at': nested_stack.updated_time,
             'state': nested_stack.state}}
@@ -393,6 +463,9 @@ class StackResource(resource.Resource):
         except Exception as ex:
             LOG.exception('update_stack')
             self.raise_local_exception(ex)
+        finally:
+            self._clear_nested()
+        self.data_set(self.NESTED_CONTENT_HASH, content_hash)
         return cookie
 
     def check_update_complete(self, cookie=None):
@@ -412,6 +485,8 @@ class StackResource(resource.Resource):
             self.rpc_client().delete_stack(self.context, stack_identity)
         except Exception as ex:
             self.rpc_client().ignore_error_named(ex, 'NotFound')
+        finally:
+            self._clear_nested()
 
     def check_delete_complete(self, cookie=None):
         return self._check_status_complete(resource.Resource.DELETE,
@@ -427,6 +502,7 @@ class StackResource(resource.Resource):
             self.physical_resource_name(),
             self.resource_id)
         self.rpc_client().stack_suspend(self.context, stack_identity)
+        self._clear_nested()
 
     def check_suspend_complete(self, cookie=None):
         return self._check_status_complete(resource.Resource.SUSPEND)
@@ -441,6 +517,7 @@ class StackResource(resource.Resource):
             self.physical_resource_name(),
             self.resource_id)
         self.rpc_client().stack_resume(self.context, stack_identity)
+        self._clear_nested()
 
     def check_resume_complete(self, cookie=None):
         return self._check_status_complete(resource.Resource.RESUME)
@@ -456,6 +533,7 @@ class StackResource(resource.Resource):
             self.physical_resource_name(),
             self.resource_id)
         self.rpc_client().stack_check(self.context, stack_identity)
+        self._clear_nested()
 
     def check_check_complete(self, cookie=None):
         return self._check_status_complete(resource.Resource.CHECK)
@@ -66,6 +66,7 @@ class ResourceDefinitionCore(object):
 
         self._hash = hash(self.resource_type)
         self._rendering = None
+        self._compiled = {}
 
         assert isinstance(self.description, six.string_types)
 
@@ -141,39 +142,47 @@ class ResourceDefinitionCore(object):
             deletion_policy=reparse_snippet(self._deletion_policy),
             update_policy=reparse_snippet(self._update_policy))
 
+    def _compiled_section(self, section):
+        """
+        Return the compiled snippet for the properties or metadata section.
+
+        Each section is compiled once, the first time it is needed.
+        """
+        if section not in self._compiled:
+            data = {PROPERTIES: self._properties,
+                    METADATA: self._metadata}[section]
+            self._compiled[section] = function.CompiledSnippet(
+                data, '.'.join([self.name, section]))
+        return self._compiled[section]
+
     def dep_attrs(self, resource_name):
         """
         Return an iterator over dependent attributes for specified
         resource_name in resources' properties and metadata fields.
         """
-        return itertools.chain(function.dep_attrs(self._properties,
-                                                  resource_name),
-                               function.dep_attrs(self._metadata,
-                                                  resource_name))
+        return itertools.chain(
+            self._compiled_section(PROPERTIES).dep_attrs(resource_name),
+            self._compiled_section(METADATA).dep_attrs(resource_name))
 
     def dependencies(self, stack):
         """
         Return the Resource objects in the given stack on which this depends.
         """
-        def path(section):
-            return '.'.join([self.name, section])
-
         def get_resource(res_name):
             if res_name not in stack:
                 raise exception.InvalidTemplateReference(resource=res_name,
                                                          key=self.name)
             return stack[res_name]
 
-        def strict_func_deps(data, datapath):
+        def strict_func_deps(section):
+            deps = self._compiled_section(section).dependencies()
             return itertools.ifilter(lambda r: getattr(r, 'strict_dependency',
                                                        True),
-                                     function.dependencies(data, datapath))
+                                     deps)
 
         return itertools.chain((get_resource(dep) for dep in self._depends),
-                               strict_func_deps(self._properties,
-                                                path(PROPERTIES)),
-                               strict_func_deps(self._metadata,
-                                                path(METADATA)))
+                               strict_func_deps(PROPERTIES),
+                               strict_func_deps(METADATA))
 
     def properties(self, schema, context=None):
         """
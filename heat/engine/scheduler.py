@@ -11,7 +11,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import functools
+import heapq
 import itertools
 import sys
 import time
@@ -332,7 +334,7 @@ class DependencyTaskGroup(object):
 
     def __init__(self, dependencies, task=lambda o: o(),
                  reverse=False, name=None, error_wait_time=None,
-                 aggregate_exceptions=False):
+                 aggregate_exceptions=False, max_poll_interval=None):
         """
         Initialise with the task dependencies and (optionally) a task to run on
         each.
@@ -350,11 +352,19 @@ class DependencyTaskGroup(object):
         will not be cancelled in the event of an error (operations downstream
         of the error will be cancelled). Once all chains are complete, any
         errors will be rolled up into an ExceptionGroup exception.
+
+        If a max_poll_interval (in seconds) is specified, the subtasks are
+        not all stepped in lock-step on every step of the group. Instead each
+        running subtask is stepped according to its own wakeup time, with the
+        interval between steps backing off exponentially up to the specified
+        maximum while the subtask remains incomplete. Subtasks whose
+        dependencies have been satisfied are started immediately.
         """
         self._runners = dict((o, TaskRunner(task, o)) for o in dependencies)
         self._graph = dependencies.graph(reverse=reverse)
         self.error_wait_time = error_wait_time
         self.aggregate_exceptions = aggregate_exceptions
+        self.max_poll_interval = max_poll_interval
 
         if name is None:
             name = '(%s) %s' % (getattr(task, '__name__',
@@ -369,6 +379,15 @@ class DependencyTaskGroup(object):
 
     def __call__(self):
         """Return a co-routine which runs the task group."""
+        if self.max_poll_interval:
+            return self._run_scheduled()
+        return self._run_lock_step()
+
+    def _run_lock_step(self):
+        """
+        Run the task group, stepping every running subtask on each step of
+        the group.
+        """
         raised_exceptions = []
         while any(self._runners.itervalues()):
             try:
@@ -391,6 +410,84 @@ class DependencyTaskGroup(object):
                 with excutils.save_and_reraise_exception():
                     self.cancel_all()
 
+        self._raise_exceptions(raised_exceptions)
+
+    def _run_scheduled(self):
+        """
+        Run the task group, stepping each running subtask only when its
+        wakeup time has arrived.
+
+        Subtasks that are ready to start are kept in a queue, which is
+        extended as soon as a subtask completes, and running subtasks are
+        kept in a heap ordered by wakeup time. Each step of the group thus
+        only touches the subtasks that have something to do.
+        """
+        raised_exceptions = []
+        ready = collections.deque(k for k, n in six.iteritems(self._graph)
+                                  if not n)
+        wakeups = []
+        intervals = {}
+        sequence = itertools.count()
+
+        def schedule(key, interval):
+            intervals[key] = interval
+            heapq.heappush(wakeups,
+                           (wallclock() + interval, next(sequence), key))
+
+        def complete(key):
+            dependents = list(self._graph[key].required_by())
+            del self._graph[key]
+            ready.extend(d for d in dependents
+                         if d in self._graph and not self._graph[d])
+
+        while any(self._runners.itervalues()):
+            try:
+                while ready:
+                    k = ready.popleft()
+                    r = self._runners[k]
+                    if k not in self._graph or not r or r.started():
+                        continue
+                    r.start()
+                    if r.done():
+                        complete(k)
+                    else:
+                        schedule(k, 0)
+
+                yield
+
+                now = wallclock()
+                while wakeups and wakeups[0][0] <= now:
+                    wakeup, seq, k = heapq.heappop(wakeups)
+                    r = self._runners[k]
+                    if k not in self._graph:
+                        continue
+                    if r.step():
+                        complete(k)
+                    else:
+                        schedule(k, self._poll_interval(intervals[k]))
+            except Exception:
+                exc_info = sys.exc_info()
+                if self.aggregate_exceptions:
+                    self._cancel_recursively(k, r)
+                else:
+                    self.cancel_all(grace_period=self.error_wait_time)
+                    if r:
+                        schedule(k, 0)
+                raised_exceptions.append(exc_info)
+            except:  # noqa
+                with excutils.save_and_reraise_exception():
+                    self.cancel_all()
+
+        self._raise_exceptions(raised_exceptions)
+
+    def _poll_interval(self, previous):
+        """
+        Return the interval before the next step of a subtask that was still
+        incomplete after waiting for the previous interval.
+        """
+        return min(max(previous * 2, 1), self.max_poll_interval)
+
+    def _raise_exceptions(self, raised_exceptions):
         if raised_exceptions:
             if self.aggregate_exceptions:
                 raise ExceptionGroup(v for t, v, tb in raised_exceptions)
@@ -13,8 +13,10 @@
 
 import collections
 import datetime
+import itertools
 import os
 import socket
+import time
 import warnings
 
 import eventlet
@@ -36,6 +38,8 @@ from heat.common.i18n import _LW
 from heat.common import identifier
 from heat.common import messaging as rpc_messaging
 from heat.common import service_utils
+from heat.common import session_pool
+from heat.common import template_format
 from heat.engine import api
 from heat.engine import attributes
 from heat.engine import clients
@@ -69,6 +73,9 @@ cfg.CONF.import_opt('max_stacks_per_tenant', 'heat.common.config')
 cfg.CONF.import_opt('enable_stack_abandon', 'heat.common.config')
 cfg.CONF.import_opt('enable_stack_adopt', 'heat.common.config')
 cfg.CONF.import_opt('convergence_engine', 'heat.common.config')
+cfg.CONF.import_opt('event_prune_interval', 'heat.common.config')
+cfg.CONF.import_opt('max_wait_timeout', 'heat.common.config')
+cfg.CONF.import_opt('max_waiting_requests', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
@@ -221,7 +228,8 @@ class EngineListener(service.Service):
     engines to communicate with each other for multi-engine support.
     '''
 
-    ACTIONS = (STOP_STACK, SEND) = ('stop_stack', 'send')
+    ACTIONS = (STOP_STACK, SEND, NOTIFY_WAITERS) = ('stop_stack', 'send',
+                                                    'notify_waiters')
 
     def __init__(self, host, engine_id, thread_group_mgr):
         super(EngineListener, self).__init__()
@@ -253,6 +261,10 @@ class EngineListener(service.Service):
         stack_id = stack_identity['stack_id']
         self.thread_group_mgr.send(stack_id, message)
 
+    def notify_waiters(self, ctxt, stack_id, sender):
+        '''Wake requests waiting for a change made by another engine.'''
+        evt.notify_remote_waiters(stack_id, sender)
+
 
 @profiler.trace_cls("rpc")
 class EngineService(service.Service):
@@ -266,7 +278,11 @@ class EngineService(service.Service):
     by the RPC caller.
     """
 
-    RPC_API_VERSION = '1.6'
+    RPC_API_VERSION = '1.8'
+
+    # Seconds between checks of the database by requests waiting for a stack
+    # change, in case the notification of a change by another engine is lost
+    WAIT_RECHECK_INTERVAL = 15
 
     def __init__(self, host, topic, manager=None):
         super(EngineService, self).__init__()
@@ -287,6 +303,7 @@ class EngineService(service.Service):
         self.service_id = None
         self.manage_thread_grp = None
         self._rpc_server = None
+        self._waiting_requests = 0
         self.software_config = service_software_config.SoftwareConfigService()
 
         if cfg.CONF.instance_user:
@@ -352,6 +369,9 @@ class EngineService(service.Service):
         self.manage_thread_grp = threadgroup.ThreadGroup()
         self.manage_thread_grp.add_timer(cfg.CONF.periodic_interval,
                                          self.service_manage_report)
+        if cfg.CONF.event_prune_interval:
+            self.manage_thread_grp.add_timer(cfg.CONF.event_prune_interval,
+                                             self.prune_events)
 
         super(EngineService, self).start()
 
@@ -442,22 +462,71 @@ class EngineService(service.Service):
 
         return s
 
+    def _wait_for_stack_change(self, stack_id, wait_timeout, changed):
+        """
+        Wait until changed() returns True or the timeout expires.
+
+        changed() is called again each time any engine stores an event or a
+        state change for the stack, and every WAIT_RECHECK_INTERVAL seconds.
+        The timeout is limited by the max_wait_timeout option. When
+        max_waiting_requests are already waiting, this returns at once.
+
+        :returns: the last result of changed()
+        """
+        if self._waiting_requests >= cfg.CONF.max_waiting_requests:
+            LOG.debug('Too many requests waiting, not waiting for a change '
+                      'to stack %s' % stack_id)
+            return changed()
+
+        timeout = min(wait_timeout or 0, cfg.CONF.max_wait_timeout)
+        deadline = time.time() + timeout
+        self._waiting_requests += 1
+        try:
+            while not changed():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                evt.wait_for_change(stack_id,
+                                    min(remaining, self.WAIT_RECHECK_INTERVAL))
+            return True
+        finally:
+            self._waiting_requests -= 1
+
     @context.request_context
-    def show_stack(self, cnxt, stack_identity):
+    def show_stack(self, cnxt, stack_identity, wait_timeout=None,
+                   stack_status=None):
         """
         Return detailed information about one or all stacks.
 
         :param cnxt: RPC context.
         :param stack_identity: Name of the stack you want to show, or None
             to show all
+        :param wait_timeout: if set, seconds to wait for the status of the
+            stack to differ from stack_status before returning
+        :param stack_status: the status to wait for a change from, e.g.
+            CREATE_IN_PROGRESS; defaults to the current status of the stack
         """
         if stack_identity is not None:
             db_stack = self._get_stack(cnxt, stack_identity, show_deleted=True)
+            if wait_timeout:
+                def current_status():
+                    return '_'.join((db_stack.action, db_stack.status))
+
+                if stack_status is None:
+                    stack_status = current_status()
+
+                def status_changed():
+                    db_stack.refresh()
+                    return current_status() != stack_status
+
+                self._wait_for_stack_change(db_stack.id, wait_timeout,
+                                            status_changed)
             stacks = [parser.Stack.load(cnxt, stack=db_stack)]
         else:
             stacks = parser.Stack.load_all(cnxt)
 
-        return [api.format_stack(stack) for stack in stacks]
+        with cnxt.cached_stacks():
+            return [api.format_stack(stack) for stack in stacks]
 
     def get_revision(self, cnxt):
         return cfg.CONF.revision['heat_revision']
@@ -655,18 +724,35 @@ class EngineService(service.Service):
             else:
                 LOG.info(_LI("Stack create failed, status %s"), stack.status)
 
+        def _stack_converge(stack):
+            if not stack.stack_user_project_id:
+                try:
+                    stack.create_stack_user_project_id()
+                except exception.AuthorizationFailure as ex:
+                    stack.state_set(stack.action, stack.FAILED,
+                                    six.text_type(ex))
+                    return
+
+            stack.converge_stack(action=stack.CREATE)
+
         convergence = cfg.CONF.convergence_engine
-        if convergence:
-            raise exception.NotSupported(feature=_('Convergence engine'))
 
         stack = self._parse_template_and_validate_stack(
             cnxt, stack_name, template, params, files, args, owner_id,
             nested_depth, user_creds_id, stack_user_project_id, convergence)
 
+        if convergence and stack.adopt_stack_data:
+            raise exception.NotSupported(
+                feature=_('Stack Adopt with convergence engine'))
+
         stack.store()
 
-        self.thread_group_mgr.start_with_lock(cnxt, stack, self.engine_id,
-                                              _stack_create, stack)
+        if convergence:
+            _stack_converge(stack)
+        else:
+            self.thread_group_mgr.start_with_lock(cnxt, stack,
+                                                  self.engine_id,
+                                                  _stack_create, stack)
 
         return dict(stack.identifier())
 
@@ -887,6 +973,11 @@ class EngineService(service.Service):
         LOG.info(_LI('Deleting stack %s'), st.name)
         stack = parser.Stack.load(cnxt, stack=st)
 
+        if stack.convergence:
+            self.thread_group_mgr.stop_timers(stack.id)
+            stack.converge_stack(action=stack.DELETE)
+            return None
+
         lock = stack_lock.StackLock(cnxt, stack, self.engine_id)
         with lock.try_thread_lock(stack.id) as acquire_result:
 
@@ -1005,7 +1096,8 @@ class EngineService(service.Service):
 
     @context.request_context
     def list_events(self, cnxt, stack_identity, filters=None, limit=None,
-                    marker=None, sort_keys=None, sort_dir=None):
+                    marker=None, sort_keys=None, sort_dir=None,
+                    wait_timeout=None):
         """
         The list_events method lists all events associated with a given stack.
         It supports pagination (``limit`` and ``marker``),
@@ -1019,19 +1111,32 @@ class EngineService(service.Service):
         :param marker: the ID of the last event in the previous page
         :param sort_keys: an array of fields used to sort the list
         :param sort_dir: the direction of the sort ('asc' or 'desc').
+        :param wait_timeout: if set, seconds to wait for matching events when
+            there are none yet for the given stack, e.g. after the marker;
+            ignored when the limit is 0
         """
 
         if stack_identity is not None:
             st = self._get_stack(cnxt, stack_identity, show_deleted=True)
 
-            events = event_object.Event.get_all_by_stack(
-                cnxt,
-                st.id,
-                limit=limit,
-                marker=marker,
-                sort_keys=sort_keys,
-                sort_dir=sort_dir,
-                filters=filters)
+            events = []
+
+            def new_events():
+                events.extend(event_object.Event.get_all_by_stack(
+                    cnxt,
+                    st.id,
+                    limit=limit,
+                    marker=marker,
+                    sort_keys=sort_keys,
+                    sort_dir=sort_dir,
+                    filters=filters))
+                return bool(events)
+
+            if limit is not None and int(limit) == 0:
+                # No events can be returned, so there is nothing to wait for
+                wait_timeout = None
+            self._wait_for_stack_change(st.id, wait_timeout, new_events)
+            stacks = [st]
         else:
             events = event_object.Event.get_all_by_tenant(
                 cnxt, limit=limit,
@@ -1039,18 +1144,19 @@ class EngineService(service.Service):
                 sort_keys=sort_keys,
                 sort_dir=sort_dir,
                 filters=filters)
+            stacks = stack_object.Stack.get_all_by_ids(
+                cnxt, set(e.stack_id for e in events))
 
-        stacks = {}
+        # Events are formatted from the database rows; only the identifier
+        # of each stack is needed, so the stacks themselves are not loaded
+        stacks = dict((s.id, s) for s in stacks)
 
-        def get_stack(stack_id):
-            if stack_id not in stacks:
-                stacks[stack_id] = parser.Stack.load(cnxt, stack_id)
-            return stacks[stack_id]
+        def stack_identifier(stack_id):
+            s = stacks[stack_id]
+            return identifier.HeatIdentifier(s.tenant, s.name, s.id)
 
-        return [api.format_event(evt.Event.load(cnxt,
-                                                e.id, e,
-                                                get_stack(e.stack_id)))
-                for e in events]
+        return [api.format_db_event(e, stack_identifier(e.stack_id))
+                for e in events if e.stack_id in stacks]
 
     def _authorize_stack_user(self, cnxt, stack, resource_name):
         '''
@@ -1098,8 +1204,9 @@ class EngineService(service.Service):
             raise exception.ResourceNotFound(resource_name=resource_name,
                                              stack_name=stack.name)
 
-        return api.format_stack_resource(stack[resource_name],
-                                         with_attr=with_attr)
+        with cnxt.cached_stacks():
+            return api.format_stack_resource(stack[resource_name],
+                                             with_attr=with_attr)
 
     @context.request_context
     def resource_signal(self, cnxt, stack_identity, resource_name, details,
@@ -1169,9 +1276,10 @@ class EngineService(service.Service):
 
         stack = parser.Stack.load(cnxt, stack=s)
 
-        return [api.format_stack_resource(resource)
-                for name, resource in six.iteritems(stack)
-                if resource_name is None or name == resource_name]
+        with cnxt.cached_stacks():
+            return [api.format_stack_resource(resource)
+                    for name, resource in six.iteritems(stack)
+                    if resource_name is None or name == resource_name]
 
     @context.request_context
     def list_stack_resources(self, cnxt, stack_identity, nested_depth=0):
@@ -1179,8 +1287,9 @@ class EngineService(service.Service):
         stack = parser.Stack.load(cnxt, stack=s)
         depth = min(nested_depth, cfg.CONF.max_nested_stack_depth)
 
-        return [api.format_stack_resource(resource, detail=False)
-                for resource in stack.iter_resources(depth)]
+        with cnxt.cached_stacks():
+            return [api.format_stack_resource(resource, detail=False)
+                    for resource in stack.iter_resources(depth)]
 
     @context.request_context
     def stack_suspend(self, cnxt, stack_identity):
@@ -1338,18 +1447,39 @@ class EngineService(service.Service):
         '''
         This could be used by CloudWatch and WaitConditions
         and treat HA service events like any other CloudWatch.
+
+        stats_data may be a single sample or a list of samples.
         '''
+        if isinstance(stats_data, list):
+            samples = stats_data
+        else:
+            samples = [stats_data]
+
         def get_matching_watches():
             if watch_name:
-                yield watchrule.WatchRule.load(cnxt, watch_name)
-            else:
-                for wr in watch_rule.WatchRule.get_all(cnxt):
-                    if watchrule.rule_can_use_sample(wr, stats_data):
-                        yield watchrule.WatchRule.load(cnxt, watch=wr)
+                rule = watchrule.WatchRule.load(cnxt, watch_name)
+                for sample in samples:
+                    yield rule, sample
+                return
+
+            # Only the rules alarming on one of the metrics posted can use
+            # any of the samples, so look those up rather than every rule
+            metric_names = set(itertools.chain.from_iterable(
+                (k for k in sample if k != 'Namespace') for sample in samples))
+            candidates = watch_rule.WatchRule.get_all_by_metric(cnxt,
+                                                                metric_names)
+            rules = {}
+            for sample in samples:
+                for wr in candidates:
+                    if watchrule.rule_can_use_sample(wr, sample):
+                        if wr.id not in rules:
+                            rules[wr.id] = watchrule.WatchRule.load(cnxt,
+                                                                    watch=wr)
+                        yield rules[wr.id], sample
 
         rule_run = False
-        for rule in get_matching_watches():
-            rule.create_watch_data(stats_data)
+        for rule, sample in get_matching_watches():
+            rule.create_watch_data(sample)
             rule_run = True
 
         if not rule_run:
@@ -1537,6 +1667,20 @@ class EngineService(service.Service):
             self.service_id = service_ref['id']
             LOG.info(_LI('Service %s is started'), self.service_id)
 
+        self._report_cache_stats()
+
+    def _report_cache_stats(self):
+        LOG.debug('Shared keystone sessions: %(sessions)s sessions, '
+                  '%(connections_created)s connections created, '
+                  '%(connections_reused)s connections reused',
+                  session_pool.pool.stats())
+        LOG.debug('Parsed template cache: %(entries)s templates, '
+                  '%(hits)s hits, %(misses)s misses',
+                  template_format.parse_cache.stats())
+
+    def prune_events(self):
+        evt.prune_events(context.get_admin_context())
+
     def service_manage_cleanup(self):
         cnxt = context.get_admin_context()
         last_updated_window = (3 * cfg.CONF.periodic_interval)
@@ -21,6 +21,7 @@ import warnings
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import encodeutils
+from oslo_utils import uuidutils
 from osprofiler import profiler
 import six
 
@@ -33,12 +34,14 @@ from heat.common.i18n import _LW
 from heat.common import identifier
 from heat.common import lifecycle_plugin_utils
 from heat.engine import dependencies
+from heat.engine import event as evt
 from heat.engine import function
 from heat.engine.notification import stack as notification
 from heat.engine import parameter_groups as param_groups
 from heat.engine import resource
 from heat.engine import resources
 from heat.engine import scheduler
+from heat.engine import sync_point
 from heat.engine import template as tmpl
 from heat.engine import update
 from heat.objects import resource as resource_objects
@@ -46,8 +49,10 @@ from heat.objects import snapshot as snapshot_object
 from heat.objects import stack as stack_object
 from heat.objects import user_creds as ucreds_object
 from heat.rpc import api as rpc_api
+from heat.rpc import worker_client as rpc_worker_client
 
 cfg.CONF.import_opt('error_wait_time', 'heat.common.config')
+cfg.CONF.import_opt('max_resource_poll_interval', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
@@ -83,7 +88,7 @@ class Stack(collections.Mapping):
                  user_creds_id=None, tenant_id=None,
                  use_stored_context=False, username=None,
                  nested_depth=0, strict_validate=True, convergence=False,
-                 current_traversal=None):
+                 current_traversal=None, current_deps=None):
         '''
         Initialise from a context, name, Template object and (optionally)
         Environment object. The database ID may also be initialised, if the
@@ -114,6 +119,8 @@ class Stack(collections.Mapping):
         self.parent_resource_name = parent_resource
         self._parent_resource = None
         self._resources = None
+        # Changed whenever a resource changes state or is added or removed
+        self.resources_version = 0
         self._dependencies = None
         self._access_allowed_handlers = {}
         self._db_resources = None
@@ -126,6 +133,7 @@ class Stack(collections.Mapping):
         self.strict_validate = strict_validate
         self.convergence = convergence
         self.current_traversal = current_traversal
+        self.current_deps = current_deps
 
         if use_stored_context:
             self.context = self.stored_context()
@@ -168,10 +176,15 @@ class Stack(collections.Mapping):
         if self.parent_resource_name is None or self.owner_id is None:
             return None
 
-        try:
-            owner = self.load(self.context, stack_id=self.owner_id)
-        except exception.NotFound:
-            return None
+        # Sibling nested stacks share their owner in a read-only request
+        stack_cache = getattr(self.context, 'stack_cache', {})
+        owner = stack_cache.get((self.owner_id, None, True))
+        if owner is None:
+            try:
+                owner = self.load(self.context, stack_id=self.owner_id)
+            except exception.NotFound:
+                return None
+            stack_cache[(self.owner_id, None, True)] = owner
         self._parent_resource = owner[self.parent_resource_name]
         return self._parent_resource
 
@@ -284,6 +297,9 @@ class Stack(collections.Mapping):
         stacks below.
         '''
         def total_nested(res):
+            count_nested = getattr(res, 'total_nested_resources', None)
+            if callable(count_nested):
+                return count_nested()
             get_nested = getattr(res, 'nested', None)
             if callable(get_nested):
                 try:
@@ -362,7 +378,8 @@ class Stack(collections.Mapping):
             filters,
             tenant_safe,
             show_deleted,
-            show_nested) or []
+            show_nested,
+            eager_load=True) or []
         for stack in stacks:
             yield cls._from_db(context, stack, resolve_data=resolve_data)
 
@@ -386,7 +403,8 @@ class Stack(collections.Mapping):
                    user_creds_id=stack.user_creds_id, tenant_id=stack.tenant,
                    use_stored_context=use_stored_context,
                    username=stack.username, convergence=stack.convergence,
-                   current_traversal=stack.current_traversal)
+                   current_traversal=stack.current_traversal,
+                   current_deps=stack.current_deps)
 
     def get_kwargs_for_cloning(self, keep_status=False, only_db=False):
         """Get common kwargs for calling Stack() for cloning.
@@ -500,6 +518,7 @@ class Stack(collections.Mapping):
         resource.t = definition
         resource.reparse()
         self.resources[resource.name] = resource
+        self.resources_version += 1
         self.t.add_resource(definition)
         if self.t.id is not None:
             self.t.store(self.context)
@@ -509,6 +528,7 @@ class Stack(collections.Mapping):
     def remove_resource(self, resource_name):
         '''Remove the resource with the specified name.'''
         del self.resources[resource_name]
+        self.resources_version += 1
         self.t.remove_resource(resource_name)
         if self.t.id is not None:
             self.t.store(self.context)
@@ -656,6 +676,14 @@ class Stack(collections.Mapping):
         self.status = status
         self.status_reason = reason
 
+        if status != self.IN_PROGRESS and self._resources:
+            LOG.debug('Stack %(action)s %(status)s (%(name)s): '
+                      '%(hits)s attribute lookups answered from the cache',
+                      {'action': action,
+                       'status': status,
+                       'name': self.name,
+                       'hits': self.attribute_cache_hits()})
+
         if self.id is None:
             return
 
@@ -671,6 +699,7 @@ class Stack(collections.Mapping):
                       'name': self.name,
                       'reason': reason})
             notification.send(self)
+            evt.notify_all_waiters(self.context, self.id)
 
     @property
     def state(self):
@@ -762,7 +791,8 @@ class Stack(collections.Mapping):
             resource_action,
             reverse,
             error_wait_time=error_wait_time,
-            aggregate_exceptions=aggregate_exceptions)
+            aggregate_exceptions=aggregate_exceptions,
+            max_poll_interval=cfg.CONF.max_resource_poll_interval)
 
         try:
             yield action_task()
@@ -785,6 +815,128 @@ class Stack(collections.Mapping):
         lifecycle_plugin_utils.do_post_ops(self.context, self, None, action,
                                            (self.status == self.FAILED))
 
+    def convergence_dependencies(self, is_update=True):
+        '''
+        Return the dependency graph for a convergence traversal.
+
+        The nodes of the graph are (resource ID, is_update) tuples. For an
+        update traversal the edges follow the usual dependencies between
+        resources; for a cleanup traversal they are reversed, since a
+        resource may only be deleted once everything that requires it has
+        gone. Resources that are not stored in the database are omitted.
+        '''
+        def key(res):
+            return (res.id, is_update)
+
+        deps = dependencies.Dependencies()
+        for requirer, required in self.dependencies.graph().edges():
+            if requirer.id is None:
+                continue
+            deps += (key(requirer), None)
+            if required is None or required.id is None:
+                continue
+            if is_update:
+                deps += (key(requirer), key(required))
+            else:
+                deps += (key(required), key(requirer))
+        return deps
+
+    def current_dependencies(self):
+        '''
+        Return the dependency graph stored for the current convergence
+        traversal.
+        '''
+        edges = (self.current_deps or {}).get('edges', [])
+        return dependencies.Dependencies(
+            (tuple(requirer), tuple(required) if required is not None
+             else None) for requirer, required in edges)
+
+    @profiler.trace('Stack.converge_stack', hide_args=False)
+    def converge_stack(self, action=CREATE):
+        '''
+        Start a convergence traversal to create or delete the stack.
+
+        Instead of walking the dependency graph in a single thread while
+        holding the stack lock, a check_resource message is cast to the
+        worker service of any engine for each resource that is ready to be
+        processed. Each edge of the graph is tracked by a sync point in the
+        database, so that a resource is checked only once all of its
+        predecessors in the traversal are done.
+        '''
+        if action not in (self.CREATE, self.DELETE):
+            raise ValueError(_("Invalid action %s") % action)
+
+        is_update = action != self.DELETE
+        self.state_set(action, self.IN_PROGRESS, 'Stack %s started' % action)
+        if is_update:
+            self._store_resources()
+
+        deps = self.convergence_dependencies(is_update)
+        graph = deps.graph()
+        self.current_traversal = uuidutils.generate_uuid()
+        self.current_deps = {'edges': [[requirer, required] for
+                                       requirer, required in graph.edges()]}
+        stack_object.Stack.update_by_id(
+            self.context, self.id,
+            {'current_traversal': self.current_traversal,
+             'current_deps': self.current_deps})
+
+        LOG.info(_LI('Starting traversal %(traversal)s of stack %(name)s '
+                     'with dependencies: %(deps)s'),
+                 {'traversal': self.current_traversal, 'name': self.name,
+                  'deps': six.text_type(deps)})
+
+        for rsrc_id, node_is_update in graph:
+            sync_point.create(self.context, rsrc_id, self.current_traversal,
+                              node_is_update, self.id)
+        sync_point.create(self.context, self.id, self.current_traversal,
+                          is_update, self.id)
+
+        leaves = [key for key, node in six.iteritems(graph) if not node]
+        if not leaves:
+            self.mark_complete(self.current_traversal)
+            return
+
+        worker_client = rpc_worker_client.WorkerClient()
+        for rsrc_id, node_is_update in leaves:
+            worker_client.check_resource(self.context, rsrc_id,
+                                         self.current_traversal,
+                                         {}, node_is_update)
+
+    def mark_complete(self, traversal_id):
+        '''
+        Mark the convergence traversal given by traversal_id as complete,
+        and remove its sync points.
+        '''
+        if traversal_id != self.current_traversal:
+            return
+
+        sync_point.delete_all(self.context, self.id, traversal_id)
+
+        stack_status = self.COMPLETE
+        reason = 'Stack %s completed successfully' % self.action
+        if self.action != self.DELETE:
+            self.state_set(self.action, stack_status, reason)
+            return
+
+        if not self.owner_id:
+            stack_status, reason = self._delete_credentials(stack_status,
+                                                            reason, False)
+        self.state_set(self.action, stack_status, reason)
+        if stack_status != self.FAILED:
+            stack_object.Stack.delete(self.context, self.id)
+
+    def mark_failed(self, traversal_id, reason):
+        '''
+        Abort the convergence traversal given by traversal_id, and mark the
+        stack as FAILED.
+        '''
+        if traversal_id != self.current_traversal:
+            return
+
+        sync_point.delete_all(self.context, self.id, traversal_id)
+        self.state_set(self.action, self.FAILED, reason)
+
     @profiler.trace('Stack.check', hide_args=False)
     def check(self):
         self.updated_time = datetime.datetime.utcnow()
@@ -1361,11 +1513,58 @@ class Stack(collections.Mapping):
                       DeprecationWarning)
         return function.resolve(snippet)
 
-    def reset_resource_attributes(self):
+    def _required_by_closure(self, resource):
+        '''
+        Return the resource and all resources that require it, directly or
+        indirectly, visiting each resource only once.
+        '''
+        visited = set([resource])
+        queue = collections.deque([resource])
+        while queue:
+            for rqr in self._dependencies.required_by(queue.popleft()):
+                if rqr not in visited:
+                    visited.add(rqr)
+                    queue.append(rqr)
+        return visited
+
+    def attribute_cache_hits(self):
+        '''
+        Return how many attribute lookups of the stack's loaded resources
+        were answered from their caches instead of fetching the value.
+        '''
+        if not self._resources:
+            return 0
+        return sum(res.attributes.cache_hits
+                   for res in six.itervalues(self._resources))
+
+    def reset_resource_attributes(self, resource=None):
+        '''
+        Discard cached attribute and property values after a state change.
+
+        If the resource whose state changed is given and the dependency graph
+        has already been calculated, only that resource and the resources
+        that depend on it, directly or indirectly, are reset. Otherwise every
+        resource in the stack is reset.
+        '''
+        self.resources_version += 1
+
         # nothing is cached if no resources exist
         if not self._resources:
             return
-        # a change in some resource may have side-effects in the attributes
-        # of other resources, so ensure that attributes are re-calculated
-        for res in self.resources.itervalues():
+
+        affected = None
+        if resource is not None and self._dependencies is not None:
+            try:
+                affected = self._required_by_closure(resource)
+            except KeyError:
+                pass
+
+        if affected is None:
+            # a change in some resource may have side-effects in the
+            # attributes of other resources, so ensure that attributes and
+            # any properties that refer to them are re-calculated
+            affected = self.resources.itervalues()
+
+        for res in affected:
             res.attributes.reset_resolved_values()
+            res.properties.reset_resolved_values()
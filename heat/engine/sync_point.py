@@ -0,0 +1,94 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_log import log as logging
+import six
+
+from heat.common import exception
+from heat.common.i18n import _
+from heat.objects import sync_point as sync_point_object
+
+LOG = logging.getLogger(__name__)
+
+KEY_SEPARATOR = ':'
+
+
+def make_key(*components):
+    '''
+    Return a string key for a node in the convergence graph, suitable for
+    use as a key in the (JSON) input data of a sync point.
+    '''
+    assert len(components) >= 2
+    return KEY_SEPARATOR.join(six.text_type(c) for c in components)
+
+
+def create(context, entity_id, traversal_id, is_update, stack_id):
+    '''Create a sync point entry in the database.'''
+    values = {'entity_id': six.text_type(entity_id),
+              'traversal_id': traversal_id,
+              'is_update': is_update, 'atomic_key': 0,
+              'stack_id': stack_id, 'input_data': {}}
+    return sync_point_object.SyncPoint.create(context, values)
+
+
+def get(context, entity_id, traversal_id, is_update):
+    '''Retrieve a sync point entry from the database.'''
+    sync_point = sync_point_object.SyncPoint.get_by_key(
+        context, six.text_type(entity_id), traversal_id, is_update)
+    if sync_point is None:
+        key = make_key(entity_id, traversal_id, is_update)
+        raise exception.NotFound(_('Sync Point %s not found') % key)
+
+    return sync_point
+
+
+def delete_all(context, stack_id, traversal_id):
+    '''Remove all of the sync points belonging to a traversal.'''
+    return sync_point_object.SyncPoint.delete_all_by_stack_and_traversal(
+        context, stack_id, traversal_id)
+
+
+def sync(context, entity_id, traversal_id, is_update, propagate,
+         predecessors, new_data):
+    '''
+    Record that a predecessor of a node in the graph is done.
+
+    The data for the completed predecessor(s) is merged into the input data
+    stored in the sync point, using the atomic key to detect concurrent
+    updates from other engines. Once every one of the given predecessors has
+    reported in, propagate() is called with the entity ID and the combined
+    input data.
+
+    :param predecessors: a set of keys (see make_key()) for all of the
+                         nodes that the entity is waiting on
+    :param new_data: a dict mapping predecessor keys to their output data
+    '''
+    rows_updated = None
+    while not rows_updated:
+        sync_point = get(context, entity_id, traversal_id, is_update)
+        input_data = dict(sync_point.input_data or {})
+        input_data.update(new_data)
+        rows_updated = sync_point_object.SyncPoint.update_input_data(
+            context, sync_point.entity_id, traversal_id, is_update,
+            sync_point.atomic_key, input_data)
+
+    waiting = predecessors - set(input_data)
+    key = make_key(entity_id, traversal_id, is_update)
+    if waiting:
+        LOG.debug('[%s] Waiting %s: Got %s; still need %s' % (
+                  key, entity_id, ', '.join(sorted(input_data)),
+                  ', '.join(sorted(waiting))))
+    else:
+        LOG.debug('[%s] Ready %s: Got %s' % (
+                  key, entity_id, ', '.join(sorted(input_data))))
+        propagate(entity_id, input_data)
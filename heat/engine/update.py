@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_config import cfg
 from oslo_log import log as logging
 import six
 
@@ -20,6 +21,8 @@ from heat.engine import resource
 from heat.engine import scheduler
 from heat.objects import resource as resource_objects
 
+cfg.CONF.import_opt('max_resource_poll_interval', 'heat.common.config')
+
 LOG = logging.getLogger(__name__)
 
 
@@ -59,7 +62,8 @@ class StackUpdate(object):
         self.updater = scheduler.DependencyTaskGroup(
             self.dependencies(),
             self._resource_update,
-            error_wait_time=self.error_wait_time)
+            error_wait_time=self.error_wait_time,
+            max_poll_interval=cfg.CONF.max_resource_poll_interval)
 
         if not self.rollback:
             yield cleanup_prev()
@@ -70,7 +70,7 @@ class WatchRule(object):
             period = int(rule['period'])
         self.timeperiod = datetime.timedelta(seconds=period)
         self.id = wid
-        self.watch_data = watch_data or []
+        self.watch_data = list(watch_data or [])
         self.last_evaluated = last_evaluated
 
     @classmethod
@@ -137,96 +137,48 @@ class WatchRule(object):
         else:
             return False
 
-    def do_Maximum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            if float(d.data[self.rule['MetricName']]['Value']) > data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-
-        if not have_data:
-            return self.NODATA
+    def _samples(self):
+        '''
+        Return the metric values of the samples within the rule's period.
+        '''
+        since = self.now - self.timeperiod
+        metric = self.rule['MetricName']
+        return [float(d.data[metric]['Value']) for d in self.watch_data
+                if d.created_at >= since]
 
+    def _compare(self, data):
         if self.do_data_cmp(data,
                             float(self.rule['Threshold'])):
             return self.ALARM
         else:
             return self.NORMAL
 
-    def do_Minimum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            elif float(d.data[self.rule['MetricName']]['Value']) < data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-
-        if not have_data:
+    def do_Maximum(self):
+        samples = self._samples()
+        if not samples:
             return self.NODATA
+        return self._compare(max(samples))
 
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+    def do_Minimum(self):
+        samples = self._samples()
+        if not samples:
+            return self.NODATA
+        return self._compare(min(samples))
 
     def do_SampleCount(self):
         '''
         count all samples within the specified period
         '''
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            data = data + 1
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(len(self._samples()))
 
     def do_Average(self):
-        data = 0
-        samples = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            samples = samples + 1
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if samples == 0:
+        samples = self._samples()
+        if not samples:
             return self.NODATA
-
-        data = data / samples
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(sum(samples) / len(samples))
 
     def do_Sum(self):
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                LOG.debug('ignoring %s' % str(d.data))
-                continue
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(sum(self._samples()))
 
     def get_alarm_state(self):
         fn = getattr(self, 'do_%s' % self.rule['Statistic'])
@@ -252,8 +204,22 @@ class WatchRule(object):
 
         self.last_evaluated = self.now
         self.store()
+        self._prune_watch_data()
         return actions
 
+    def _prune_watch_data(self):
+        '''
+        Delete the samples that can no longer fall within the rule's period.
+
+        Rules are evaluated at most once per period, so samples older than
+        the start of the period just evaluated are never looked at again.
+        '''
+        since = self.now - self.timeperiod
+        watch_data_objects.WatchData.prune_by_watch_rule_id(self.context,
+                                                            self.id, since)
+        self.watch_data = [d for d in self.watch_data
+                           if d.created_at >= since]
+
     def rule_actions(self, new_state):
         LOG.info(_LI('WATCH: stack:%(stack)s, watch_name:%(watch_name)s, '
                      'new_state:%(new_state)s'), {'stack': self.stack_id,
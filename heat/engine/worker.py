@@ -13,13 +13,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import eventlet
 from oslo_log import log as logging
 import oslo_messaging
+from oslo_utils import timeutils
 from osprofiler import profiler
+import six
 
+from heat.common import context
+from heat.common import exception
 from heat.common.i18n import _LE
 from heat.common.i18n import _LI
 from heat.common import messaging as rpc_messaging
+from heat.engine import resource
+from heat.engine import stack as parser
+from heat.engine import stack_lock
+from heat.engine import sync_point
+from heat.objects import resource as resource_objects
 from heat.openstack.common import service
 from heat.rpc import worker_client as rpc_client
 
@@ -38,6 +48,9 @@ class WorkerService(service.Service):
 
     RPC_API_VERSION = '1.0'
 
+    # Seconds to wait before checking a resource locked by another engine
+    CHECK_RETRY_INTERVAL = 2
+
     def __init__(self,
                  host,
                  topic,
@@ -76,3 +89,139 @@ class WorkerService(service.Service):
             LOG.error(_LE("WorkerService is failed to stop, %s"), e)
 
         super(WorkerService, self).stop()
+
+    @context.request_context
+    def check_resource(self, cnxt, resource_id, current_traversal, data,
+                       is_update):
+        '''
+        Process a node in the dependency graph of a convergence traversal.
+
+        The node may be associated with either an update (i.e. create) or a
+        cleanup (i.e. delete) of its resource. Once the resource has been
+        dealt with, the sync points of the nodes that require it are
+        updated, and check_resource is cast for any of them that are ready.
+
+        The resource is dealt with in the stack's thread group, so that the
+        RPC handler returns immediately.
+        '''
+        try:
+            rs = resource_objects.Resource.get_obj(cnxt, resource_id)
+            stack = parser.Stack.load(cnxt, stack_id=rs.stack_id)
+        except exception.NotFound:
+            LOG.debug('[%s] Resource %s not found; stopping.' % (
+                      current_traversal, resource_id))
+            return
+
+        if (current_traversal != stack.current_traversal or
+                stack.status != stack.IN_PROGRESS):
+            LOG.debug('[%s] Traversal cancelled; stopping.' %
+                      current_traversal)
+            return
+
+        self.thread_group_mgr.start(stack.id, self._check_resource, cnxt,
+                                    stack, stack[rs.name], resource_id,
+                                    current_traversal, data, is_update)
+
+    def _check_resource(self, cnxt, stack, rsrc, resource_id,
+                        current_traversal, data, is_update):
+        try:
+            if is_update:
+                rsrc.create_convergence(data, self.engine_id)
+            else:
+                rsrc.delete_convergence(self.engine_id)
+        except resource.UpdateInProgress:
+            reason = self._lock_wait_failure(cnxt, stack, rsrc, resource_id)
+            if reason is not None:
+                stack.mark_failed(current_traversal,
+                                  'Resource %s failed: %s' % (stack.action,
+                                                              reason))
+                return
+
+            # Another engine holds the resource; check it again later so
+            # that the traversal is not left waiting on its sync points
+            LOG.debug('[%s] Resource %s in progress; retrying.' % (
+                      current_traversal, resource_id))
+            eventlet.sleep(self.CHECK_RETRY_INTERVAL)
+            self._rpc_client.check_resource(cnxt, resource_id,
+                                            current_traversal, data,
+                                            is_update)
+            return
+        except exception.ResourceFailure as ex:
+            reason = 'Resource %s failed: %s' % (stack.action,
+                                                 six.text_type(ex))
+            stack.mark_failed(current_traversal, reason)
+            return
+
+        graph_key = (resource_id, is_update)
+        if is_update:
+            output = {'id': rsrc.id,
+                      'name': rsrc.name,
+                      'physical_resource_id': rsrc.resource_id}
+        else:
+            output = None
+        input_data = {sync_point.make_key(*graph_key): output}
+
+        deps = stack.current_dependencies()
+        graph = deps.graph()
+        try:
+            for req in deps.required_by(graph_key):
+                self._propagate_check_resource(cnxt, req, current_traversal,
+                                               set(graph[req]), input_data)
+            if graph[graph_key].stem():
+                self._check_stack_complete(cnxt, stack, current_traversal,
+                                           graph, is_update, input_data)
+        except exception.NotFound:
+            # The sync points have been removed, because the traversal
+            # has either failed or been superseded
+            LOG.debug('[%s] Sync points removed; stopping.' %
+                      current_traversal)
+
+    def _lock_wait_failure(self, cnxt, stack, rsrc, resource_id):
+        '''
+        Return why a resource locked by another engine should not be retried.
+
+        Returns None while the stack action has not timed out and the engine
+        holding the lock is still alive, since only that engine can release
+        the lock.
+        '''
+        started = stack.updated_time or stack.created_time
+        if (started is not None and
+                timeutils.delta_seconds(started, timeutils.utcnow()) >
+                stack.timeout_secs()):
+            return 'Timed out waiting for resource %s to be unlocked' % (
+                rsrc.name)
+
+        try:
+            rs = resource_objects.Resource.get_obj(cnxt, resource_id)
+        except exception.NotFound:
+            return None
+        if (rs.engine_id is not None and
+                not stack_lock.StackLock.engine_alive(cnxt, rs.engine_id)):
+            return 'Resource %s is locked by engine %s, which is dead' % (
+                rsrc.name, rs.engine_id)
+        return None
+
+    def _propagate_check_resource(self, cnxt, next_key, current_traversal,
+                                  predecessors, input_data):
+        next_res_id, next_is_update = next_key
+
+        def do_check(entity_id, data):
+            self._rpc_client.check_resource(cnxt, next_res_id,
+                                            current_traversal, data,
+                                            next_is_update)
+
+        sync_point.sync(cnxt, next_res_id, current_traversal,
+                        next_is_update, do_check,
+                        set(sync_point.make_key(*p) for p in predecessors),
+                        input_data)
+
+    def _check_stack_complete(self, cnxt, stack, current_traversal, graph,
+                              is_update, input_data):
+        roots = set(sync_point.make_key(*key)
+                    for key, node in six.iteritems(graph) if node.stem())
+
+        def mark_complete(stack_id, data):
+            stack.mark_complete(current_traversal)
+
+        sync_point.sync(cnxt, stack.id, current_traversal, is_update,
+                        mark_complete, roots, input_data)
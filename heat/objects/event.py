@@ -74,6 +74,10 @@ class Event(base.VersionedObject, base.VersionedObjectDictCompat):
     def count_all_by_stack(cls, context, stack_id):
         return db_api.event_count_all_by_stack(context, stack_id)
 
+    @classmethod
+    def prune_by_stack(cls, context, stack_id):
+        return db_api.event_prune(context, stack_id)
+
     @classmethod
     def create(cls, context, values):
         return cls._from_db_object(context, cls(),
@@ -99,6 +99,10 @@ class Resource(
     def create(cls, context, values):
         return db_api.resource_create(context, values)
 
+    @classmethod
+    def update_by_id(cls, context, resource_id, values):
+        db_api.resource_update_and_save(context, resource_id, values)
+
     @classmethod
     def delete(cls, context, resource_id):
         resource_db = db_api.resource_get(context, resource_id)
@@ -146,6 +150,12 @@ class Resource(
         self._refresh()
         return resource_db
 
+    def select_and_update(self, values, expected_engine_id=None,
+                          atomic_key=0):
+        return db_api.resource_update(self._context, self.id, values,
+                                      atomic_key=atomic_key,
+                                      expected_engine_id=expected_engine_id)
+
     def _refresh(self):
         return self.__class__._from_db_object(
             self,
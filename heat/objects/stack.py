@@ -64,9 +64,15 @@ class Stack(
     def _from_db_object(context, stack, db_stack):
         for field in stack.fields:
             if field == 'raw_template':
-                stack['raw_template'] = (
-                    raw_template.RawTemplate.get_by_id(
-                        context, db_stack['raw_template_id']))
+                # Only hydrate the template if the query already joined it
+                # in, otherwise leave it to be loaded on first access.
+                db_tpl = db_stack.__dict__.get('raw_template')
+                if db_tpl is not None:
+                    stack['raw_template'] = (
+                        raw_template.RawTemplate._from_db_object(
+                            context, raw_template.RawTemplate(), db_tpl))
+                else:
+                    stack.__dict__.pop('_raw_template', None)
             elif field == 'tag':
                 if db_stack.get(field) is not None:
                     stack['tag'] = stack_tag.StackTag.get_obj(
@@ -80,6 +86,24 @@ class Stack(
         stack.obj_reset_changes()
         return stack
 
+    def obj_load_attr(self, attrname):
+        if attrname != 'raw_template':
+            return super(Stack, self).obj_load_attr(attrname)
+        self._raw_template = raw_template.RawTemplate.get_by_id(
+            self._context, self.raw_template_id)
+
+    # Stack is not registered, so its fields are plain attributes; the
+    # template gets an explicit property so that it can be loaded lazily.
+    def _get_raw_template(self):
+        if '_raw_template' not in self.__dict__:
+            self.obj_load_attr('raw_template')
+        return self._raw_template
+
+    def _set_raw_template(self, value):
+        self._raw_template = value
+
+    raw_template = property(_get_raw_template, _set_raw_template)
+
     @classmethod
     def get_by_id(cls, context, stack_id, **kwargs):
         db_stack = db_api.stack_get(context, stack_id, **kwargs)
@@ -119,6 +143,12 @@ class Stack(
             db_stacks)
         return stacks
 
+    @classmethod
+    def get_all_by_ids(cls, context, stack_ids):
+        return [cls._from_db_object(context, cls(context), db_stack)
+                for db_stack in db_api.stack_get_all_by_ids(context,
+                                                            stack_ids)]
+
     @classmethod
     def get_all_by_owner_id(cls, context, owner_id):
         db_stacks = db_api.stack_get_all_by_owner_id(context, owner_id)
@@ -130,10 +160,18 @@ class Stack(
             db_stacks)
         return stacks
 
+    @classmethod
+    def get_status(cls, context, stack_id, **kwargs):
+        return db_api.stack_get_status(context, stack_id, **kwargs)
+
     @classmethod
     def count_all(cls, context, **kwargs):
         return db_api.stack_count_all(context, **kwargs)
 
+    @classmethod
+    def count_total_resources(cls, context, stack_id):
+        return db_api.stack_count_total_resources(context, stack_id)
+
     @classmethod
     def create(cls, context, values):
         return db_api.stack_create(context, values)
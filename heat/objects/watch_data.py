@@ -64,3 +64,7 @@ class WatchData(base.VersionedObject, base.VersionedObjectDictCompat):
         return (cls._from_db_object(context, cls(), db_data)
                 for db_data in db_api.watch_data_get_all_by_watch_rule_id(
                     context, watch_rule_id))
+
+    @classmethod
+    def prune_by_watch_rule_id(cls, context, watch_rule_id, before):
+        return db_api.watch_data_prune(context, watch_rule_id, before)
@@ -31,6 +31,7 @@ class WatchRule(base.VersionedObject, base.VersionedObjectDictCompat):
         'id': fields.IntegerField(nullable=False),
         'name': fields.StringField(nullable=True),
         'rule': heat_fields.JsonField(nullable=True),
+        'metric_name': fields.StringField(nullable=True),
         'state': fields.StringField(nullable=True),
         'last_evaluated': fields.DateTimeField(nullable=True),
         'stack_id': fields.StringField(nullable=False),
@@ -76,6 +77,12 @@ class WatchRule(base.VersionedObject, base.VersionedObjectDictCompat):
                 for db_rule in db_api.watch_rule_get_all_by_stack(context,
                                                                   stack_id)]
 
+    @classmethod
+    def get_all_by_metric(cls, context, metric_names):
+        return [cls._from_db_object(context, cls(), db_rule)
+                for db_rule in db_api.watch_rule_get_all_by_metric(
+                    context, metric_names)]
+
     @classmethod
     def update_by_id(cls, context, watch_id, values):
         db_api.watch_rule_update(context, watch_id, values)
@@ -29,6 +29,8 @@ class EngineClient(object):
         1.0 - Initial version.
         1.1 - Add support_status argument to list_resource_types()
         1.4 - Add support for service list
+        1.7 - Accept a list of samples in create_watch_data()
+        1.8 - Add wait_timeout to show_stack() and list_events()
     '''
 
     BASE_RPC_API_VERSION = '1.0'
@@ -133,15 +135,27 @@ class EngineClient(object):
                                              show_deleted=show_deleted,
                                              show_nested=show_nested))
 
-    def show_stack(self, ctxt, stack_identity):
+    def show_stack(self, ctxt, stack_identity, wait_timeout=None,
+                   stack_status=None):
         """
         Return detailed information about one or all stacks.
         :param ctxt: RPC context.
         :param stack_identity: Name of the stack you want to show, or None to
         show all
-        """
-        return self.call(ctxt, self.make_msg('show_stack',
-                                             stack_identity=stack_identity))
+        :param wait_timeout: if set, seconds to wait for the status of the
+        stack to change from stack_status
+        :param stack_status: the status to wait for a change from, or None
+        for the current status
+        """
+        if wait_timeout is None:
+            return self.call(ctxt, self.make_msg(
+                'show_stack', stack_identity=stack_identity))
+        return self.call(ctxt,
+                         self.make_msg('show_stack',
+                                       stack_identity=stack_identity,
+                                       wait_timeout=wait_timeout,
+                                       stack_status=stack_status),
+                         version='1.8')
 
     def preview_stack(self, ctxt, stack_name, template, params, files, args):
         """
@@ -310,7 +324,8 @@ class EngineClient(object):
                                              type_name=type_name))
 
     def list_events(self, ctxt, stack_identity, filters=None, limit=None,
-                    marker=None, sort_keys=None, sort_dir=None,):
+                    marker=None, sort_keys=None, sort_dir=None,
+                    wait_timeout=None):
         """
         The list_events method lists all events associated with a given stack.
         It supports pagination (``limit`` and ``marker``),
@@ -324,14 +339,21 @@ class EngineClient(object):
         :param marker: the ID of the last event in the previous page
         :param sort_keys: an array of fields used to sort the list
         :param sort_dir: the direction of the sort ('asc' or 'desc').
-        """
-        return self.call(ctxt, self.make_msg('list_events',
-                                             stack_identity=stack_identity,
-                                             filters=filters,
-                                             limit=limit,
-                                             marker=marker,
-                                             sort_keys=sort_keys,
-                                             sort_dir=sort_dir))
+        :param wait_timeout: if set, seconds to wait for events of the stack
+        when there are none yet, e.g. after the marker
+        """
+        kwargs = {'stack_identity': stack_identity,
+                  'filters': filters,
+                  'limit': limit,
+                  'marker': marker,
+                  'sort_keys': sort_keys,
+                  'sort_dir': sort_dir}
+        if wait_timeout is None:
+            return self.call(ctxt, self.make_msg('list_events', **kwargs))
+        return self.call(ctxt,
+                         self.make_msg('list_events',
+                                       wait_timeout=wait_timeout, **kwargs),
+                         version='1.8')
 
     def describe_stack_resource(self, ctxt, stack_identity, resource_name,
                                 with_attr=None):
@@ -430,11 +452,14 @@ class EngineClient(object):
         and treat HA service events like any other CloudWatch.
         :param ctxt: RPC context.
         :param watch_name: Name of the watch/alarm
-        :param stats_data: The data to post.
+        :param stats_data: The data to post, or a list of data to post.
         '''
-        return self.call(ctxt, self.make_msg('create_watch_data',
-                                             watch_name=watch_name,
-                                             stats_data=stats_data))
+        msg = self.make_msg('create_watch_data',
+                            watch_name=watch_name,
+                            stats_data=stats_data)
+        if isinstance(stats_data, list):
+            return self.call(ctxt, msg, version='1.7')
+        return self.call(ctxt, msg)
 
     def show_watch(self, ctxt, watch_name):
         """
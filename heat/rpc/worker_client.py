@@ -47,3 +47,10 @@ class WorkerClient(object):
         else:
             client = self._client
         client.cast(ctxt, method, **kwargs)
+
+    def check_resource(self, ctxt, resource_id,
+                       current_traversal, data, is_update):
+        self.cast(ctxt, self.make_msg(
+            'check_resource', resource_id=resource_id,
+            current_traversal=current_traversal, data=data,
+            is_update=is_update))
@@ -26,6 +26,7 @@ import testtools
 
 from heat.common import context
 from heat.common import messaging
+from heat.common import session_pool
 from heat.engine.clients.os import cinder
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import keystone
@@ -94,7 +95,9 @@ class HeatTestCase(testscenarios.WithScenarios,
 
         cfg.CONF.set_default('environment_dir', env_dir)
         cfg.CONF.set_override('error_wait_time', None)
+        cfg.CONF.set_override('lookup_cache_ttl', 0, group='clients')
         self.addCleanup(cfg.CONF.reset)
+        self.addCleanup(session_pool.pool.clear)
 
         messaging.setup("fake://", optional=True)
         self.addCleanup(messaging.cleanup)
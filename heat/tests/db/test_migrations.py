@@ -606,6 +606,49 @@ class HeatMigrationsCheckers(test_migrations.WalkVersionsMixin,
             self.assertColumnType(engine, tab_name, 'status_reason',
                                   sqlalchemy.Text)
 
+    def _check_062(self, engine, data):
+        self.assertColumnExists(engine, 'raw_template_files', 'files')
+        self.assertColumnExists(engine, 'raw_template_files', 'content_hash')
+        self.assertColumnExists(engine, 'raw_template', 'files_id')
+        self.assertColumnNotExists(engine, 'raw_template', 'content_hash')
+        files = utils.get_table(engine, 'raw_template_files')
+        index = [idx for idx in files.indexes
+                 if idx.name == 'ix_raw_template_files_content_hash']
+        self.assertTrue(index[0].unique)
+
+    def _pre_upgrade_063(self, engine):
+        watch_rule = utils.get_table(engine, 'watch_rule')
+        stack = utils.get_table(engine, 'stack')
+        stack_id = engine.execute(sqlalchemy.select([stack.c.id])).first()[0]
+        data = [dict(id=9001, name='watch_063', stack_id=stack_id,
+                     rule=jsonutils.dumps({'MetricName': 'ServiceFailure'}))]
+        engine.execute(watch_rule.insert(), data)
+        return data
+
+    def _check_063(self, engine, data):
+        self.assertColumnExists(engine, 'watch_rule', 'metric_name')
+        self.assertIndexExists(engine, 'watch_rule',
+                               'ix_watch_rule_metric_name')
+        watch_rule = utils.get_table(engine, 'watch_rule')
+        row = engine.execute(sqlalchemy.select(
+            [watch_rule.c.metric_name]).where(
+                watch_rule.c.id == data[0]['id'])).first()
+        self.assertEqual('ServiceFailure', row[0])
+
+    def _check_064(self, engine, data):
+        self.assertIndexMembers(engine, 'event',
+                                'ix_event_stack_id_created_at',
+                                ['stack_id', 'created_at', 'id'])
+        self.assertIndexMembers(engine, 'event',
+                                'ix_event_stack_id_resource_name',
+                                ['stack_id', 'resource_name',
+                                 'created_at', 'id'])
+
+    def _check_065(self, engine, data):
+        self.assertIndexMembers(engine, 'stack',
+                                'ix_stack_tenant_created_at',
+                                ['tenant', 'created_at', 'id'])
+
 
 class TestHeatMigrationsMySQL(HeatMigrationsCheckers,
                               test_base.MySQLOpportunisticTestCase):
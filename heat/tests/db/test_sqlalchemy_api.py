@@ -24,6 +24,7 @@ from heat.common import context
 from heat.common import exception
 from heat.common import template_format
 from heat.db.sqlalchemy import api as db_api
+from heat.db.sqlalchemy import models
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import nova
 from heat.engine import environment
@@ -204,7 +205,7 @@ class SqlAlchemyTest(common.HeatTestCase):
         args, _ = mock_paginate_query.call_args
         self.assertIn(['created_at'], args)
 
-    @mock.patch.object(db_api.utils, 'paginate_query')
+    @mock.patch.object(db_api, '_seek_paginate_query')
     def test_paginate_query_default_sorts_by_created_at_and_id(
             self, mock_paginate_query):
         query = mock.Mock()
@@ -213,7 +214,7 @@ class SqlAlchemyTest(common.HeatTestCase):
         args, _ = mock_paginate_query.call_args
         self.assertIn(['created_at', 'id'], args)
 
-    @mock.patch.object(db_api.utils, 'paginate_query')
+    @mock.patch.object(db_api, '_seek_paginate_query')
     def test_paginate_query_default_sorts_dir_by_desc(self,
                                                       mock_paginate_query):
         query = mock.Mock()
@@ -222,7 +223,7 @@ class SqlAlchemyTest(common.HeatTestCase):
         args, _ = mock_paginate_query.call_args
         self.assertIn('desc', args)
 
-    @mock.patch.object(db_api.utils, 'paginate_query')
+    @mock.patch.object(db_api, '_seek_paginate_query')
     def test_paginate_query_uses_given_sort_plus_id(self,
                                                     mock_paginate_query):
         query = mock.Mock()
@@ -231,7 +232,7 @@ class SqlAlchemyTest(common.HeatTestCase):
         args, _ = mock_paginate_query.call_args
         self.assertIn(['name', 'id'], args)
 
-    @mock.patch.object(db_api.utils, 'paginate_query')
+    @mock.patch.object(db_api, '_seek_paginate_query')
     @mock.patch.object(db_api, 'model_query')
     def test_paginate_query_gets_model_marker(self, mock_query,
                                               mock_paginate_query):
@@ -248,14 +249,22 @@ class SqlAlchemyTest(common.HeatTestCase):
         args, _ = mock_paginate_query.call_args
         self.assertIn('real_marker', args)
 
-    @mock.patch.object(db_api.utils, 'paginate_query')
-    def test_paginate_query_raises_invalid_sort_key(self, mock_paginate_query):
-        query = mock.Mock()
-        model = mock.Mock()
-
-        mock_paginate_query.side_effect = db_api.utils.InvalidSortKey()
+    def test_paginate_query_raises_invalid_sort_key(self):
+        query = db_api.model_query(self.ctx, models.Stack)
         self.assertRaises(exception.Invalid, db_api._paginate_query,
-                          self.ctx, query, model, sort_keys=['foo'])
+                          self.ctx, query, models.Stack, sort_keys=['foo'])
+
+    def test_paginate_query_raises_invalid_sort_dir(self):
+        query = db_api.model_query(self.ctx, models.Stack)
+        self.assertRaises(ValueError, db_api._paginate_query,
+                          self.ctx, query, models.Stack, sort_dir='up')
+
+    def test_seek_paginate_query_bounds_first_sort_key(self):
+        query = db_api.model_query(self.ctx, models.Stack)
+        marker = models.Stack(id=UUID1, name='stack1')
+        paged = db_api._seek_paginate_query(query, models.Stack, 10,
+                                            ['name', 'id'], marker, 'asc')
+        self.assertIn('stack.name >=', six.text_type(paged.whereclause))
 
     def test_get_sort_keys_returns_empty_list_if_no_keys(self):
         sort_keys = None
@@ -412,6 +421,38 @@ class SqlAlchemyTest(common.HeatTestCase):
         st = db_api.stack_get(self.ctx, UUID1)
         self.assertEqual(UUID1, st.id)
 
+    def test_stack_get_status(self):
+        stack = self._setup_test_stack('stack', UUID1)[1]
+        stack.state_set(stack.CREATE, stack.IN_PROGRESS, 'Started')
+
+        st = db_api.stack_get_status(self.ctx, UUID1)
+        self.assertEqual(('CREATE', 'IN_PROGRESS', 'Started'),
+                         (st.action, st.status, st.status_reason))
+
+        stack.delete()
+        self.assertIsNone(db_api.stack_get_status(self.ctx, UUID1))
+        st = db_api.stack_get_status(self.ctx, UUID1, show_deleted=True)
+        self.assertEqual(('DELETE', 'COMPLETE'), (st.action, st.status))
+
+    def test_stack_get_status_reads_changed_row(self):
+        stack = self._setup_test_stack('stack', UUID1)[1]
+        stack.state_set(stack.CREATE, stack.IN_PROGRESS, 'Started')
+        db_stack = db_api.stack_get(self.ctx, UUID1)
+
+        db_api.stack_update(utils.dummy_context(), UUID1,
+                            {'status': 'COMPLETE'})
+        st = db_api.stack_get_status(self.ctx, UUID1)
+        self.assertEqual('COMPLETE', st.status)
+        # The row held in the session is not refreshed by stack_get
+        self.assertEqual('IN_PROGRESS',
+                         db_api.stack_get(self.ctx, UUID1).status)
+        self.assertIs(db_stack, db_api.stack_get(self.ctx, UUID1))
+
+    def test_stack_get_status_wrong_tenant(self):
+        self._setup_test_stack('stack', UUID1)
+        ctx = utils.dummy_context(tenant_id='other_tenant')
+        self.assertIsNone(db_api.stack_get_status(ctx, UUID1))
+
     def test_stack_get_all(self):
         stacks = [self._setup_test_stack('stack', x)[1] for x in UUIDs]
 
@@ -426,6 +467,21 @@ class SqlAlchemyTest(common.HeatTestCase):
         st_db = db_api.stack_get_all(self.ctx)
         self.assertEqual(1, len(st_db))
 
+    def test_stack_get_all_eager_load(self):
+        [self._setup_test_stack('stack', x) for x in UUIDs]
+        self.ctx.session.expunge_all()
+
+        st_db = db_api.stack_get_all(self.ctx)
+        self.assertEqual(3, len(st_db))
+        for st in st_db:
+            self.assertNotIn('raw_template', st.__dict__)
+
+        self.ctx.session.expunge_all()
+        st_db = db_api.stack_get_all(self.ctx, eager_load=True)
+        self.assertEqual(3, len(st_db))
+        for st in st_db:
+            self.assertIn('raw_template', st.__dict__)
+
     def test_stack_get_all_show_deleted(self):
         stacks = [self._setup_test_stack('stack', x)[1] for x in UUIDs]
 
@@ -519,7 +575,7 @@ class SqlAlchemyTest(common.HeatTestCase):
         self.assertEqual(stacks[1].id, st_db[1].id)
         self.assertEqual(stacks[2].id, st_db[2].id)
 
-    @mock.patch.object(db_api.utils, 'paginate_query')
+    @mock.patch.object(db_api, '_seek_paginate_query')
     def test_stack_get_all_filters_sort_keys(self, mock_paginate):
         sort_keys = ['stack_name', 'stack_status', 'creation_time',
                      'updated_time', 'stack_owner']
@@ -538,6 +594,18 @@ class SqlAlchemyTest(common.HeatTestCase):
         self.assertEqual(1, len(st_db))
         self.assertEqual(stacks[0].id, st_db[0].id)
 
+    def test_stack_get_all_marker_sort_key_ties(self):
+        stacks = [self._setup_test_stack('stack', x)[1] for x in UUIDs]
+        ids = sorted(s.id for s in stacks)
+
+        st_db = db_api.stack_get_all(self.ctx, sort_keys='stack_name',
+                                     sort_dir='asc', marker=ids[0])
+        self.assertEqual(ids[1:], [s.id for s in st_db])
+
+        st_db = db_api.stack_get_all(self.ctx, sort_keys='stack_name',
+                                     sort_dir='desc', marker=ids[2])
+        self.assertEqual([ids[1], ids[0]], [s.id for s in st_db])
+
     def test_stack_get_all_non_existing_marker(self):
         [self._setup_test_stack('stack', x)[1] for x in UUIDs]
 
@@ -1274,6 +1342,48 @@ class DBAPIRawTemplateTest(common.HeatTestCase):
         self.assertEqual(new_t, updated_tp.template)
         self.assertEqual(new_files, updated_tp.files)
 
+    def test_raw_template_files_shared(self):
+        tp1 = create_raw_template(self.ctx)
+        tp2 = create_raw_template(self.ctx)
+        tp3 = create_raw_template(self.ctx, files={'foo': 'baz'})
+
+        self.assertEqual(tp1.files_id, tp2.files_id)
+        self.assertNotEqual(tp1.files_id, tp3.files_id)
+        self.assertEqual(2, self.ctx.session.query(
+            models.RawTemplateFiles).count())
+        self.assertEqual({'foo': 'bar'},
+                         db_api.raw_template_get(self.ctx, tp2.id).files)
+
+        updated = db_api.raw_template_update(self.ctx, tp2.id,
+                                             {'files': {'foo': 'baz'}})
+        self.assertEqual(tp3.files_id, updated.files_id)
+        self.assertEqual({'foo': 'baz'}, updated.files)
+
+    def test_raw_template_update_same_files(self):
+        tp = create_raw_template(self.ctx)
+        files = self.patchobject(db_api, '_raw_template_files')
+        updated = db_api.raw_template_update(self.ctx, tp.id,
+                                             {'files': {'foo': 'bar'}})
+        self.assertFalse(files.called)
+        self.assertEqual(tp.files_id, updated.files_id)
+
+    def test_raw_template_files_stored_concurrently(self):
+        files = {'foo': 'bar'}
+        existing = db_api._raw_template_files(self.ctx, files)
+        query = mock.Mock()
+        query.filter_by.return_value.first.side_effect = [None, existing]
+        self.patchobject(db_api, 'model_query', return_value=query)
+
+        self.assertEqual(existing,
+                         db_api._raw_template_files(self.ctx, files))
+        self.assertEqual(1, self.ctx.session.query(
+            models.RawTemplateFiles).count())
+
+    def test_raw_template_no_files(self):
+        tp = create_raw_template(self.ctx, files={})
+        self.assertIsNone(tp.files_id)
+        self.assertEqual({}, db_api.raw_template_get(self.ctx, tp.id).files)
+
 
 class DBAPIUserCredsTest(common.HeatTestCase):
     def setUp(self):
@@ -1472,6 +1582,20 @@ class DBAPIStackTest(common.HeatTestCase):
                                                            parent_stack2.id)
         self.assertEqual(2, len(stack2_children))
 
+    def test_stack_get_all_by_ids(self):
+        stacks = [create_stack(self.ctx, self.template, self.user_creds)
+                  for i in range(3)]
+        other = create_stack(self.ctx, self.template, self.user_creds,
+                             tenant=UUID2)
+
+        ids = [stacks[0].id, stacks[2].id, other.id]
+        ret_stacks = db_api.stack_get_all_by_ids(self.ctx, ids)
+        self.assertEqual(set([stacks[0].id, stacks[2].id]),
+                         set(s.id for s in ret_stacks))
+
+        self.assertEqual(3, len(db_api.stack_get_all_by_ids(None, ids)))
+        self.assertEqual([], db_api.stack_get_all_by_ids(self.ctx, []))
+
     def test_stack_get_all_with_regular_tenant(self):
         values = [
             {'tenant': UUID1},
@@ -1539,6 +1663,22 @@ class DBAPIStackTest(common.HeatTestCase):
         self.assertEqual(5,
                          db_api.stack_count_all(self.ctx, tenant_safe=False))
 
+    def test_stack_count_total_resources(self):
+        root = create_stack(self.ctx, self.template, self.user_creds)
+        nested = create_stack(self.ctx, self.template, self.user_creds,
+                              owner_id=root.id)
+        nested2 = create_stack(self.ctx, self.template, self.user_creds,
+                               owner_id=nested.id)
+        backup = create_stack(self.ctx, self.template, self.user_creds,
+                              owner_id=root.id, backup=True)
+        for s in (root, nested, nested2, nested2, backup):
+            create_resource(self.ctx, s)
+
+        self.assertEqual(4, db_api.stack_count_total_resources(self.ctx,
+                                                               root.id))
+        self.assertEqual(2, db_api.stack_count_total_resources(self.ctx,
+                                                               nested2.id))
+
     def test_purge_deleted(self):
         now = datetime.datetime.now()
         delta = datetime.timedelta(seconds=3600 * 7)
@@ -1564,6 +1704,44 @@ class DBAPIStackTest(common.HeatTestCase):
         self._deleted_stack_existance(utils.dummy_context(), stacks,
                                       (), (0, 1, 2, 3, 4))
 
+    def test_purge_deleted_batches(self):
+        deleted_at = datetime.datetime.now() - datetime.timedelta(days=2)
+        stacks = [create_stack(self.ctx, create_raw_template(self.ctx),
+                               self.user_creds, deleted_at=deleted_at)
+                  for i in range(3)]
+        kept = create_stack(self.ctx, self.template, self.user_creds)
+        for s in stacks:
+            res = create_resource(self.ctx, s)
+            res.context = self.ctx
+            create_resource_data(self.ctx, res)
+            create_event(self.ctx, stack_id=s.id)
+            db_api.snapshot_create(self.ctx, {'tenant': self.ctx.tenant_id,
+                                              'stack_id': s.id})
+            create_sync_point(self.ctx, entity_id=str(res.id),
+                              stack_id=s.id)
+
+        session = db_api.get_session()
+        purged = (models.Resource, models.ResourceData, models.Event,
+                  models.Snapshot, models.SyncPoint)
+        for model in purged:
+            self.assertEqual(3, session.query(model).count(), model)
+
+        db_api.purge_deleted(age=1, batch_size=2)
+
+        self._deleted_stack_existance(utils.dummy_context(), stacks,
+                                      (), (0, 1, 2))
+        for model in purged:
+            self.assertEqual(0, session.query(model).count(), model)
+        self.assertEqual(
+            [self.template.id],
+            [t.id for t in session.query(models.RawTemplate)])
+        # The credentials are still used by the remaining stack
+        self.assertIsNotNone(db_api.user_creds_get(kept.user_creds_id))
+
+    def test_purge_deleted_bad_batch_size(self):
+        self.assertRaises(exception.Error, db_api.purge_deleted, age=1,
+                          batch_size=0)
+
     def _deleted_stack_existance(self, ctx, stacks, existing, deleted):
         for s in existing:
             self.assertIsNotNone(db_api.stack_get(ctx, stacks[s].id,
@@ -1601,6 +1779,19 @@ class DBAPIResourceTest(common.HeatTestCase):
         self.assertRaises(exception.NotFound, db_api.resource_get,
                           self.ctx, UUID2)
 
+    def test_resource_update_and_save(self):
+        res = create_resource(self.ctx, self.stack)
+        db_api.resource_update_and_save(self.ctx, res.id,
+                                        {'status': 'COMPLETE',
+                                         'status_reason': 'done'})
+        ret_res = db_api.resource_get(self.ctx, res.id)
+        self.assertEqual('COMPLETE', ret_res.status)
+        self.assertEqual('done', ret_res.status_reason)
+
+        self.assertRaises(exception.NotFound,
+                          db_api.resource_update_and_save,
+                          self.ctx, -1, {'status': 'COMPLETE'})
+
     def test_resource_get_by_name_and_stack(self):
         create_resource(self.ctx, self.stack)
 
@@ -1867,6 +2058,25 @@ class DBAPIEventTest(common.HeatTestCase):
         events = db_api.event_get_all_by_stack(self.ctx, self.stack2.id)
         self.assertEqual(1, len(events))
 
+    def test_event_get_all_by_stack_resource_paginated(self):
+        self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        events = [create_event(self.ctx, stack_id=self.stack1.id,
+                               resource_name='res%d' % (i % 2))
+                  for i in range(6)]
+        res0_uuids = [e.uuid for e in events[::2]]
+
+        filters = {'resource_name': 'res0'}
+        page = db_api.event_get_all_by_stack(self.ctx, self.stack1.id,
+                                             limit=2, sort_dir='asc',
+                                             filters=filters)
+        self.assertEqual(res0_uuids[:2], [e.uuid for e in page])
+
+        page = db_api.event_get_all_by_stack(self.ctx, self.stack1.id,
+                                             limit=2, sort_dir='asc',
+                                             marker=page[-1].uuid,
+                                             filters=filters)
+        self.assertEqual(res0_uuids[2:], [e.uuid for e in page])
+
     def test_event_count_all_by_stack(self):
         self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
         self.stack2 = create_stack(self.ctx, self.template, self.user_creds)
@@ -1936,6 +2146,31 @@ class DBAPIWatchRuleTest(common.HeatTestCase):
         wrs = db_api.watch_rule_get_all_by_stack(self.ctx, self.stack1.id)
         self.assertEqual(2, len(wrs))
 
+    def test_watch_rule_get_all_by_metric(self):
+        values = [
+            {'name': 'rule1', 'rule': {'MetricName': 'CPUUtilization'}},
+            {'name': 'rule2', 'rule': {'MetricName': 'ServiceFailure'}},
+            {'name': 'rule3', 'rule': {'meter_name': 'ServiceFailure'}},
+            {'name': 'rule4', 'rule': {'MetricName': 'MemoryUtilization'}},
+        ]
+        [create_watch_rule(self.ctx, self.stack, **val) for val in values]
+
+        wrs = db_api.watch_rule_get_all_by_metric(
+            self.ctx, set(['ServiceFailure', 'CPUUtilization']))
+        self.assertEqual(set(['rule1', 'rule2', 'rule3']),
+                         set(wr.name for wr in wrs))
+        self.assertEqual([], db_api.watch_rule_get_all_by_metric(self.ctx,
+                                                                 set()))
+
+    def test_watch_rule_update_metric_name(self):
+        watch_rule = create_watch_rule(self.ctx, self.stack,
+                                       rule={'MetricName': 'foo'})
+        self.assertEqual('foo', watch_rule.metric_name)
+        db_api.watch_rule_update(self.ctx, watch_rule.id,
+                                 {'rule': {'MetricName': 'bar'}})
+        watch_rule = db_api.watch_rule_get(self.ctx, watch_rule.id)
+        self.assertEqual('bar', watch_rule.metric_name)
+
     def test_watch_rule_update(self):
         watch_rule = create_watch_rule(self.ctx, self.stack)
         values = {
@@ -1994,6 +2229,28 @@ class DBAPIWatchDataTest(common.HeatTestCase):
         data = [wd.data for wd in watch_data]
         [self.assertIn(val['data'], data) for val in values]
 
+    def test_watch_data_prune(self):
+        now = timeutils.utcnow()
+        old = create_watch_data(
+            self.ctx, self.watch_rule,
+            created_at=now - datetime.timedelta(seconds=600))
+        new = create_watch_data(
+            self.ctx, self.watch_rule,
+            created_at=now - datetime.timedelta(seconds=60))
+        other_rule = create_watch_rule(self.ctx, self.stack, name='other')
+        other = create_watch_data(
+            self.ctx, other_rule,
+            created_at=now - datetime.timedelta(seconds=600))
+
+        self.assertEqual(1, db_api.watch_data_prune(
+            self.ctx, self.watch_rule.id,
+            now - datetime.timedelta(seconds=300)))
+
+        ids = [wd.id for wd in db_api.watch_data_get_all(self.ctx)]
+        self.assertNotIn(old.id, ids)
+        self.assertIn(new.id, ids)
+        self.assertIn(other.id, ids)
+
 
 class DBAPIServiceTest(common.HeatTestCase):
     def setUp(self):
@@ -441,6 +441,42 @@ class WatchControllerTest(common.HeatTestCase):
                     {'ResponseMetadata': None}}}
         self.assertEqual(expected, self.controller.put_metric_data(dummy_req))
 
+    def test_put_metric_data_bulk(self):
+
+        params = {u'Namespace': u'system/linux',
+                  u'MetricData.member.1.Unit': u'Count',
+                  u'MetricData.member.1.Value': u'1',
+                  u'MetricData.member.1.MetricName': u'ServiceFailure',
+                  u'MetricData.member.2.Unit': u'Percent',
+                  u'MetricData.member.2.Value': u'42',
+                  u'MetricData.member.2.MetricName': u'CPUUtilization',
+                  u'Action': u'PutMetricData'}
+
+        dummy_req = self._dummy_GET_request(params)
+
+        self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
+        rpc_client.EngineClient.call(
+            dummy_req.context,
+            ('create_watch_data',
+             {'watch_name': None,
+              'stats_data': [
+                  {'Namespace': u'system/linux',
+                   'ServiceFailure': {
+                       'Value': u'1', 'Unit': u'Count',
+                       'Dimensions': [{}]}},
+                  {'Namespace': u'system/linux',
+                   'CPUUtilization': {
+                       'Value': u'42', 'Unit': u'Percent',
+                       'Dimensions': [{}]}}]}),
+            version='1.7'
+        ).AndReturn({})
+
+        self.m.ReplayAll()
+
+        expected = {'PutMetricDataResponse': {'PutMetricDataResult':
+                    {'ResponseMetadata': None}}}
+        self.assertEqual(expected, self.controller.put_metric_data(dummy_req))
+
     def test_set_alarm_state(self):
         state_map = {'OK': rpc_api.WATCH_STATE_OK,
                      'ALARM': rpc_api.WATCH_STATE_ALARM,
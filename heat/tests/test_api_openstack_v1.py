@@ -1373,6 +1373,32 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual('StackNotFound', resp.json['error']['type'])
         self.m.VerifyAll()
 
+    @mock.patch.object(rpc_client.EngineClient, 'call')
+    def test_show_wait_timeout(self, mock_call, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'show', True)
+        identity = identifier.HeatIdentifier(self.tenant, 'wordpress', '6')
+
+        req = self._get('/stacks/%(stack_name)s/%(stack_id)s' % identity,
+                        params={'wait_timeout': '20',
+                                'stack_status': 'CREATE_IN_PROGRESS'})
+        mock_call.return_value = [{u'stack_identity': dict(identity),
+                                   u'stack_action': u'CREATE',
+                                   u'stack_status': u'COMPLETE'}]
+
+        response = self.controller.show(req,
+                                        tenant_id=identity.tenant,
+                                        stack_name=identity.stack_name,
+                                        stack_id=identity.stack_id)
+
+        self.assertEqual('CREATE_COMPLETE',
+                         response['stack']['stack_status'])
+        mock_call.assert_called_once_with(
+            req.context,
+            ('show_stack', {'stack_identity': dict(identity),
+                            'wait_timeout': 20,
+                            'stack_status': 'CREATE_IN_PROGRESS'}),
+            version='1.8')
+
     def test_show_invalidtenant(self, mock_enforce):
         identity = identifier.HeatIdentifier('wibble', 'wordpress', '6')
 
@@ -2726,7 +2752,7 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
 
         kwargs = {'stack_identity': stack_identity,
                   'limit': None, 'sort_keys': None, 'marker': None,
-                  'sort_dir': None, 'filters': None}
+                  'sort_dir': None, 'filters': {'resource_name': res_name}}
 
         engine_resp = [
             {
@@ -2921,7 +2947,7 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
 
         kwargs = {'stack_identity': stack_identity,
                   'limit': None, 'sort_keys': None, 'marker': None,
-                  'sort_dir': None, 'filters': None}
+                  'sort_dir': None, 'filters': {'resource_name': res_name}}
 
         engine_resp = [
             {
@@ -2990,6 +3016,41 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
         self.assertIsNone(engine_args['filters'])
         self.assertNotIn('balrog', engine_args)
 
+    @mock.patch.object(rpc_client.EngineClient, 'call')
+    def test_index_next_link(self, mock_call, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'index', True)
+        sid = identifier.HeatIdentifier(self.tenant, 'wibble', '6')
+        ev_identity = identifier.EventIdentifier(
+            event_id='a3455d8c-9f88-404d-a85b-5315293e67de',
+            **identifier.ResourceIdentifier(resource_name='WikiDatabase',
+                                            **sid))
+
+        req = self._get(sid._tenant_path() + '/events',
+                        params={'limit': 1})
+        mock_call.return_value = [{
+            u'stack_name': u'wibble',
+            u'event_time': u'2012-07-23T13:05:39Z',
+            u'stack_identity': dict(sid),
+            u'resource_name': u'WikiDatabase',
+            u'resource_status_reason': u'state changed',
+            u'event_identity': dict(ev_identity),
+            u'resource_action': u'CREATE',
+            u'resource_status': u'IN_PROGRESS',
+            u'physical_resource_id': None,
+            u'resource_properties': {},
+            u'resource_type': u'AWS::EC2::Instance',
+        }]
+
+        result = self.controller.index(req, tenant_id=self.tenant,
+                                       stack_name=sid.stack_name,
+                                       stack_id=sid.stack_id)
+
+        self.assertEqual(1, len(result['events']))
+        self.assertEqual(1, len(result['links']))
+        self.assertEqual('next', result['links'][0]['rel'])
+        self.assertIn('marker=%s' % ev_identity.event_id,
+                      result['links'][0]['href'])
+
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_index_limit_not_int(self, mock_call, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'index', True)
@@ -3007,6 +3068,94 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
                          six.text_type(ex))
         self.assertFalse(mock_call.called)
 
+    @mock.patch.object(rpc_client.EngineClient, 'call')
+    def test_index_wait_timeout(self, mock_call, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'index', True)
+        sid = identifier.HeatIdentifier(self.tenant, 'wibble', '6')
+
+        req = self._get(sid._tenant_path() + '/events',
+                        params={'wait_timeout': '20', 'marker': 'm'})
+        mock_call.return_value = []
+
+        self.controller.index(req, tenant_id=self.tenant,
+                              stack_name=sid.stack_name,
+                              stack_id=sid.stack_id)
+
+        rpc_call_args, rpc_call_kwargs = mock_call.call_args
+        engine_args = rpc_call_args[1][1]
+        self.assertEqual(20, engine_args['wait_timeout'])
+        self.assertEqual('m', engine_args['marker'])
+        self.assertEqual('1.8', rpc_call_kwargs['version'])
+
+    @mock.patch.object(rpc_client.EngineClient, 'call')
+    def test_index_wait_timeout_resource(self, mock_call, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'index', True)
+        sid = identifier.HeatIdentifier(self.tenant, 'wibble', '6')
+
+        req = self._get(sid._tenant_path() + '/resources/WikiDatabase/events',
+                        params={'wait_timeout': '20'})
+        mock_call.return_value = []
+
+        self.assertRaises(webob.exc.HTTPNotFound,
+                          self.controller.index, req,
+                          tenant_id=self.tenant,
+                          stack_name=sid.stack_name,
+                          stack_id=sid.stack_id,
+                          resource_name='WikiDatabase')
+
+        rpc_call_args, _ = mock_call.call_args
+        engine_args = rpc_call_args[1][1]
+        self.assertEqual(20, engine_args['wait_timeout'])
+        self.assertEqual({'resource_name': 'WikiDatabase'},
+                         engine_args['filters'])
+
+    @mock.patch.object(rpc_client.EngineClient, 'call')
+    def test_index_wait_timeout_not_int(self, mock_call, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'index', True)
+        sid = identifier.HeatIdentifier(self.tenant, 'wibble', '6')
+
+        req = self._get(sid._tenant_path() + '/events',
+                        params={'wait_timeout': 'soon'})
+
+        ex = self.assertRaises(ValueError,
+                               self.controller.index, req,
+                               tenant_id=self.tenant,
+                               stack_name=sid.stack_name,
+                               stack_id=sid.stack_id)
+        self.assertEqual("Only integer is acceptable by 'wait_timeout'.",
+                         six.text_type(ex))
+        self.assertFalse(mock_call.called)
+
+    @mock.patch.object(rpc_client.EngineClient, 'call')
+    def test_resource_index_filters_in_engine(self, mock_call, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'index', True)
+        sid = identifier.HeatIdentifier(self.tenant, 'wibble', '6')
+        params = {
+            'limit': 2,
+            'marker': 'fake marker',
+            'resource_status': 'COMPLETE',
+            'resource_name': 'SomeOtherResource',
+        }
+
+        req = self._get(sid._tenant_path() + '/resources/WikiDatabase/events',
+                        params=params)
+        mock_call.return_value = []
+
+        self.assertRaises(webob.exc.HTTPNotFound,
+                          self.controller.index, req,
+                          tenant_id=self.tenant,
+                          stack_name=sid.stack_name,
+                          stack_id=sid.stack_id,
+                          resource_name='WikiDatabase')
+
+        rpc_call_args, _ = mock_call.call_args
+        engine_args = rpc_call_args[1][1]
+        self.assertEqual(2, engine_args['limit'])
+        self.assertEqual('fake marker', engine_args['marker'])
+        self.assertEqual({'resource_name': 'WikiDatabase',
+                          'resource_status': 'COMPLETE'},
+                         engine_args['filters'])
+
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_index_whitelist_filter_params(self, mock_call, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'index', True)
@@ -3068,7 +3217,7 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
 
         kwargs = {'stack_identity': stack_identity,
                   'limit': None, 'sort_keys': None, 'marker': None,
-                  'sort_dir': None, 'filters': None}
+                  'sort_dir': None, 'filters': {'resource_name': res_name}}
 
         engine_resp = [
             {
@@ -3158,7 +3307,7 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
 
         kwargs = {'stack_identity': stack_identity,
                   'limit': None, 'sort_keys': None, 'marker': None,
-                  'sort_dir': None, 'filters': None}
+                  'sort_dir': None, 'filters': {'resource_name': res_name}}
 
         engine_resp = [
             {
@@ -3204,7 +3353,7 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
 
         kwargs = {'stack_identity': stack_identity,
                   'limit': None, 'sort_keys': None, 'marker': None,
-                  'sort_dir': None, 'filters': None}
+                  'sort_dir': None, 'filters': {'resource_name': res_name}}
 
         engine_resp = [
             {
@@ -3246,7 +3395,7 @@ class EventControllerTest(ControllerTest, common.HeatTestCase):
 
         kwargs = {'stack_identity': stack_identity,
                   'limit': None, 'sort_keys': None, 'marker': None,
-                  'sort_dir': None, 'filters': None}
+                  'sort_dir': None, 'filters': {'resource_name': res_name}}
 
         error = heat_exc.StackNotFound(stack_name='a')
         self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
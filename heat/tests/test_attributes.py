@@ -161,9 +161,11 @@ class AttributesTest(common.HeatTestCase):
         self.assertEqual("value1", attribs['test1'])
         value = 'value1 changed'
         self.assertEqual("value1", attribs['test1'])
+        self.assertEqual(1, attribs.cache_hits)
 
         attribs.reset_resolved_values()
         self.assertEqual("value1 changed", attribs['test1'])
+        self.assertEqual(1, attribs.cache_hits)
 
     def test_caching_none(self):
         value = 'value3'
@@ -22,6 +22,8 @@ from keystoneclient import exceptions as keystone_exc
 import mock
 from neutronclient.common import exceptions as neutron_exc
 from oslo_config import cfg
+from oslo_utils import timeutils
+import requests
 from saharaclient.api import base as sahara_base
 import six
 from swiftclient import exceptions as swift_exc
@@ -30,6 +32,7 @@ from troveclient import client as troveclient
 
 from heat.common import context
 from heat.common import exception
+from heat.common import session_pool
 from heat.engine import clients
 from heat.engine.clients import client_plugin
 from heat.tests import common
@@ -239,6 +242,160 @@ class ClientPluginTest(common.HeatTestCase):
         self.assertRaises(TypeError, client_plugin.ClientPlugin, c)
 
 
+class LookupCacheTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(LookupCacheTest, self).setUp()
+        cfg.CONF.set_override('lookup_cache_ttl', 60, group='clients')
+        client_plugin.lookup_cache.clear()
+        self.addCleanup(client_plugin.lookup_cache.clear)
+        self.addCleanup(timeutils.clear_time_override)
+        timeutils.set_time_override()
+
+        self.con = mock.Mock(tenant_id='tenant-1', user_id='user-1',
+                             region_name=None)
+        self.con.clients = clients.Clients(self.con)
+        self.plugin = FooClientsPlugin(self.con)
+        self.lookup = mock.Mock(side_effect=lambda name: name.upper())
+
+    def _lookup(self, name, plugin=None, per_user=False):
+        plugin = plugin or self.plugin
+        return plugin.cached_lookup('heat', 'thing', name, self.lookup,
+                                    per_user=per_user)
+
+    def test_cached(self):
+        self.assertEqual('FOO', self._lookup('foo'))
+        self.assertEqual('FOO', self._lookup('foo'))
+        self.assertEqual('BAR', self._lookup('bar'))
+        self.assertEqual(2, self.lookup.call_count)
+
+    def test_disabled(self):
+        cfg.CONF.set_override('lookup_cache_ttl', 0, group='clients_heat')
+        self._lookup('foo')
+        self._lookup('foo')
+        self.assertEqual(2, self.lookup.call_count)
+
+    def test_expired(self):
+        self._lookup('foo')
+        timeutils.advance_time_seconds(61)
+        self._lookup('foo')
+        self.assertEqual(2, self.lookup.call_count)
+
+    def test_tenant_scoped(self):
+        con = mock.Mock(tenant_id='tenant-2', region_name=None)
+        con.clients = clients.Clients(con)
+        self._lookup('foo')
+        self._lookup('foo', FooClientsPlugin(con))
+        self.assertEqual(2, self.lookup.call_count)
+
+    def test_user_scoped(self):
+        con = mock.Mock(tenant_id='tenant-1', user_id='user-2',
+                        region_name=None)
+        con.clients = clients.Clients(con)
+        other = FooClientsPlugin(con)
+        self._lookup('foo', per_user=True)
+        self._lookup('foo', per_user=True)
+        self.assertEqual(1, self.lookup.call_count)
+        self._lookup('foo', other, per_user=True)
+        self.assertEqual(2, self.lookup.call_count)
+
+        # results not scoped to users are shared within the tenant
+        self._lookup('foo')
+        self._lookup('foo', other)
+        self.assertEqual(3, self.lookup.call_count)
+
+    def test_failure_not_cached(self):
+        self.lookup.side_effect = exception.FlavorMissing(flavor_id='foo')
+        self.assertRaises(exception.FlavorMissing, self._lookup, 'foo')
+        self.assertRaises(exception.FlavorMissing, self._lookup, 'foo')
+        self.assertEqual(2, self.lookup.call_count)
+
+    def test_size_limit(self):
+        cfg.CONF.set_override('lookup_cache_size', 2, group='clients')
+        self._lookup('a')
+        self._lookup('b')
+        self._lookup('a')
+        self._lookup('c')
+        self.assertEqual(3, self.lookup.call_count)
+
+        # 'b' was the least recently used, so it has been discarded
+        self._lookup('a')
+        self.assertEqual(3, self.lookup.call_count)
+        self._lookup('b')
+        self.assertEqual(4, self.lookup.call_count)
+
+
+class SessionPoolTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(SessionPoolTest, self).setUp()
+        self.pool = session_pool.SessionPool()
+        self.options = {'cacert': None, 'insecure': False,
+                        'cert': None, 'key': None}
+
+    def test_shared(self):
+        sess = self.pool.get(self.options)
+        self.assertIs(sess, self.pool.get(dict(self.options)))
+
+    def test_different_options(self):
+        sess = self.pool.get(self.options)
+        other = self.pool.get(dict(self.options, insecure=True))
+        self.assertIsNot(sess, other)
+        self.assertFalse(other.verify)
+
+    def test_pool_size(self):
+        cfg.CONF.set_override('connection_pools', 3, group='clients')
+        cfg.CONF.set_override('connection_pool_size', 20, group='clients')
+        sess = self.pool.get(self.options)
+        for url in ('https://192.0.2.1/', 'http://192.0.2.1/'):
+            adapter = sess.session.get_adapter(url)
+            self.assertEqual(3, adapter._pool_connections)
+            self.assertEqual(20, adapter._pool_maxsize)
+
+    def test_clear(self):
+        sess = self.pool.get(self.options)
+        self.pool.clear()
+        self.assertIsNot(sess, self.pool.get(self.options))
+
+    def test_max_sessions(self):
+        cfg.CONF.set_override('max_shared_sessions', 2, group='clients')
+        first = self.pool.get(self.options)
+        self.pool.get(dict(self.options, insecure=True))
+        self.pool.get(self.options)
+        self.pool.get(dict(self.options, cacert='ca.pem'))
+
+        self.assertEqual(2, self.pool.stats()['sessions'])
+        self.assertIs(first, self.pool.get(self.options))
+
+    def test_stats(self):
+        sess = self.pool.get(self.options)
+        adapter = sess.session.get_adapter('https://192.0.2.1/')
+        adapter.poolmanager.pools['192.0.2.1'] = mock.Mock(
+            num_connections=2, num_requests=5)
+
+        self.assertEqual({'sessions': 1,
+                          'connections_created': 2,
+                          'connections_reused': 3},
+                         self.pool.stats())
+
+    def test_cookies_not_stored(self):
+        jar = self.pool.get(self.options).session.cookies
+        cookie = requests.cookies.create_cookie('lb', 'node-1',
+                                                domain='192.0.2.1')
+        jar.set_cookie_if_ok(cookie, mock.Mock())
+        self.assertEqual(0, len(jar))
+
+    def test_shared_between_contexts(self):
+        plugins = []
+        for tenant in ('tenant-1', 'tenant-2'):
+            con = mock.Mock(tenant_id=tenant)
+            con.clients = clients.Clients(con)
+            plugins.append(FooClientsPlugin(con))
+
+        self.assertIs(plugins[0]._keystone_session,
+                      plugins[1]._keystone_session)
+
+
 class TestClientPluginsInitialise(common.HeatTestCase):
 
     @testcase.skip('skipped until keystone can read context auth_ref')
@@ -111,6 +111,18 @@ class TestRequestContext(common.HeatTestCase):
             ctx = context.RequestContext(roles=['notadmin'])
             self.assertFalse(ctx.is_admin)
 
+    def test_cached_stacks(self):
+        ctx = context.get_admin_context()
+        ctx.stack_cache['s'] = 'stack'
+        self.assertEqual({}, ctx.stack_cache)
+
+        with ctx.cached_stacks():
+            ctx.stack_cache['s'] = 'stack'
+            with ctx.cached_stacks():
+                self.assertEqual({'s': 'stack'}, ctx.stack_cache)
+            self.assertEqual({'s': 'stack'}, ctx.stack_cache)
+        self.assertEqual({}, ctx.stack_cache)
+
 
 class RequestContextMiddlewareTest(common.HeatTestCase):
 
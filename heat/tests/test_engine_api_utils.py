@@ -263,6 +263,23 @@ class FormatTest(common.HeatTestCase):
             event_id_formatted['path'])
         self.assertEqual(event_id, event_identifier.event_id)
 
+    def test_format_db_event(self):
+        event = self._dummy_event('1')
+        event.timestamp = datetime(2015, 1, 2, 3, 4, 5)
+        db_event = mock.Mock(uuid=event.uuid,
+                             stack_id=self.stack.id,
+                             resource_name=event.resource_name,
+                             physical_resource_id=event.physical_resource_id,
+                             resource_action=event.action,
+                             resource_status=event.status,
+                             resource_status_reason=event.reason,
+                             resource_type=event.resource_type,
+                             resource_properties=event.resource_properties,
+                             created_at=event.timestamp)
+
+        formatted = api.format_db_event(db_event, self.stack.identifier())
+        self.assertEqual(api.format_event(event), formatted)
+
     @mock.patch.object(api, 'format_stack_resource')
     def test_format_stack_preview(self, mock_fmt_resource):
         def mock_format_resources(res, **kwargs):
@@ -29,13 +29,16 @@ from heat.common import context
 from heat.common import exception
 from heat.common import identifier
 from heat.common import service_utils
+from heat.common import session_pool
 from heat.common import template_format
+from heat.engine import api
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import keystone
 from heat.engine.clients.os import nova
 from heat.engine.clients.os import swift
 from heat.engine import dependencies
 from heat.engine import environment
+from heat.engine import event as evt
 from heat.engine import properties
 from heat.engine import resource as res
 from heat.engine.resources.aws.ec2 import instance as instances
@@ -641,14 +644,34 @@ class StackServiceCreateUpdateDeleteTest(common.HeatTestCase):
                           self.man.create_stack,
                           self.ctx, stack_name, stack.t.t, {}, None, {})
 
-    def test_stack_create_enabled_convergence_engine(self):
+    @mock.patch.object(parser.Stack, 'converge_stack')
+    def test_stack_create_enabled_convergence_engine(self, mock_converge):
         cfg.CONF.set_override('convergence_engine', True)
+        stack_name = 'service_create_convergence_test_stack'
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12'}
+
+        result = self.man.create_stack(self.ctx, stack_name, tmpl,
+                                       {}, None, {})
+
+        self.assertEqual(stack_name, result['stack_name'])
+        mock_converge.assert_called_once_with(action=parser.Stack.CREATE)
+        db_stack = stack_object.Stack.get_by_id(self.ctx, result['stack_id'])
+        self.assertTrue(db_stack.convergence)
+
+    def test_stack_create_convergence_engine_adopt(self):
+        cfg.CONF.set_override('convergence_engine', True)
+        cfg.CONF.set_override('enable_stack_adopt', True)
+        adopt_data = {'action': 'CREATE', 'status': 'COMPLETE',
+                      'resources': {},
+                      'environment': {'parameters': {}}}
         ex = self.assertRaises(dispatcher.ExpectedException,
                                self.man.create_stack, self.ctx, 'test',
-                               wp_template, {}, None, {})
+                               {'HeatTemplateFormatVersion': '2012-12-12'},
+                               {}, None,
+                               {'adopt_stack_data': str(adopt_data)})
         self.assertEqual(exception.NotSupported, ex.exc_info[0])
-        self.assertEqual('Convergence engine is not supported.',
-                         six.text_type(ex.exc_info[1]))
+        self.assertIn('Stack Adopt with convergence engine',
+                      six.text_type(ex.exc_info[1]))
 
     def test_stack_create_invalid_resource_name(self):
         stack_name = 'service_create_test_stack_invalid_res'
@@ -1731,7 +1754,7 @@ class StackServiceTest(common.HeatTestCase):
 
     def test_make_sure_rpc_version(self):
         self.assertEqual(
-            '1.6',
+            '1.8',
             service.EngineService.RPC_API_VERSION,
             ('RPC version is changed, please update this test to new version '
              'and make sure additional test cases are added for RPC APIs '
@@ -1972,6 +1995,98 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_event_list_noload_stack')
+    def test_stack_event_list_does_not_load_stack(self):
+        with mock.patch.object(parser.Stack, 'load') as mock_load:
+            stack_events = self.eng.list_events(self.ctx,
+                                                self.stack.identifier())
+            tenant_events = self.eng.list_events(self.ctx, None)
+
+        self.assertFalse(mock_load.called)
+        self.assertEqual(2, len(stack_events))
+        self.assertEqual(stack_events, tenant_events)
+        for ev in stack_events:
+            self.assertEqual(dict(self.stack.identifier()),
+                             ev['stack_identity'])
+
+    @mock.patch.object(evt, 'wait_for_change')
+    @mock.patch.object(event_object.Event, 'get_all_by_stack')
+    @mock.patch.object(service.EngineService, '_get_stack')
+    def test_stack_events_list_waits_for_events(self, mock_get_stack,
+                                                mock_events_get_all,
+                                                mock_wait):
+        cfg.CONF.set_override('max_wait_timeout', 30)
+        s = mock.Mock(id=1, tenant='test_tenant')
+        s.name = 'test_stack'
+        mock_get_stack.return_value = s
+        ev = mock.Mock(stack_id=1)
+        mock_events_get_all.side_effect = [[], [], [ev]]
+
+        with mock.patch.object(api, 'format_db_event',
+                               return_value='formatted') as mock_format:
+            events = self.eng.list_events(self.ctx, 1, marker='m',
+                                          wait_timeout=10)
+
+        self.assertEqual(['formatted'], events)
+        self.assertEqual(3, mock_events_get_all.call_count)
+        self.assertEqual(2, mock_wait.call_count)
+        mock_wait.assert_called_with(1, mock.ANY)
+        mock_format.assert_called_once_with(
+            ev, identifier.HeatIdentifier('test_tenant', 'test_stack', 1))
+
+    @mock.patch.object(evt, 'wait_for_change')
+    @mock.patch.object(event_object.Event, 'get_all_by_stack')
+    @mock.patch.object(service.EngineService, '_get_stack')
+    def test_stack_events_list_wait_times_out(self, mock_get_stack,
+                                              mock_events_get_all,
+                                              mock_wait):
+        cfg.CONF.set_override('max_wait_timeout', 30)
+        mock_get_stack.return_value = mock.Mock(id=1)
+        mock_events_get_all.return_value = []
+        mock_time = self.patchobject(service, 'time')
+        mock_time.time.side_effect = [0, 4, 11]
+
+        events = self.eng.list_events(self.ctx, 1, marker='m',
+                                      wait_timeout=10)
+
+        self.assertEqual([], events)
+        self.assertEqual(2, mock_events_get_all.call_count)
+        mock_wait.assert_called_once_with(1, 5)
+
+    @mock.patch.object(evt, 'wait_for_change')
+    @mock.patch.object(event_object.Event, 'get_all_by_stack')
+    @mock.patch.object(service.EngineService, '_get_stack')
+    def test_stack_events_list_no_wait_for_zero_limit(self, mock_get_stack,
+                                                      mock_events_get_all,
+                                                      mock_wait):
+        cfg.CONF.set_override('max_wait_timeout', 30)
+        mock_get_stack.return_value = mock.Mock(id=1)
+        mock_events_get_all.return_value = []
+
+        events = self.eng.list_events(self.ctx, 1, limit=0,
+                                      wait_timeout=10)
+
+        self.assertEqual([], events)
+        mock_events_get_all.assert_called_once_with(
+            self.ctx, 1, limit=0, marker=None, sort_keys=None,
+            sort_dir=None, filters=None)
+        self.assertFalse(mock_wait.called)
+
+    @mock.patch.object(evt, 'wait_for_change')
+    @mock.patch.object(event_object.Event, 'get_all_by_stack')
+    @mock.patch.object(service.EngineService, '_get_stack')
+    def test_stack_events_list_no_wait_by_default(self, mock_get_stack,
+                                                  mock_events_get_all,
+                                                  mock_wait):
+        mock_get_stack.return_value = mock.Mock(id=1)
+        mock_events_get_all.return_value = []
+
+        events = self.eng.list_events(self.ctx, 1, marker='m',
+                                      wait_timeout=10)
+
+        self.assertEqual([], events)
+        self.assertFalse(mock_wait.called)
+
     @mock.patch.object(event_object.Event, 'get_all_by_stack')
     @mock.patch.object(service.EngineService, '_get_stack')
     def test_stack_events_list_passes_marker_and_filters(self,
@@ -2057,6 +2172,7 @@ class StackServiceTest(common.HeatTestCase):
                                                    mock.ANY,
                                                    mock.ANY,
                                                    mock.ANY,
+                                                   eager_load=True,
                                                    )
 
     @mock.patch.object(stack_object.Stack, 'get_all')
@@ -2072,6 +2188,7 @@ class StackServiceTest(common.HeatTestCase):
                                                    mock.ANY,
                                                    mock.ANY,
                                                    mock.ANY,
+                                                   eager_load=True,
                                                    )
 
     @mock.patch.object(stack_object.Stack, 'get_all')
@@ -2086,6 +2203,7 @@ class StackServiceTest(common.HeatTestCase):
                                                    True,
                                                    mock.ANY,
                                                    mock.ANY,
+                                                   eager_load=True,
                                                    )
 
     @mock.patch.object(stack_object.Stack, 'get_all')
@@ -2100,6 +2218,7 @@ class StackServiceTest(common.HeatTestCase):
                                                    False,
                                                    mock.ANY,
                                                    mock.ANY,
+                                                   eager_load=True,
                                                    )
 
     @mock.patch.object(stack_object.Stack, 'get_all')
@@ -2114,6 +2233,7 @@ class StackServiceTest(common.HeatTestCase):
                                                    mock.ANY,
                                                    mock.ANY,
                                                    True,
+                                                   eager_load=True,
                                                    )
 
     @mock.patch.object(stack_object.Stack, 'get_all')
@@ -2128,6 +2248,7 @@ class StackServiceTest(common.HeatTestCase):
                                                    mock.ANY,
                                                    True,
                                                    mock.ANY,
+                                                   eager_load=True,
                                                    )
 
     @mock.patch.object(stack_object.Stack, 'count_all')
@@ -2271,6 +2392,66 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_describe_wait_test_stack', False)
+    def test_stack_describe_wait_for_status(self):
+        cfg.CONF.set_override('max_wait_timeout', 30)
+
+        def change_state(stack_id, timeout):
+            self.assertEqual(self.stack.id, stack_id)
+            self.assertEqual(self.eng.WAIT_RECHECK_INTERVAL, timeout)
+            self.stack.state_set(self.stack.CREATE, self.stack.COMPLETE,
+                                 'Stack created')
+            return True
+
+        wait = self.patchobject(evt, 'wait_for_change',
+                                side_effect=change_state)
+
+        sl = self.eng.show_stack(self.ctx, self.stack.identifier(),
+                                 wait_timeout=60)
+
+        self.assertEqual(1, wait.call_count)
+        self.assertEqual('CREATE', sl[0]['stack_action'])
+        self.assertEqual('COMPLETE', sl[0]['stack_status'])
+        self.assertEqual(0, self.eng._waiting_requests)
+
+    @stack_context('service_describe_nowait_test_stack', False)
+    def test_stack_describe_wait_status_already_changed(self):
+        cfg.CONF.set_override('max_wait_timeout', 30)
+        wait = self.patchobject(evt, 'wait_for_change')
+
+        sl = self.eng.show_stack(self.ctx, self.stack.identifier(),
+                                 wait_timeout=60,
+                                 stack_status='INIT_COMPLETE')
+
+        self.assertFalse(wait.called)
+        self.assertEqual('CREATE', sl[0]['stack_action'])
+        self.assertEqual('IN_PROGRESS', sl[0]['stack_status'])
+
+    @stack_context('service_describe_wait_max_test_stack', False)
+    def test_stack_describe_wait_disabled_by_default(self):
+        wait = self.patchobject(evt, 'wait_for_change')
+
+        sl = self.eng.show_stack(self.ctx, self.stack.identifier(),
+                                 wait_timeout=60)
+
+        self.assertFalse(wait.called)
+        self.assertEqual('CREATE', sl[0]['stack_action'])
+        self.assertEqual('IN_PROGRESS', sl[0]['stack_status'])
+
+    @stack_context('service_describe_wait_busy_test_stack', False)
+    def test_stack_describe_too_many_waiting(self):
+        cfg.CONF.set_override('max_wait_timeout', 30)
+        cfg.CONF.set_override('max_waiting_requests', 1)
+        self.eng._waiting_requests = 1
+        wait = self.patchobject(evt, 'wait_for_change')
+
+        sl = self.eng.show_stack(self.ctx, self.stack.identifier(),
+                                 wait_timeout=60)
+
+        self.assertFalse(wait.called)
+        self.assertEqual('IN_PROGRESS', sl[0]['stack_status'])
+        self.assertEqual(1, self.eng._waiting_requests)
+
     @stack_context('service_describe_all_test_stack', False)
     def test_stack_describe_all(self):
         sl = self.eng.show_stack(self.ctx, None)
@@ -2918,6 +3099,47 @@ class StackServiceTest(common.HeatTestCase):
         for key in rpc_api.WATCH_DATA_KEYS:
             self.assertIn(key, result[0])
 
+    @stack_context('service_create_watch_data_test_stack', False)
+    def test_create_watch_data_bulk(self):
+        rule = {u'EvaluationPeriods': u'1',
+                u'Namespace': u'system/linux',
+                u'Period': u'300',
+                u'ComparisonOperator': u'GreaterThanThreshold',
+                u'Statistic': u'SampleCount',
+                u'Threshold': u'2'}
+        for name, metric in (('watch_failure', u'ServiceFailure'),
+                             ('watch_cpu', u'CPUUtilization'),
+                             ('watch_other', u'MemoryUtilization')):
+            watchrule.WatchRule(context=self.ctx,
+                                watch_name=name,
+                                rule=dict(rule, MetricName=metric),
+                                watch_data=[],
+                                stack_id=self.stack.id,
+                                state='NORMAL').store()
+
+        self.m.StubOutWithMock(watch_rule_object.WatchRule, 'get_all')
+        self.m.ReplayAll()
+
+        samples = [{u'Namespace': u'system/linux',
+                    u'ServiceFailure': {u'Units': u'Counter', u'Value': 1}},
+                   {u'Namespace': u'system/linux',
+                    u'CPUUtilization': {u'Units': u'Percent', u'Value': 42}}]
+        self.assertEqual(samples,
+                         self.eng.create_watch_data(self.ctx, None, samples))
+
+        for name, count in (('watch_failure', 1), ('watch_cpu', 1),
+                            ('watch_other', 0)):
+            watch = watch_rule_object.WatchRule.get_by_name(self.ctx, name)
+            self.assertEqual(count, len(list(watch.watch_data)))
+        self.m.VerifyAll()
+
+    def test_create_watch_data_no_match(self):
+        ex = self.assertRaises(
+            dispatcher.ExpectedException, self.eng.create_watch_data,
+            self.ctx, None, {u'Namespace': u'system/linux',
+                             u'NoSuchMetric': {u'Value': 1}})
+        self.assertEqual(exception.WatchRuleNotFound, ex.exc_info[0])
+
     @stack_context('service_show_watch_state_test_stack')
     def test_set_watch_state(self):
         # Insert dummy watch rule into the DB
@@ -3259,6 +3481,21 @@ class StackServiceTest(common.HeatTestCase):
             'mock_id',
             dict(deleted_at=None))
 
+    @mock.patch.object(service_objects.Service, 'update_by_id')
+    def test_service_manage_report_cache_stats(self, mock_service_update):
+        self.eng.service_id = 'mock_id'
+        stats = self.patchobject(session_pool.pool, 'stats',
+                                 return_value={'sessions': 1,
+                                               'connections_created': 2,
+                                               'connections_reused': 3})
+        parse_stats = self.patchobject(template_format.parse_cache, 'stats',
+                                       return_value={'entries': 1,
+                                                     'hits': 2,
+                                                     'misses': 1})
+        self.eng.service_manage_report()
+        stats.assert_called_once_with()
+        parse_stats.assert_called_once_with()
+
     def test_stop_rpc_server(self):
         with mock.patch.object(self.eng,
                                '_rpc_server') as mock_rpc_server:
@@ -3341,10 +3578,12 @@ class StackServiceTest(common.HeatTestCase):
         # Manage Thread group
         thread_group_class.assert_called_once_with()
         manage_thread_group = thread_group_class.return_value
-        manage_thread_group.add_timer.assert_called_once_with(
-            cfg.CONF.periodic_interval,
-            self.eng.service_manage_report
-        )
+        timers = [mock.call(cfg.CONF.periodic_interval,
+                            self.eng.service_manage_report)]
+        if cfg.CONF.event_prune_interval:
+            timers.append(mock.call(cfg.CONF.event_prune_interval,
+                                    self.eng.prune_events))
+        self.assertEqual(timers, manage_thread_group.add_timer.call_args_list)
 
     @mock.patch('heat.common.messaging.get_rpc_server',
                 return_value=mock.Mock())
@@ -3381,6 +3620,42 @@ class StackServiceTest(common.HeatTestCase):
             rpc_server_method
         )
 
+    @mock.patch('heat.common.messaging.get_rpc_server',
+                return_value=mock.Mock())
+    @mock.patch('oslo_messaging.Target',
+                return_value=mock.Mock())
+    @mock.patch('heat.common.messaging.get_rpc_client',
+                return_value=mock.Mock())
+    @mock.patch('heat.engine.stack_lock.StackLock.generate_engine_id',
+                return_value='sample-uuid')
+    @mock.patch('heat.engine.service.ThreadGroupManager',
+                return_value=mock.Mock())
+    @mock.patch('heat.engine.service.EngineListener',
+                return_value=mock.Mock())
+    @mock.patch('heat.openstack.common.threadgroup.ThreadGroup',
+                return_value=mock.Mock())
+    def test_engine_service_start_with_inline_event_pruning(
+            self,
+            thread_group_class,
+            engine_listener_class,
+            thread_group_manager_class,
+            sample_uuid_method,
+            rpc_client_class,
+            target_class,
+            rpc_server_method):
+        cfg.CONF.set_default('convergence_engine', False)
+        cfg.CONF.set_override('event_prune_interval', 0)
+        self._test_engine_service_start(
+            thread_group_class,
+            None,
+            engine_listener_class,
+            thread_group_manager_class,
+            sample_uuid_method,
+            rpc_client_class,
+            target_class,
+            rpc_server_method
+        )
+
     @mock.patch('heat.common.messaging.get_rpc_server',
                 return_value=mock.Mock())
     @mock.patch('oslo_messaging.Target',
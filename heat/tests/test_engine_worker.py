@@ -13,10 +13,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+
+import eventlet
 import mock
+from oslo_utils import timeutils
 
+from heat.common import exception
+from heat.engine import dependencies
+from heat.engine import resource
+from heat.engine import stack as parser
+from heat.engine import stack_lock
+from heat.engine import sync_point
 from heat.engine import worker
+from heat.objects import resource as resource_objects
 from heat.tests import common
+from heat.tests import utils
 
 
 class WorkerServiceTest(common.HeatTestCase):
@@ -80,3 +92,133 @@ class WorkerServiceTest(common.HeatTestCase):
             self.worker.stop()
             mock_rpc_server.stop.assert_called_once_with()
             mock_rpc_server.wait.assert_called_once_with()
+
+
+class CheckResourceTest(common.HeatTestCase):
+    def setUp(self):
+        super(CheckResourceTest, self).setUp()
+        self.worker = worker.WorkerService('host-1',
+                                           'topic-1',
+                                           'engine-007',
+                                           mock.Mock())
+        self.worker._rpc_client = mock.Mock()
+        self.worker.thread_group_mgr.start.side_effect = (
+            lambda stack_id, func, *args: func(*args))
+        self.ctx = utils.dummy_context()
+
+        self.stack = mock.Mock(IN_PROGRESS='IN_PROGRESS',
+                               status='IN_PROGRESS',
+                               current_traversal='trav-1', id='stack-1')
+        # Graph: 2 requires 1, 3 requires 1 and 2
+        self.stack.current_dependencies.return_value = (
+            dependencies.Dependencies([((2, True), (1, True)),
+                                       ((3, True), (1, True)),
+                                       ((3, True), (2, True))]))
+        self.rsrc = mock.Mock(id=1, resource_id='phys-1')
+        self.rsrc.name = 'A'
+        self.stack.__getitem__ = mock.Mock(return_value=self.rsrc)
+
+        rs = mock.Mock(stack_id='stack-1', engine_id='engine-008')
+        rs.name = 'A'
+        self.patchobject(resource_objects.Resource, 'get_obj',
+                         return_value=rs)
+        self.patchobject(parser.Stack, 'load', return_value=self.stack)
+        self.mock_sync = self.patchobject(sync_point, 'sync')
+
+    def test_check_resource_update_propagates(self):
+        self.worker.check_resource(self.ctx, 1, 'trav-1', {}, True)
+
+        self.rsrc.create_convergence.assert_called_once_with({},
+                                                             'engine-007')
+        data = {'1:True': {'id': 1, 'name': 'A',
+                           'physical_resource_id': 'phys-1'}}
+        self.assertEqual(2, self.mock_sync.call_count)
+        calls = sorted((c[0][1], c[0][5]) for c in
+                       self.mock_sync.call_args_list)
+        self.assertEqual([(2, set(['1:True'])),
+                          (3, set(['1:True', '2:True']))], calls)
+        for c in self.mock_sync.call_args_list:
+            self.assertEqual(data, c[0][6])
+        self.assertFalse(self.stack.mark_complete.called)
+
+    def test_check_resource_root_syncs_stack(self):
+        self.worker.check_resource(self.ctx, 3, 'trav-1', {}, True)
+
+        self.mock_sync.assert_called_once_with(
+            self.ctx, 'stack-1', 'trav-1', True, mock.ANY,
+            set(['3:True']), mock.ANY)
+        propagate = self.mock_sync.call_args[0][4]
+        propagate('stack-1', {})
+        self.stack.mark_complete.assert_called_once_with('trav-1')
+
+    def test_check_resource_stale_traversal(self):
+        self.worker.check_resource(self.ctx, 1, 'trav-0', {}, True)
+
+        self.assertFalse(self.rsrc.create_convergence.called)
+        self.assertFalse(self.mock_sync.called)
+
+    def test_check_resource_runs_in_thread_group(self):
+        self.worker.thread_group_mgr.start.side_effect = None
+        self.worker.check_resource(self.ctx, 1, 'trav-1', {}, True)
+
+        self.worker.thread_group_mgr.start.assert_called_once_with(
+            'stack-1', self.worker._check_resource, self.ctx, self.stack,
+            self.rsrc, 1, 'trav-1', {}, True)
+        self.assertFalse(self.rsrc.create_convergence.called)
+
+    def _lock_held(self, started, engine_alive=True):
+        self.rsrc.create_convergence.side_effect = resource.UpdateInProgress
+        self.stack.updated_time = None
+        self.stack.created_time = started
+        self.stack.timeout_secs.return_value = 3600
+        self.alive = self.patchobject(stack_lock.StackLock, 'engine_alive',
+                                      return_value=engine_alive)
+        self.sleep = self.patchobject(eventlet, 'sleep')
+
+    def test_check_resource_in_progress(self):
+        self._lock_held(timeutils.utcnow())
+        self.worker.check_resource(self.ctx, 1, 'trav-1', {'1:True': None},
+                                   True)
+
+        self.alive.assert_called_once_with(self.ctx, 'engine-008')
+        self.sleep.assert_called_once_with(
+            worker.WorkerService.CHECK_RETRY_INTERVAL)
+        self.worker._rpc_client.check_resource.assert_called_once_with(
+            self.ctx, 1, 'trav-1', {'1:True': None}, True)
+        self.assertFalse(self.mock_sync.called)
+        self.assertFalse(self.stack.mark_failed.called)
+
+    def test_check_resource_in_progress_timed_out(self):
+        self._lock_held(timeutils.utcnow() - datetime.timedelta(hours=2))
+        self.worker.check_resource(self.ctx, 1, 'trav-1', {}, True)
+
+        self.stack.mark_failed.assert_called_once_with('trav-1', mock.ANY)
+        self.assertFalse(self.sleep.called)
+        self.assertFalse(self.worker._rpc_client.check_resource.called)
+
+    def test_check_resource_in_progress_engine_dead(self):
+        self._lock_held(timeutils.utcnow(), engine_alive=False)
+        self.worker.check_resource(self.ctx, 1, 'trav-1', {}, True)
+
+        self.alive.assert_called_once_with(self.ctx, 'engine-008')
+        self.stack.mark_failed.assert_called_once_with('trav-1', mock.ANY)
+        self.assertFalse(self.sleep.called)
+        self.assertFalse(self.worker._rpc_client.check_resource.called)
+
+    def test_check_resource_failure(self):
+        self.rsrc.create_convergence.side_effect = exception.ResourceFailure(
+            Exception('boom'), self.rsrc, 'CREATE')
+        self.worker.check_resource(self.ctx, 1, 'trav-1', {}, True)
+
+        self.assertFalse(self.mock_sync.called)
+        self.stack.mark_failed.assert_called_once_with('trav-1', mock.ANY)
+
+    def test_check_resource_delete(self):
+        self.stack.current_dependencies.return_value = (
+            dependencies.Dependencies([((1, False), (2, False))]))
+        self.worker.check_resource(self.ctx, 2, 'trav-1', {}, False)
+
+        self.rsrc.delete_convergence.assert_called_once_with('engine-007')
+        self.mock_sync.assert_called_once_with(
+            self.ctx, 1, 'trav-1', False, mock.ANY,
+            set(['2:False']), {'2:False': None})
@@ -11,8 +11,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import eventlet
 from oslo_config import cfg
 
+from heat.common import messaging
+from heat.db.sqlalchemy import api as db_api
 from heat.engine import event
 from heat.engine import parser
 from heat.engine import resource
@@ -48,6 +51,9 @@ class EventTest(common.HeatTestCase):
 
         self.m.ReplayAll()
 
+        event._unpruned_stacks.clear()
+        self.addCleanup(event._unpruned_stacks.clear)
+
         resource._register_class('ResourceWithRequiredProps',
                                  generic_rsrc.ResourceWithRequiredProps)
 
@@ -119,10 +125,124 @@ class EventTest(common.HeatTestCase):
                         'arizona', self.resource.properties,
                         self.resource.name, self.resource.type())
         e.store()
+        event.prune_events(self.ctx)
         events = event_object.Event.get_all_by_stack(self.ctx, self.stack.id)
         self.assertEqual(1, len(events))
         self.assertEqual('arizona', events[0].physical_resource_id)
 
+    def test_store_counts_events_once(self):
+        cfg.CONF.set_override('event_prune_interval', 0)
+        cfg.CONF.set_override('event_purge_batch_size', 2)
+        cfg.CONF.set_override('max_events_per_stack', 3)
+        count = self.patchobject(db_api, 'event_count_all_by_stack',
+                                 wraps=db_api.event_count_all_by_stack)
+
+        for i in range(3):
+            e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS',
+                            'Testing', 'phys_%d' % i,
+                            self.resource.properties, self.resource.name,
+                            self.resource.type())
+            e.store()
+        self.assertEqual(1, count.call_count)
+        self.assertEqual(set(), event._unpruned_stacks)
+
+        # Reaching the limit recounts and prunes a whole batch
+        e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS',
+                        'Testing', 'phys_3', self.resource.properties,
+                        self.resource.name, self.resource.type())
+        e.store()
+        self.assertEqual(2, count.call_count)
+        events = event_object.Event.get_all_by_stack(self.ctx, self.stack.id)
+        self.assertEqual(['phys_2', 'phys_3'],
+                         sorted(ev.physical_resource_id for ev in events))
+
+    def test_store_unlimited_events(self):
+        cfg.CONF.set_override('max_events_per_stack', 0)
+        e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS', 'Testing',
+                        'alabama', self.resource.properties,
+                        self.resource.name, self.resource.type())
+        e.store()
+        self.assertEqual(set(), event._unpruned_stacks)
+
+    def test_prune_events(self):
+        cfg.CONF.set_override('event_purge_batch_size', 1)
+        cfg.CONF.set_override('max_events_per_stack', 2)
+        count = self.patchobject(db_api, 'event_count_all_by_stack',
+                                 wraps=db_api.event_count_all_by_stack)
+
+        for i in range(4):
+            e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS',
+                            'Testing', 'phys_%d' % i,
+                            self.resource.properties, self.resource.name,
+                            self.resource.type())
+            e.store()
+        self.assertFalse(count.called)
+        self.assertEqual(4, len(event_object.Event.get_all_by_stack(
+            self.ctx, self.stack.id)))
+
+        event.prune_events(self.ctx)
+        events = event_object.Event.get_all_by_stack(self.ctx, self.stack.id)
+        self.assertEqual(['phys_2', 'phys_3'],
+                         sorted(ev.physical_resource_id for ev in events))
+
+        # Nothing is counted again until more events are stored
+        event.prune_events(self.ctx)
+        self.assertEqual(1, count.call_count)
+
+    def test_prune_events_continues_after_error(self):
+        self.patchobject(event, '_unpruned_stacks', new=set(['a', 'b']))
+        prune = self.patchobject(event_object.Event, 'prune_by_stack',
+                                 side_effect=[Exception('boom'), 0])
+        event.prune_events(self.ctx)
+        self.assertEqual(2, prune.call_count)
+        self.assertEqual(set(), event._unpruned_stacks)
+
+    def test_store_notifies_waiters(self):
+        notify = self.patchobject(event, 'notify_waiters')
+        e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS', 'Testing',
+                        'alabama', self.resource.properties,
+                        self.resource.name, self.resource.type())
+        e.store()
+        notify.assert_called_once_with(self.stack.id)
+
+    def test_wait_for_change_notified(self):
+        waiter = eventlet.spawn(event.wait_for_change, 'stack1', 10)
+        eventlet.sleep(0)
+        self.assertIn('stack1', event._stack_waiters)
+
+        event.notify_waiters('stack2')
+        event.notify_waiters('stack1')
+        self.assertTrue(waiter.wait())
+        self.assertNotIn('stack1', event._stack_waiters)
+
+    def test_notify_all_waiters(self):
+        cfg.CONF.set_override('max_wait_timeout', 30)
+        notify = self.patchobject(event, 'notify_waiters')
+        client = self.patchobject(messaging, 'get_rpc_client').return_value
+        event.notify_all_waiters(self.ctx, 'stack1')
+
+        notify.assert_called_once_with('stack1')
+        client.prepare.assert_called_once_with(fanout=True)
+        client.prepare.return_value.cast.assert_called_once_with(
+            self.ctx, 'notify_waiters', stack_id='stack1',
+            sender=event._notifier_id)
+
+    def test_notify_all_waiters_waiting_disabled(self):
+        get_client = self.patchobject(messaging, 'get_rpc_client')
+        event.notify_all_waiters(self.ctx, 'stack1')
+        self.assertFalse(get_client.called)
+
+    def test_notify_remote_waiters(self):
+        notify = self.patchobject(event, 'notify_waiters')
+        event.notify_remote_waiters('stack1', event._notifier_id)
+        self.assertFalse(notify.called)
+        event.notify_remote_waiters('stack1', 'other-engine')
+        notify.assert_called_once_with('stack1')
+
+    def test_wait_for_change_timeout(self):
+        self.assertFalse(event.wait_for_change('stack1', 0.01))
+        self.assertNotIn('stack1', event._stack_waiters)
+
     def test_identifier(self):
         event_uuid = 'abc123yc-9f88-404d-a85b-531529456xyz'
         e = event.Event(self.ctx, self.stack, 'TEST', 'IN_PROGRESS', 'Testing',
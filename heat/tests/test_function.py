@@ -156,6 +156,47 @@ class DependenciesTest(common.HeatTestCase):
         self.assertEqual(2, len(deps))
 
 
+class CompiledSnippetTest(common.HeatTestCase):
+    func = TestFunction(None, 'test', None)
+
+    scenarios = [
+        ('function', dict(snippet=func, path='')),
+        ('nested_map', dict(snippet={'wibble': func}, path='.wibble')),
+        ('nested_list', dict(snippet=['wibble', func], path='[1]')),
+        ('deep_nested', dict(snippet=[{'wibble': ['wibble', func]}],
+                             path='[0].wibble[1]')),
+    ]
+
+    def test_functions(self):
+        compiled = function.CompiledSnippet(self.snippet)
+        self.assertEqual([(self.path, self.func)], compiled.functions)
+        self.assertFalse(compiled.static)
+
+    def test_dependencies(self):
+        compiled = function.CompiledSnippet(self.snippet)
+        self.assertEqual(list(function.dependencies(self.snippet)),
+                         list(compiled.dependencies()))
+
+    def test_resolve(self):
+        compiled = function.CompiledSnippet(self.snippet)
+        self.assertEqual(function.resolve(self.snippet), compiled.resolve())
+
+    def test_static(self):
+        snippet = {'foo': ['bar', {'baz': 'quux'}]}
+        compiled = function.CompiledSnippet(snippet)
+        self.assertTrue(compiled.static)
+        self.assertEqual([], list(compiled.dependencies()))
+        self.assertEqual(snippet, compiled.resolve())
+        self.assertIsNot(snippet, compiled.resolve())
+
+    def test_dep_attrs_cached(self):
+        compiled = function.CompiledSnippet(self.snippet)
+        self.patchobject(self.func, 'dep_attrs', return_value=['attr'])
+        self.assertEqual(['attr'], list(compiled.dep_attrs('res')))
+        self.assertEqual(['attr'], list(compiled.dep_attrs('res')))
+        self.func.dep_attrs.assert_called_once_with('res')
+
+
 class ValidateGetAttTest(common.HeatTestCase):
     def setUp(self):
         super(ValidateGetAttTest, self).setUp()
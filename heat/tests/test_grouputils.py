@@ -90,3 +90,59 @@ class GroupUtilsTest(common.HeatTestCase):
         self.assertEqual([rsrc_ok], grouputils.get_members(group))
         self.assertEqual(['ID-r1'], grouputils.get_member_refids(group))
         self.assertEqual(['r1'], grouputils.get_member_names(group))
+
+    def test_members_cached_until_nested_replaced(self):
+        group = mock.Mock()
+        t = template_format.parse(nested_stack)
+        stack = utils.parse_stack(t)
+        nested = self.patchobject(group, 'nested', return_value=stack)
+
+        members = grouputils.get_members(group)
+        self.assertEqual([stack['r0'], stack['r1']], members)
+        with mock.patch.object(grouputils, 'sorted', create=True) as srt:
+            self.assertEqual(members, grouputils.get_members(group))
+            self.assertEqual('r1', grouputils.get_resource(
+                group, '1', True, 'resource.1').name)
+            self.assertFalse(srt.called)
+
+        new_stack = utils.parse_stack(t)
+        nested.return_value = new_stack
+        self.assertEqual([new_stack['r0'], new_stack['r1']],
+                         grouputils.get_members(group))
+
+    def test_members_rebuilt_when_member_fails(self):
+        group = mock.Mock()
+        t = template_format.parse(nested_stack)
+        stack = utils.parse_stack(t)
+        self.patchobject(group, 'nested', return_value=stack)
+
+        self.assertEqual('r1', grouputils.get_resource(
+            group, '1', True, 'resource.1').name)
+        stack['r0'].state_set(stack['r0'].CREATE, stack['r0'].FAILED)
+        self.assertEqual([stack['r1']], grouputils.get_members(group))
+        self.assertEqual('r1', grouputils.get_resource(
+            group, '0', True, 'resource.0').name)
+        self.assertEqual(1, grouputils.get_size(group))
+
+    def test_members_rebuilt_when_member_removed(self):
+        group = mock.Mock()
+        t = template_format.parse(nested_stack)
+        stack = utils.parse_stack(t)
+        self.patchobject(group, 'nested', return_value=stack)
+
+        self.assertEqual(2, grouputils.get_size(group))
+        stack.remove_resource('r0')
+        self.assertEqual(['r1'], grouputils.get_member_names(group))
+
+    def test_member_refids_once_per_member(self):
+        group = mock.Mock()
+        t = template_format.parse(nested_stack)
+        stack = utils.parse_stack(t)
+        self.patchobject(group, 'nested', return_value=stack)
+        refid = self.patchobject(SimpleResource, 'FnGetRefId',
+                                 side_effect=['ID-r0', 'ID-r1'])
+
+        self.assertEqual(['ID-r0'],
+                         grouputils.get_member_refids(group,
+                                                      exclude=['ID-r1']))
+        self.assertEqual(2, refid.call_count)
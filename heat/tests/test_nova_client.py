@@ -21,6 +21,7 @@ from oslo_config import cfg
 import six
 
 from heat.common import exception
+from heat.engine.clients import client_plugin
 from heat.engine.clients.os import nova
 from heat.tests import common
 from heat.tests import utils
@@ -81,6 +82,21 @@ class NovaClientPluginTests(NovaClientPluginTestCase):
         self.assertEqual([(), (), ()],
                          self.nova_client.flavors.list.call_args_list)
 
+    def test_get_flavor_id_cached(self):
+        cfg.CONF.set_override('lookup_cache_ttl', 60, group='clients')
+        self.addCleanup(client_plugin.lookup_cache.clear)
+        my_flavor = mock.MagicMock()
+        my_flavor.name = 'X-Large'
+        my_flavor.id = str(uuid.uuid4())
+        self.nova_client.flavors.list.return_value = [my_flavor]
+        self.assertEqual(my_flavor.id,
+                         self.nova_plugin.get_flavor_id('X-Large'))
+        self.assertEqual(my_flavor.id,
+                         self.nova_plugin.get_flavor_id('X-Large'))
+        self.assertRaises(exception.FlavorMissing,
+                          self.nova_plugin.get_flavor_id, 'noflavor')
+        self.assertEqual(2, self.nova_client.flavors.list.call_count)
+
     def test_get_keypair(self):
         """Tests the get_keypair function."""
         my_pub_key = 'a cool public key string'
@@ -205,6 +221,128 @@ class NovaUtilsRefreshServerTests(NovaClientPluginTestCase):
         server.get.assert_called_once_with()
 
 
+class ServerStatusPollerTest(NovaClientPluginTestCase):
+    def setUp(self):
+        super(ServerStatusPollerTest, self).setUp()
+        self.now = 100
+        self.patchobject(nova.scheduler, 'wallclock',
+                         side_effect=lambda: self.now)
+
+    def _server(self, server_id, updated='2015-03-01T10:00:00Z',
+                status='BUILD'):
+        server = mock.Mock(id=server_id, updated=updated, status=status)
+        server._info = {'id': server_id, 'updated': updated,
+                        'status': status}
+        return server
+
+    def test_single_server_uses_get(self):
+        server = self._server('1')
+        self.nova_plugin.refresh_server(server)
+        self.nova_plugin.refresh_server(server)
+
+        self.assertEqual(2, server.get.call_count)
+        self.assertFalse(self.nova_client.servers.list.called)
+
+    def test_batched_refresh(self):
+        s1 = self._server('1', updated='2015-03-01T10:00:05Z')
+        s2 = self._server('2', updated='2015-03-01T10:00:00Z')
+        s3 = self._server('3')
+        self.nova_plugin.refresh_server(s1)
+        self.assertEqual(1, s1.get.call_count)
+
+        self.now += 1
+        self.nova_client.servers.list.side_effect = [
+            [self._server('1', updated='2015-03-01T10:00:07Z',
+                          status='ACTIVE'),
+             self._server('9', status='ACTIVE')],
+            []]
+        self.nova_plugin.refresh_server(s2)
+        self.nova_plugin.refresh_server(s1)
+
+        search_opts = {'changes-since': '2015-03-01T10:00:00Z'}
+        self.assertEqual(
+            [mock.call(search_opts=search_opts, marker=None),
+             mock.call(search_opts=search_opts, marker='9')],
+            self.nova_client.servers.list.call_args_list)
+        self.assertFalse(s2.get.called)
+        self.assertFalse(s2._add_details.called)
+        s1._add_details.assert_called_once_with(
+            {'id': '1', 'updated': '2015-03-01T10:00:07Z',
+             'status': 'ACTIVE'})
+        self.assertEqual(1, s1.get.call_count)
+
+        # Not included in the last poll, so fetched directly
+        self.nova_plugin.refresh_server(s3)
+        s3.get.assert_called_once_with()
+        self.assertEqual(2, self.nova_client.servers.list.call_count)
+
+    def test_all_servers_seen_stops_paging(self):
+        s1 = self._server('1')
+        s2 = self._server('2')
+        self.nova_plugin.refresh_server(s1)
+        self.now += 1
+        self.nova_client.servers.list.side_effect = [
+            [self._server('2', status='ACTIVE'),
+             self._server('1', status='ACTIVE')]]
+        self.nova_plugin.refresh_server(s2)
+
+        self.assertEqual(1, self.nova_client.servers.list.call_count)
+        self.assertFalse(s2.get.called)
+        s2._add_details.assert_called_once_with(
+            {'id': '2', 'updated': '2015-03-01T10:00:00Z',
+             'status': 'ACTIVE'})
+
+    def test_truncated_list_uses_get(self):
+        self.patchobject(nova.ServerStatusPoller, 'MAX_PAGES', new=2)
+        s1 = self._server('1')
+        s2 = self._server('2')
+        s3 = self._server('3')
+        self.nova_client.servers.list.side_effect = [
+            [],
+            [self._server('3', status='ACTIVE'),
+             self._server('8', status='ACTIVE')],
+            [self._server('9', status='ACTIVE')]]
+        self.nova_plugin.refresh_server(s1)
+        self.nova_plugin.refresh_server(s2)
+        self.now += 1
+        self.nova_plugin.refresh_server(s3)
+        self.nova_plugin.refresh_server(s1)
+
+        self.assertEqual(3, self.nova_client.servers.list.call_count)
+        self.nova_client.servers.list.assert_called_with(
+            search_opts={'changes-since': '2015-03-01T10:00:00Z'},
+            marker='8')
+        self.assertFalse(s3.get.called)
+        s3._add_details.assert_called_once_with(
+            {'id': '3', 'updated': '2015-03-01T10:00:00Z',
+             'status': 'ACTIVE'})
+        # Not seen before the listing was cut short, so fetched directly
+        self.assertEqual(2, s1.get.call_count)
+        self.assertFalse(s1._add_details.called)
+
+    def test_deleted_server_uses_get(self):
+        s1 = self._server('1')
+        s2 = self._server('2')
+        self.nova_plugin.refresh_server(s1)
+        self.now += 1
+        self.nova_client.servers.list.side_effect = [
+            [self._server('2', status='DELETED')], []]
+        s2.get.side_effect = nova_exceptions.NotFound(404)
+
+        self.assertRaises(nova_exceptions.NotFound,
+                          self.nova_plugin.refresh_server, s2)
+
+    def test_expired_servers_not_polled(self):
+        s1 = self._server('1')
+        s2 = self._server('2')
+        self.nova_plugin.refresh_server(s1)
+        self.now += 60
+        self.nova_plugin.refresh_server(s2)
+
+        self.assertFalse(self.nova_client.servers.list.called)
+        s2.get.assert_called_once_with()
+
+
 class NovaUtilsUserdataTests(NovaClientPluginTestCase):
 
     def test_build_userdata(self):
@@ -11,12 +11,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
+import mock
 from oslo_serialization import jsonutils
 import six
 
 from heat.common import exception
 from heat.engine.cfn import functions as cfn_funcs
 from heat.engine import constraints
+from heat.engine import function
 from heat.engine.hot import parameters as hot_param
 from heat.engine import parameters
 from heat.engine import properties
@@ -1124,6 +1128,92 @@ class PropertiesTest(common.HeatTestCase):
         except exception.StackValidationFailed:
             self.fail("Constraints should not have been evaluated.")
 
+    def _counting_props(self, schema, data):
+        calls = []
+
+        def resolver(value):
+            calls.append(value)
+            return value
+
+        return properties.Properties(schema, data, resolver), calls
+
+    def test_memoized(self):
+        schema = {'foo': {'Type': 'String'},
+                  'bar': {'Type': 'List'}}
+        props, calls = self._counting_props(schema, {'foo': 'baz',
+                                                     'bar': ['a']})
+        with props.memoized():
+            self.assertEqual('baz', props['foo'])
+            self.assertEqual('baz', props['foo'])
+            props['bar'].append('b')
+            self.assertEqual(['a'], props['bar'])
+        self.assertEqual(['baz', ['a']], calls)
+
+        self.assertEqual('baz', props['foo'])
+        self.assertEqual(3, len(calls))
+
+    def test_memoized_copies_nested_values(self):
+        schema = {'foo': {'Type': 'Map'}}
+        props, calls = self._counting_props(schema,
+                                            {'foo': {'a': [{'b': 'c'}]}})
+        with props.memoized():
+            props['foo']['a'][0]['b'] = 'd'
+            props['foo']['x'] = 'y'
+            self.assertEqual({'a': [{'b': 'c'}]}, props['foo'])
+        self.assertEqual(1, len(calls))
+
+    def test_memoized_copies_keep_order(self):
+        schema = {'foo': {'Type': 'List'}}
+        ordered = collections.OrderedDict([('z', 1), ('a', 2), ('m', 3)])
+        props = properties.Properties(schema, {'foo': [ordered]})
+        with props.memoized():
+            props['foo']
+            value = props['foo'][0]
+        self.assertIsInstance(value, collections.OrderedDict)
+        self.assertEqual(['z', 'a', 'm'], list(value))
+        self.assertIsNot(ordered, value)
+
+    def test_memoized_reset(self):
+        schema = {'foo': {'Type': 'String'}}
+        props, calls = self._counting_props(schema, {'foo': 'baz'})
+        with props.memoized():
+            props['foo']
+            props.reset_resolved_values()
+            props['foo']
+        self.assertEqual(2, len(calls))
+
+    def test_memoized_validation(self):
+        schema = {'foo': {'Type': 'String'}}
+        props, calls = self._counting_props(schema, {'foo': 'baz'})
+        with props.memoized():
+            props['foo']
+            props.validate()
+            props.validate()
+            props['foo']
+        self.assertEqual(2, len(calls))
+
+    def test_compiled_snippets(self):
+        resolve = self.patchobject(function, 'resolve',
+                                   wraps=function.resolve)
+        compile_snippet = self.patchobject(function, 'CompiledSnippet',
+                                           wraps=function.CompiledSnippet)
+        schema = {'foo': {'Type': 'String'},
+                  'bar': {'Type': 'List'}}
+        data = {'foo': 'baz', 'bar': ['a']}
+        props = properties.Properties(schema, data, function.resolve)
+
+        self.assertEqual('baz', props['foo'])
+        self.assertEqual('baz', props['foo'])
+        self.assertEqual(['a'], props['bar'])
+        self.assertEqual(2, compile_snippet.call_count)
+        # Only the list is resolved; the static string is returned as it is
+        self.assertEqual([mock.call(['a']), mock.call('a')],
+                         resolve.call_args_list)
+
+        data['foo'] = 'quux'
+        self.assertEqual('quux', props['foo'])
+        self.assertEqual(3, compile_snippet.call_count)
+
     def test_schema_from_params(self):
         params_snippet = {
             "DBUsername": {
@@ -134,6 +134,12 @@ class EngineRpcAPITestCase(common.HeatTestCase):
     def test_show_stack(self):
         self._test_engine_api('show_stack', 'call', stack_identity='wordpress')
 
+    def test_show_stack_wait(self):
+        self._test_engine_api('show_stack', 'call', stack_identity='wordpress',
+                              wait_timeout=10,
+                              stack_status='CREATE_IN_PROGRESS',
+                              version='1.8')
+
     def test_preview_stack(self):
         self._test_engine_api('preview_stack', 'call', stack_name='wordpress',
                               template={u'Foo': u'bar'},
@@ -200,6 +206,17 @@ class EngineRpcAPITestCase(common.HeatTestCase):
                   'filters': None}
         self._test_engine_api('list_events', 'call', **kwargs)
 
+    def test_list_events_wait(self):
+        kwargs = {'stack_identity': self.identity,
+                  'limit': None,
+                  'marker': 'abc',
+                  'sort_keys': None,
+                  'sort_dir': None,
+                  'filters': None,
+                  'wait_timeout': 10,
+                  'version': '1.8'}
+        self._test_engine_api('list_events', 'call', **kwargs)
+
     def test_describe_stack_resource(self):
         self._test_engine_api('describe_stack_resource', 'call',
                               stack_identity=self.identity,
@@ -250,6 +267,11 @@ class EngineRpcAPITestCase(common.HeatTestCase):
                               watch_name='watch1',
                               stats_data={})
 
+    def test_create_watch_data_bulk(self):
+        self._test_engine_api('create_watch_data', 'call',
+                              watch_name=None,
+                              stats_data=[{}, {}], version='1.7')
+
     def test_show_watch(self):
         self._test_engine_api('show_watch', 'call',
                               watch_name='watch1')
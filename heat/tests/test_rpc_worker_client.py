@@ -72,3 +72,14 @@ class WorkerClientTest(common.HeatTestCase):
         mock_rpc_client.cast.assert_called_once_with(mock_cnxt,
                                                      method,
                                                      **kwargs)
+
+    def test_check_resource(self):
+        mock_cnxt = mock.Mock()
+        worker_client = rpc_client.WorkerClient()
+        with mock.patch.object(worker_client, 'cast') as mock_cast:
+            worker_client.check_resource(mock_cnxt, 42, 'traversal-1',
+                                         {'a': 'b'}, True)
+        msg = ('check_resource',
+               {'resource_id': 42, 'current_traversal': 'traversal-1',
+                'data': {'a': 'b'}, 'is_update': True})
+        mock_cast.assert_called_once_with(mock_cnxt, msg)
@@ -14,6 +14,7 @@
 import contextlib
 
 import eventlet
+import six
 
 from heat.engine import dependencies
 from heat.engine import scheduler
@@ -440,6 +441,71 @@ class DependencyTaskGroupTest(common.HeatTestCase):
         self.assertEqual(e1, exc)
 
 
+class ScheduledDependencyTaskGroupTest(common.HeatTestCase):
+    def setUp(self):
+        super(ScheduledDependencyTaskGroupTest, self).setUp()
+        self.now = 0
+        self.patchobject(scheduler, 'wallclock',
+                         side_effect=lambda: self.now)
+        self.steps = []
+
+    def _task(self, num_steps, fail_at=None):
+        def task(name):
+            for i in range(1, num_steps.get(name, 1) + 1):
+                self.steps.append((self.now, name, i))
+                if fail_at == (name, i):
+                    raise ValueError('%s failed' % name)
+                yield
+        return task
+
+    def _run(self, edges, num_steps, fail_at=None, **kwargs):
+        deps = dependencies.Dependencies(edges)
+        tg = scheduler.DependencyTaskGroup(deps,
+                                           self._task(num_steps, fail_at),
+                                           max_poll_interval=4, **kwargs)
+        runner = scheduler.TaskRunner(tg)
+        runner.start()
+        while not runner.done():
+            self.now += 1
+            runner.step()
+
+    def test_backoff(self):
+        self._run([('A', None)], {'A': 6})
+        self.assertEqual([(0, 'A', 1), (1, 'A', 2), (2, 'A', 3),
+                          (4, 'A', 4), (8, 'A', 5), (12, 'A', 6)],
+                         self.steps)
+        self.assertEqual(16, self.now)
+
+    def test_dependent_starts_on_completion(self):
+        self._run([('B', 'A')], {'A': 2, 'B': 1})
+        self.assertEqual([(0, 'A', 1), (1, 'A', 2), (2, 'B', 1)],
+                         self.steps)
+
+    def test_independent_schedules(self):
+        self._run([('A', None), ('B', None), ('C', 'A')],
+                  {'A': 1, 'B': 5, 'C': 1})
+        self.assertIn((1, 'C', 1), self.steps)
+        self.assertEqual([0, 1, 2, 4, 8],
+                         [t for t, n, i in self.steps if n == 'B'])
+
+    def test_exception(self):
+        exc = self.assertRaises(ValueError, self._run,
+                                [('A', None), ('B', None), ('C', 'A')],
+                                {'A': 3, 'B': 3}, fail_at=('A', 2))
+        self.assertEqual('A failed', six.text_type(exc))
+        self.assertNotIn('C', [n for t, n, i in self.steps])
+
+    def test_aggregate_exceptions(self):
+        exc = self.assertRaises(scheduler.ExceptionGroup, self._run,
+                                [('A', None), ('B', None), ('C', 'A')],
+                                {'A': 3, 'B': 3}, fail_at=('A', 2),
+                                aggregate_exceptions=True)
+        self.assertEqual(['A failed'],
+                         [six.text_type(e) for e in exc.exceptions])
+        self.assertEqual(3, len([n for t, n, i in self.steps if n == 'B']))
+        self.assertNotIn('C', [n for t, n, i in self.steps])
+
+
 class TaskTest(common.HeatTestCase):
 
     def setUp(self):
@@ -31,6 +31,7 @@ from heat.engine import resource
 from heat.engine import scheduler
 from heat.engine import stack
 from heat.engine import template
+from heat.objects import raw_template as raw_template_object
 from heat.objects import stack as stack_object
 from heat.objects import user_creds as ucreds_object
 from heat.tests import common
@@ -290,7 +291,8 @@ class StackTest(common.HeatTestCase):
                              use_stored_context=False,
                              username=mox.IgnoreArg(),
                              convergence=False,
-                             current_traversal=None)
+                             current_traversal=None,
+                             current_deps=None)
 
         self.m.ReplayAll()
         stack.Stack.load(self.ctx, stack_id=self.stack.id,
@@ -446,6 +448,42 @@ class StackTest(common.HeatTestCase):
         stacks = list(stack.Stack.load_all(self.ctx, show_nested=True))
         self.assertEqual(3, len(stacks))
 
+    def test_load_all_joins_raw_template(self):
+        stack1 = stack.Stack(self.ctx, 'stack1', self.tmpl)
+        stack1.store()
+        stack2 = stack.Stack(self.ctx, 'stack2', self.tmpl)
+        stack2.store()
+        self.ctx.session.expunge_all()
+
+        mock_get = self.patchobject(raw_template_object.RawTemplate,
+                                    'get_by_id')
+        stacks = list(stack.Stack.load_all(self.ctx))
+        self.assertEqual(2, len(stacks))
+        self.assertEqual(self.tmpl.t, stacks[0].t.t)
+        self.assertFalse(mock_get.called)
+
+    def test_stack_object_loads_raw_template_lazily(self):
+        self.stack = stack.Stack(self.ctx, 'lazy_template', self.tmpl)
+        self.stack.store()
+        self.ctx.session.expunge_all()
+
+        real_get = raw_template_object.RawTemplate.get_by_id
+        mock_get = self.patchobject(raw_template_object.RawTemplate,
+                                    'get_by_id', side_effect=real_get)
+        stk = stack_object.Stack.get_by_id(self.ctx, self.stack.id)
+        self.assertFalse(mock_get.called)
+
+        self.assertEqual(self.tmpl.t, stk.raw_template.template)
+        self.assertEqual(self.tmpl.t, stk['raw_template'].template)
+        mock_get.assert_called_once_with(self.ctx, self.stack.t.id)
+
+        # An eager load populates the template from the joined row
+        mock_get.reset_mock()
+        stk = stack_object.Stack.get_by_id(self.ctx, self.stack.id,
+                                           eager_load=True)
+        self.assertEqual(self.tmpl.t, stk.raw_template.template)
+        self.assertFalse(mock_get.called)
+
     def test_created_time(self):
         self.stack = stack.Stack(self.ctx, 'creation_time_test', self.tmpl)
         self.assertIsNone(self.stack.created_time)
@@ -1774,6 +1812,185 @@ class StackTest(common.HeatTestCase):
         self.assertEqual(
             'foo', self.stack.resources['A'].properties['a_string'])
 
+    def test_create_scheduled_polling(self):
+        cfg.CONF.set_override('max_resource_poll_interval', 4)
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources': {
+                   'A': {'Type': 'GenericResourceType'},
+                   'B': {'Type': 'GenericResourceType',
+                         'DependsOn': 'A'}}}
+        self.stack = stack.Stack(self.ctx, 'scheduled_polling_test',
+                                 template.Template(tpl))
+        self.stack.store()
+        self.stack.create()
+
+        self.assertEqual((stack.Stack.CREATE, stack.Stack.COMPLETE),
+                         self.stack.state)
+        self.assertEqual((resource.Resource.CREATE,
+                          resource.Resource.COMPLETE),
+                         self.stack['B'].state)
+
+    def _convergence_stack(self):
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources': {
+                   'A': {'Type': 'GenericResourceType'},
+                   'B': {'Type': 'GenericResourceType',
+                         'DependsOn': 'A'},
+                   'C': {'Type': 'GenericResourceType'}}}
+        self.stack = stack.Stack(self.ctx, 'convergence_test',
+                                 template.Template(tpl), convergence=True)
+        self.stack.store()
+
+    def _resource_ids(self):
+        return dict((n, self.stack[n].id) for n in ('A', 'B', 'C'))
+
+    def test_convergence_dependencies(self):
+        self._convergence_stack()
+        self.stack._store_resources()
+        ids = self._resource_ids()
+
+        update_graph = self.stack.convergence_dependencies(True).graph()
+        self.assertEqual(set([(ids['A'], True)]),
+                         set(update_graph[(ids['B'], True)]))
+        self.assertFalse(update_graph[(ids['A'], True)])
+        self.assertFalse(update_graph[(ids['C'], True)])
+
+        delete_graph = self.stack.convergence_dependencies(False).graph()
+        self.assertEqual(set([(ids['B'], False)]),
+                         set(delete_graph[(ids['A'], False)]))
+        self.assertFalse(delete_graph[(ids['B'], False)])
+
+    @mock.patch('heat.rpc.worker_client.WorkerClient.check_resource')
+    def test_converge_stack_create(self, mock_check):
+        self._convergence_stack()
+
+        self.stack.converge_stack(action=self.stack.CREATE)
+        ids = self._resource_ids()
+
+        self.assertEqual((stack.Stack.CREATE, stack.Stack.IN_PROGRESS),
+                         self.stack.state)
+        traversal = self.stack.current_traversal
+        self.assertIsNotNone(traversal)
+        db_stack = stack_object.Stack.get_by_id(self.ctx, self.stack.id)
+        self.assertEqual(traversal, db_stack.current_traversal)
+        self.assertEqual(
+            set(self.stack.convergence_dependencies().graph().edges()),
+            set(self.stack.current_dependencies().graph().edges()))
+
+        leaves = sorted(c[0][1] for c in mock_check.call_args_list)
+        self.assertEqual(sorted([ids['A'], ids['C']]), leaves)
+        for c in mock_check.call_args_list:
+            self.assertEqual((traversal, {}, True), c[0][2:])
+
+    @mock.patch('heat.rpc.worker_client.WorkerClient.check_resource')
+    def test_converge_stack_no_resources(self, mock_check):
+        self.stack = stack.Stack(self.ctx, 'convergence_empty',
+                                 self.tmpl, convergence=True)
+        self.stack.store()
+
+        self.stack.converge_stack(action=self.stack.CREATE)
+
+        self.assertFalse(mock_check.called)
+        self.assertEqual((stack.Stack.CREATE, stack.Stack.COMPLETE),
+                         self.stack.state)
+
+    def test_converge_stack_invalid_action(self):
+        self.stack = stack.Stack(self.ctx, 'convergence_invalid',
+                                 self.tmpl, convergence=True)
+        self.assertRaises(ValueError, self.stack.converge_stack,
+                          action=self.stack.UPDATE)
+
+    @mock.patch('heat.rpc.worker_client.WorkerClient.check_resource')
+    def test_mark_failed_stale_traversal(self, mock_check):
+        self._convergence_stack()
+        self.stack.converge_stack(action=self.stack.CREATE)
+
+        self.stack.mark_failed('stale', 'boom')
+        self.assertEqual((stack.Stack.CREATE, stack.Stack.IN_PROGRESS),
+                         self.stack.state)
+
+        self.stack.mark_failed(self.stack.current_traversal, 'boom')
+        self.assertEqual((stack.Stack.CREATE, stack.Stack.FAILED),
+                         self.stack.state)
+
+    def _attr_reset_stack(self):
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {
+                    'AResource': {'Type': 'GenericResourceType'},
+                    'BResource': {'Type': 'ResourceWithPropsType',
+                                  'Properties': {
+                                      'Foo': {'Ref': 'AResource'}}},
+                    'CResource': {'Type': 'GenericResourceType'}}}
+        self.stack = stack.Stack(self.ctx, 'attr_reset_stack',
+                                 template.Template(tmpl))
+        for res in self.stack.resources.values():
+            res.attributes._resolved_values['foo'] = 'cached'
+
+    def _cached(self):
+        return set(name for name, res in self.stack.resources.items()
+                   if res.attributes._resolved_values)
+
+    def test_reset_resource_attributes_dependents(self):
+        self._attr_reset_stack()
+        self.stack.dependencies
+        self.stack.reset_resource_attributes(self.stack['AResource'])
+        self.assertEqual(set(['CResource']), self._cached())
+
+    def test_reset_resource_attributes_leaf(self):
+        self._attr_reset_stack()
+        self.stack.dependencies
+        self.stack.reset_resource_attributes(self.stack['BResource'])
+        self.assertEqual(set(['AResource', 'CResource']), self._cached())
+
+    def test_reset_resource_attributes_diamond(self):
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {
+                    'AResource': {'Type': 'GenericResourceType'},
+                    'BResource': {'Type': 'GenericResourceType',
+                                  'DependsOn': 'AResource'},
+                    'CResource': {'Type': 'GenericResourceType',
+                                  'DependsOn': 'AResource'},
+                    'DResource': {'Type': 'GenericResourceType',
+                                  'DependsOn': ['BResource', 'CResource']},
+                    'EResource': {'Type': 'GenericResourceType'}}}
+        self.stack = stack.Stack(self.ctx, 'attr_reset_diamond',
+                                 template.Template(tmpl))
+        for res in self.stack.resources.values():
+            res.attributes._resolved_values['foo'] = 'cached'
+        deps = self.stack.dependencies
+        required_by = self.patchobject(deps, 'required_by',
+                                       side_effect=deps.required_by)
+
+        self.stack.reset_resource_attributes(self.stack['AResource'])
+
+        self.assertEqual(set(['EResource']), self._cached())
+        self.assertEqual(4, required_by.call_count)
+
+    def test_reset_resource_attributes_no_graph(self):
+        self._attr_reset_stack()
+        self.stack.reset_resource_attributes(self.stack['CResource'])
+        self.assertEqual(set(), self._cached())
+
+    def test_reset_resource_attributes_all(self):
+        self._attr_reset_stack()
+        self.stack.dependencies
+        self.stack.reset_resource_attributes()
+        self.assertEqual(set(), self._cached())
+
+    def test_attribute_cache_hits(self):
+        self._attr_reset_stack()
+        self.stack['AResource'].attributes.cache_hits = 2
+        self.stack['CResource'].attributes.cache_hits = 3
+        self.assertEqual(5, self.stack.attribute_cache_hits())
+
+        log = self.patchobject(stack.LOG, 'debug')
+        self.stack.state_set(self.stack.CREATE, self.stack.COMPLETE,
+                             'Created')
+        log.assert_called_once_with(mock.ANY, {'action': 'CREATE',
+                                               'status': 'COMPLETE',
+                                               'name': 'attr_reset_stack',
+                                               'hits': 5})
+
 
 class StackKwargsForCloningTest(common.HeatTestCase):
     scenarios = [
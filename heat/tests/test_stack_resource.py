@@ -19,10 +19,12 @@ import six
 
 from heat.common import exception
 from heat.common import template_format
+from heat.db import api as db_api
 from heat.engine import resource
 from heat.engine.resources import stack_resource
 from heat.engine import stack as parser
 from heat.engine import template as templatem
+from heat.objects import stack as stack_object
 from heat.tests import common
 from heat.tests import generic_resource as generic_rsrc
 from heat.tests import utils
@@ -497,6 +499,50 @@ class StackResourceTest(common.HeatTestCase):
                           force_reload=True)
         self.m.VerifyAll()
 
+    def test_load_nested_shared_in_request(self):
+        self.parent_resource._nested = None
+        self.parent_resource.resource_id = 319
+        self.m.StubOutWithMock(parser.Stack, 'load')
+        parser.Stack.load(self.parent_resource.context,
+                          self.parent_resource.resource_id,
+                          parent_resource=self.parent_resource.name,
+                          show_deleted=False,
+                          force_reload=False).AndReturn('s')
+        self.m.ReplayAll()
+        with self.parent_resource.context.cached_stacks():
+            self.assertEqual('s', self.parent_resource.nested())
+
+            # Another copy of the resource in the same request reuses it
+            self.parent_resource._nested = None
+            self.assertEqual('s', self.parent_resource.nested())
+        self.m.VerifyAll()
+
+    def test_load_nested_not_shared_outside_read_only_request(self):
+        self.parent_resource._nested = None
+        self.parent_resource.resource_id = 319
+        load = self.patchobject(parser.Stack, 'load', return_value='s')
+        self.assertEqual('s', self.parent_resource.nested())
+
+        self.parent_resource._nested = None
+        self.assertEqual('s', self.parent_resource.nested())
+        self.assertEqual(2, load.call_count)
+        self.assertEqual({}, self.parent_resource.context.stack_cache)
+
+    def test_total_nested_resources_counts_in_db(self):
+        self.parent_resource._nested = None
+        self.parent_resource.resource_id = 'abc'
+        count = self.patchobject(stack_object.Stack, 'count_total_resources',
+                                 return_value=5)
+        self.assertEqual(5, self.parent_resource.total_nested_resources())
+        count.assert_called_once_with(self.parent_resource.context, 'abc')
+
+    def test_total_nested_resources_loaded(self):
+        self.parent_resource._nested = mock.Mock()
+        self.parent_resource._nested.total_resources.return_value = 2
+        count = self.patchobject(stack_object.Stack, 'count_total_resources')
+        self.assertEqual(2, self.parent_resource.total_nested_resources())
+        self.assertFalse(count.called)
+
     def test_delete_nested_not_found_nested_stack(self):
 
         self.parent_resource._nested = None
@@ -506,6 +552,84 @@ class StackResourceTest(common.HeatTestCase):
             side_effect=exception.NotFound())
         self.assertIsNone(self.parent_resource.delete_nested())
 
+    def test_delete_nested_drops_shared_stack(self):
+        self.parent_resource.resource_id = 319
+        key = (319, self.parent_resource.name, False)
+        ctx = self.parent_resource.context
+        self.parent_resource.rpc_client = mock.Mock()
+
+        with ctx.cached_stacks():
+            ctx.stack_cache[key] = self.parent_resource._nested = 's'
+            self.parent_resource.delete_nested()
+            self.assertNotIn(key, ctx.stack_cache)
+        self.assertIsNone(self.parent_resource._nested)
+
+    def test_update_with_template_drops_shared_stack(self):
+        nested = mock.MagicMock(action='CREATE', status='COMPLETE')
+        self.parent_resource.id = 1
+        self.parent_resource.resource_id = 319
+        key = (319, self.parent_resource.name, False)
+        ctx = self.parent_resource.context
+        self.parent_resource._validate_nested_resources = mock.Mock()
+        self.parent_resource.rpc_client = mock.MagicMock()
+        self.patchobject(self.parent_resource, 'data', return_value={})
+        self.patchobject(self.parent_resource, 'data_set')
+
+        with ctx.cached_stacks():
+            ctx.stack_cache[key] = self.parent_resource._nested = nested
+            self.parent_resource.update_with_template(self.simple_template,
+                                                      {})
+            self.assertNotIn(key, ctx.stack_cache)
+        self.assertEqual(1, self.parent_resource.rpc_client.return_value.
+                         update_stack.call_count)
+        self.assertIsNone(self.parent_resource._nested)
+
+    def test_check_complete_sees_status_change_in_same_context(self):
+        ctx = self.parent_resource.context
+        nested = parser.Stack(ctx, 'nested_stack',
+                              templatem.Template(self.simple_template))
+        nested.store()
+        nested.state_set(nested.CREATE, nested.IN_PROGRESS, 'Started')
+        self.parent_resource.resource_id = nested.id
+        self.assertFalse(self.parent_resource.check_create_complete(None))
+
+        # While the stack row is held in ctx's session its status is changed
+        # by another engine, so the next poll must read it again.
+        db_stack = db_api.stack_get(ctx, nested.id)
+        stack_object.Stack.update_by_id(utils.dummy_context(), nested.id,
+                                        {'status': nested.COMPLETE})
+        self.assertTrue(self.parent_resource.check_create_complete(None))
+        self.assertEqual(nested.IN_PROGRESS, db_stack.status)
+
+    def test_update_with_template_skips_unchanged(self):
+        nested = mock.MagicMock(action='UPDATE', status='COMPLETE',
+                                COMPLETE='COMPLETE', SUSPEND='SUSPEND')
+        self.parent_resource.id = 1
+        self.parent_resource.nested = mock.Mock(return_value=nested)
+        self.parent_resource._validate_nested_resources = mock.Mock()
+        self.parent_resource.rpc_client = mock.MagicMock()
+        rpcc = self.parent_resource.rpc_client.return_value
+        data = self.patchobject(self.parent_resource, 'data',
+                                return_value={})
+        data_set = self.patchobject(self.parent_resource, 'data_set')
+
+        self.assertIsNotNone(self.parent_resource.update_with_template(
+            self.simple_template, {}))
+        self.assertEqual(1, rpcc.update_stack.call_count)
+        (key, content_hash), _kwargs = data_set.call_args
+        self.assertEqual('nested_content_hash', key)
+
+        data.return_value = {key: content_hash}
+        self.assertIsNone(self.parent_resource.update_with_template(
+            self.simple_template, {}))
+        self.assertEqual(1, rpcc.update_stack.call_count)
+
+        # A nested stack that failed is updated again regardless
+        nested.status = 'FAILED'
+        self.assertIsNotNone(self.parent_resource.update_with_template(
+            self.simple_template, {}))
+        self.assertEqual(2, rpcc.update_stack.call_count)
+
     def test_need_update_in_failed_state_for_nested_resource(self):
         """
         The resource in any state and has nested stack,
@@ -696,12 +820,19 @@ class StackResourceCheckCompleteTest(common.HeatTestCase):
                                                self.parent_stack)
 
         self.nested = mock.MagicMock()
-        self.parent_resource.nested = mock.MagicMock(return_value=self.nested)
+        self.parent_resource.resource_id = 'nested-stack-id'
         self.parent_resource._nested = self.nested
+        self.get_status = self.patchobject(stack_object.Stack, 'get_status',
+                                           return_value=self.nested)
         setattr(self.nested, self.action.upper(), self.action.upper())
         self.nested.action = self.action.upper()
         self.nested.COMPLETE = 'COMPLETE'
 
+    def _assert_polled_row(self):
+        self.get_status.assert_called_once_with(
+            self.parent_resource.context, 'nested-stack-id',
+            show_deleted=self.show_deleted)
+
     def test_state_ok(self):
         """
         check_create_complete should return True create task is
@@ -711,8 +842,8 @@ class StackResourceCheckCompleteTest(common.HeatTestCase):
         complete = getattr(self.parent_resource,
                            'check_%s_complete' % self.action)
         self.assertIs(True, complete(None))
-        self.parent_resource.nested.assert_called_once_with(
-            show_deleted=self.show_deleted, force_reload=True)
+        self._assert_polled_row()
+        self.assertIsNone(self.parent_resource._nested)
 
     def test_state_err(self):
         """
@@ -724,8 +855,7 @@ class StackResourceCheckCompleteTest(common.HeatTestCase):
         complete = getattr(self.parent_resource,
                            'check_%s_complete' % self.action)
         self.assertRaises(resource.ResourceUnknownStatus, complete, None)
-        self.parent_resource.nested.assert_called_once_with(
-            show_deleted=self.show_deleted, force_reload=True)
+        self._assert_polled_row()
 
     def test_state_unknown(self):
         """
@@ -737,13 +867,19 @@ class StackResourceCheckCompleteTest(common.HeatTestCase):
         complete = getattr(self.parent_resource,
                            'check_%s_complete' % self.action)
         self.assertRaises(resource.ResourceUnknownStatus, complete, None)
-        self.parent_resource.nested.assert_called_once_with(
-            show_deleted=self.show_deleted, force_reload=True)
+        self._assert_polled_row()
 
     def test_in_progress(self):
         self.nested.status = 'IN_PROGRESS'
         complete = getattr(self.parent_resource,
                            'check_%s_complete' % self.action)
         self.assertFalse(complete(None))
-        self.parent_resource.nested.assert_called_once_with(
-            show_deleted=self.show_deleted, force_reload=True)
+        self._assert_polled_row()
+        self.assertIs(self.nested, self.parent_resource._nested)
+
+    def test_not_found(self):
+        self.get_status.return_value = None
+        complete = getattr(self.parent_resource,
+                           'check_%s_complete' % self.action)
+        self.assertEqual(self.action == 'delete', complete(None))
+        self._assert_polled_row()
@@ -0,0 +1,91 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from heat.common import exception
+from heat.engine import stack
+from heat.engine import sync_point
+from heat.engine import template
+from heat.objects import sync_point as sync_point_object
+from heat.tests import common
+from heat.tests import utils
+
+
+class SyncPointTest(common.HeatTestCase):
+    def setUp(self):
+        super(SyncPointTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        tmpl = template.Template({'HeatTemplateFormatVersion': '2012-12-12'})
+        self.stack = stack.Stack(self.ctx, 'sync_point_test', tmpl)
+        self.stack.store()
+
+    def test_make_key(self):
+        self.assertEqual('4:True', sync_point.make_key(4, True))
+        self.assertEqual('x:trav:False',
+                         sync_point.make_key('x', 'trav', False))
+
+    def test_create_and_get(self):
+        sync_point.create(self.ctx, 4, 'trav-1', True, self.stack.id)
+        sp = sync_point.get(self.ctx, 4, 'trav-1', True)
+        self.assertEqual('4', sp.entity_id)
+        self.assertEqual(0, sp.atomic_key)
+        self.assertEqual({}, sp.input_data)
+
+    def test_get_not_found(self):
+        self.assertRaises(exception.NotFound, sync_point.get,
+                          self.ctx, 4, 'trav-1', True)
+
+    def test_delete_all(self):
+        sync_point.create(self.ctx, 4, 'trav-1', True, self.stack.id)
+        sync_point.create(self.ctx, 5, 'trav-1', True, self.stack.id)
+        sync_point.create(self.ctx, 4, 'trav-2', True, self.stack.id)
+        sync_point.delete_all(self.ctx, self.stack.id, 'trav-1')
+
+        self.assertRaises(exception.NotFound, sync_point.get,
+                          self.ctx, 5, 'trav-1', True)
+        self.assertIsNotNone(sync_point.get(self.ctx, 4, 'trav-2', True))
+
+    def test_sync_waits_for_all_predecessors(self):
+        sync_point.create(self.ctx, 4, 'trav-1', True, self.stack.id)
+        propagate = mock.Mock()
+        predecessors = set(['1:True', '2:True'])
+
+        sync_point.sync(self.ctx, 4, 'trav-1', True, propagate,
+                        predecessors, {'1:True': {'id': 1}})
+        self.assertFalse(propagate.called)
+
+        sync_point.sync(self.ctx, 4, 'trav-1', True, propagate,
+                        predecessors, {'2:True': {'id': 2}})
+        propagate.assert_called_once_with(4, {'1:True': {'id': 1},
+                                              '2:True': {'id': 2}})
+        self.assertEqual(2, sync_point.get(self.ctx, 4, 'trav-1',
+                                           True).atomic_key)
+
+    def test_sync_retries_on_concurrent_update(self):
+        sync_point.create(self.ctx, 4, 'trav-1', True, self.stack.id)
+        real_update = sync_point_object.SyncPoint.update_input_data
+        results = [0]
+
+        def update(*args):
+            if results:
+                return results.pop()
+            return real_update(*args)
+
+        self.patchobject(sync_point_object.SyncPoint, 'update_input_data',
+                         side_effect=update)
+        propagate = mock.Mock()
+        sync_point.sync(self.ctx, 4, 'trav-1', True, propagate,
+                        set(['1:True']), {'1:True': None})
+
+        propagate.assert_called_once_with(4, {'1:True': None})
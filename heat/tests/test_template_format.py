@@ -197,3 +197,54 @@ class JsonYamlResolvedCompareTest(common.HeatTestCase):
         self.compare_stacks('WordPress_Single_Instance.template',
                             'WordPress_Single_Instance.yaml',
                             {'KeyName': 'test'})
+
+
+class ParseCacheTest(common.HeatTestCase):
+
+    tmpl_str = 'heat_template_version: 2013-05-23\nresources: {}\n'
+
+    def setUp(self):
+        super(ParseCacheTest, self).setUp()
+        self.cache = template_format.ParseCache()
+        self.patchobject(template_format, 'parse_cache', new=self.cache)
+        self.yaml_load = self.patchobject(yaml, 'load', wraps=yaml.load)
+
+    def test_hit_skips_parsing(self):
+        first = template_format.parse(self.tmpl_str)
+        second = template_format.parse(self.tmpl_str)
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.yaml_load.call_count)
+        self.assertEqual({'entries': 1, 'hits': 1, 'misses': 1},
+                         self.cache.stats())
+
+    def test_returns_copies(self):
+        first = template_format.parse(self.tmpl_str)
+        first['resources']['foo'] = {'type': 'OS::Heat::None'}
+        second = template_format.parse(self.tmpl_str)
+        self.assertEqual({}, second['resources'])
+        self.assertIsNot(first, second)
+
+    def test_json_not_cached(self):
+        put = self.patchobject(self.cache, 'put')
+        tmpl_str = '{"heat_template_version": "2013-05-23"}'
+        template_format.parse(tmpl_str)
+        self.assertFalse(put.called)
+        self.assertIsNone(self.cache.get(tmpl_str))
+
+    def test_errors_not_cached(self):
+        self.assertRaises(ValueError, template_format.parse, '{test')
+        self.assertRaises(ValueError, template_format.parse, '{test')
+        self.assertEqual(2, self.yaml_load.call_count)
+
+    def test_size_limit(self):
+        config.cfg.CONF.set_override('template_parse_cache_size', 1)
+        template_format.parse(self.tmpl_str)
+        template_format.parse('heat_template_version: 2014-10-16\n')
+        template_format.parse(self.tmpl_str)
+        self.assertEqual(3, self.yaml_load.call_count)
+
+    def test_disabled(self):
+        config.cfg.CONF.set_override('template_parse_cache_size', 0)
+        template_format.parse(self.tmpl_str)
+        template_format.parse(self.tmpl_str)
+        self.assertEqual(2, self.yaml_load.call_count)
@@ -11,6 +11,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from oslo_config import cfg
 import requests
 from requests import exceptions
@@ -21,8 +23,10 @@ from heat.tests import common
 
 
 class Response(object):
-    def __init__(self, buf=''):
+    def __init__(self, buf='', headers=None, status_code=200):
         self.buf = buf
+        self.headers = headers or {}
+        self.status_code = status_code
 
     def iter_content(self, chunk_size=1):
         while self.buf:
@@ -37,6 +41,7 @@ class UrlFetchTest(common.HeatTestCase):
     def setUp(self):
         super(UrlFetchTest, self).setUp()
         self.m.StubOutWithMock(requests, 'get')
+        self.patchobject(urlfetch, '_cache', new=collections.OrderedDict())
 
     def test_file_scheme_default_behaviour(self):
         self.m.ReplayAll()
@@ -130,3 +135,51 @@ class UrlFetchTest(common.HeatTestCase):
                                       urlfetch.get, url)
         self.assertIn("Template exceeds", six.text_type(exception))
         self.m.VerifyAll()
+
+    def test_etag_revalidated(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        requests.get(url, stream=True).AndReturn(
+            Response(data, headers={'ETag': '"abc"'}))
+        requests.get(url, stream=True,
+                     headers={'If-None-Match': '"abc"'}).AndReturn(
+            Response(status_code=304))
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_last_modified_changed(self):
+        url = 'http://example.com/template'
+        modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        requests.get(url, stream=True).AndReturn(
+            Response('old', headers={'Last-Modified': modified}))
+        requests.get(url, stream=True,
+                     headers={'If-Modified-Since': modified}).AndReturn(
+            Response('new'))
+        self.m.ReplayAll()
+        self.assertEqual('old', urlfetch.get(url))
+        self.assertEqual('new', urlfetch.get(url))
+        self.assertNotIn(url, urlfetch._cache)
+        self.m.VerifyAll()
+
+    def test_max_age_not_refetched(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        requests.get(url, stream=True).AndReturn(
+            Response(data, headers={'Cache-Control': 'public, max-age=60'}))
+        self.m.ReplayAll()
+        for i in range(3):
+            self.assertEqual(data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_cache_bounded(self):
+        cfg.CONF.set_override('template_fetch_cache_size', 1)
+        for url in ('http://example.com/a', 'http://example.com/b'):
+            requests.get(url, stream=True).AndReturn(
+                Response('data', headers={'ETag': '"abc"'}))
+        self.m.ReplayAll()
+        urlfetch.get('http://example.com/a')
+        urlfetch.get('http://example.com/b')
+        self.assertEqual(['http://example.com/b'], list(urlfetch._cache))
+        self.m.VerifyAll()
@@ -21,6 +21,7 @@ from heat.common import exception
 from heat.engine import parser
 from heat.engine import template
 from heat.engine import watchrule
+from heat.objects import watch_data
 from heat.objects import watch_rule
 from heat.tests import common
 from heat.tests import utils
@@ -383,6 +384,42 @@ class WatchRuleTest(common.HeatTestCase):
         self.assertEqual(now, self.wr.last_evaluated)
         self.assertEqual([], actions)
 
+    def test_evaluate_prunes_expired_data(self):
+        rule = {'EvaluationPeriods': '1',
+                'MetricName': 'test_metric',
+                'Period': '300',
+                'Statistic': 'Maximum',
+                'ComparisonOperator': 'GreaterThanOrEqualToThreshold',
+                'Threshold': '30'}
+
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now)
+        self.addCleanup(timeutils.clear_time_override)
+
+        self.wr = watchrule.WatchRule(context=self.ctx,
+                                      watch_name="testwatch_prune",
+                                      rule=rule,
+                                      stack_id=self.stack_id,
+                                      last_evaluated=now - datetime.timedelta(
+                                          seconds=300))
+        self.wr.store()
+        for value, age in ((50, 400), (25, 150)):
+            watch_data.WatchData.create(self.ctx, {
+                'data': {'test_metric': {'Value': value, 'Unit': 'Count'}},
+                'watch_rule_id': self.wr.id,
+                'created_at': now - datetime.timedelta(seconds=age)})
+
+        self.wr = watchrule.WatchRule.load(self.ctx, 'testwatch_prune')
+        self.wr.last_evaluated = now - datetime.timedelta(seconds=300)
+        self.assertEqual([], self.wr.evaluate())
+        self.assertEqual('NORMAL', self.wr.state)
+
+        remaining = list(watch_data.WatchData.get_all_by_watch_rule_id(
+            self.ctx, self.wr.id))
+        self.assertEqual([25], [d.data['test_metric']['Value']
+                                for d in remaining])
+        self.assertEqual(1, len(self.wr.watch_data))
+
     def test_evaluate_suspend(self):
         rule = {'EvaluationPeriods': '1',
                 'MetricName': 'test_metric',